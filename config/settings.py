@@ -17,12 +17,19 @@ MODELS_DIR.mkdir(exist_ok=True)
 # Fonte de vídeo (0 = webcam padrão, ou caminho de arquivo)
 VIDEO_SOURCE = 0
 
+# Várias câmeras em um único processo (main_multicam.py)
+# camera_id -> fonte (índice da webcam, arquivo ou URL RTSP)
+CAMERA_SOURCES = {
+    "cam0": VIDEO_SOURCE,
+}
+
 # Confiança mínima para detecções
 CONF_THRESHOLD = 0.3  # Reduzido para 0.3 (mais sensível)
 
 # Definir EPIs obrigatórios por setor/cargo (usando classes customizadas)
 # Com modelo customizado: ["helmet", "goggles", "gloves"]
 # Com modelo COCO: [] (genérico - sem EPIs específicos)
+# No máximo 16 EPIs por lista (cada EPI é um bit; a validação usa tabelas de 2^N)
 REQUIRED_PPE_BY_SECTOR = {
     "default": ["helmet", "goggles"],  # Customizado: capacete e óculos obrigatórios
     "construção": ["helmet", "goggles", "gloves"],
@@ -32,7 +39,7 @@ REQUIRED_PPE_BY_SECTOR = {
 }
 
 # PPE padrão (usado se nenhum setor for especificado)
-# Altere para [] se quiser apenas detectar pessoas
+# Altere para [] se quiser apenas detectar pessoas (no máximo 16 EPIs)
 DEFAULT_REQUIRED_PPE = ["helmet", "goggles"]  # Capacete e óculos obrigatórios
 
 # Mapeamento de classes do modelo para tipos de EPI (português)
@@ -55,12 +62,99 @@ EPI_CLASS_MAPPING = {
     "tie": "uniforme",
 }
 
+# Entrada do modelo: lado maior (múltiplo de 32); o frame vai direto para
+# esse tamanho num único resize. 320 equivale ao antigo fator 0.5 em 640x480
+IMGSZ = 320
+
+# Runtime de inferência (utils.backends.BACKENDS): "pytorch" (Ultralytics),
+# "onnxruntime" ou "openvino" (pip install onnxruntime / openvino). Os
+# exportados ficam em cache em models/exported/ (hash dos pesos + imgsz)
+INFERENCE_BACKEND = "pytorch"
+
+# Modelo INT8 gerado por scripts/quantize_int8.py (requer INFERENCE_BACKEND = "onnxruntime")
+USE_INT8_MODEL = False
+QUANTIZED_MODEL_PATH = "models/epi_custom_int8.onnx"
+
+# Warm-up do modelo na partida (utils.model_manager): inferências em frames
+# sintéticos antes da primeira câmera; tempos por fase vão para o log
+MODEL_WARMUP_ITERATIONS = 2
+MODEL_WARMUP_SHAPE = (480, 640, 3)  # Resolução típica das câmeras (altura, largura, canais)
+
+# Troca do modelo sem parar o vídeo (utils.hot_swap): pesos novos no mesmo
+# caminho (ou tecla R / SIGHUP) são carregados e aquecidos em segundo plano e
+# entram entre dois frames; se falharem, o modelo anterior continua/volta
+MODEL_HOT_SWAP_ENABLED = True
+MODEL_WATCH_INTERVAL = 2.0  # Segundos entre verificações do arquivo de pesos
+MODEL_SWAP_GRACE_FRAMES = 50  # Inferências até liberar o modelo anterior
+
+# Modo de detecção (EPIDetector.DETECTION_MODES)
+# "single": uma passada no frame reduzido
+# "two_stage": pessoas no frame reduzido, EPIs nos recortes das pessoas em
+#              resolução original (melhor recall de óculos/luvas à distância)
+DETECTION_MODE = "single"
+TWO_STAGE_CROP_MARGIN = 0.15  # Margem em volta da pessoa (fração da caixa)
+TWO_STAGE_IMGSZ = 320  # Resolução do modelo nos recortes
+# "tiled": frame em resolução original dividido em tiles sobrepostos (câmeras 4K)
+TILE_SIZE = 640  # Lado do tile (pixels do frame original)
+TILE_OVERLAP = 0.2  # Sobreposição entre tiles vizinhos
+# "dual": dois modelos no mesmo escalonador — pessoas com PERSON_MODEL_PATH
+#         (ex: COCO) e EPIs com o modelo principal nos recortes das pessoas
+#         (margem e resolução de TWO_STAGE_*), para modelos de EPI sem "person"
+PERSON_MODEL_PATH = "yolov8n.pt"
+PERSON_IMGSZ = 320  # Entrada do modelo de pessoas
+PERSON_DETECTION_INTERVAL = 3  # Modelo de pessoas a cada N frames, rastreador entre eles (1 = todo frame)
+
 # Limiar de overlap para associação EPI↔pessoa (0.0-1.0)
 OVERLAP_THRESHOLD = 0.08
 
 # Limiar de distância centroid (pixels) para associação alternativa
 CENTROID_DISTANCE_THRESHOLD = 150
 
+# Regiões de interesse por câmera: polígono [(x, y), ...] em pixels do frame.
+# A inferência roda só no retângulo do polígono e detecções com centroid
+# fora dele são descartadas. Ex: {"cam0": [(100, 80), (1180, 80), (1180, 700), (100, 700)]}
+CAMERA_ROIS = {}
+
+# Zonas por câmera mapeadas para setores de REQUIRED_PPE_BY_SECTOR: cada pessoa
+# é validada contra os EPIs do setor onde está o pé (centro da base da caixa);
+# fora das zonas valem os EPIs padrão. Um setor pode ter um polígono ou uma
+# lista deles. Ex: {"cam0": {"química": [(0, 300), (640, 300), (640, 720), (0, 720)],
+#                            "escritório": [(640, 0), (1280, 0), (1280, 720), (640, 720)]}}
+CAMERA_ZONES = {}
+
+# Rastreamento de pessoas (IDs estáveis por câmera no log de auditoria)
+TRACKING_ENABLED = True
+TRACK_IOU_THRESHOLD = 0.3  # IoU mínimo entre caixa prevista e detecção
+TRACK_MAX_AGE = 30  # Frames sem detecção até descartar a track
+
+# Keyframes: detector a cada N frames; entre eles as caixas de pessoas e EPIs
+# são propagadas pelo rastreador (requer TRACKING_ENABLED)
+KEYFRAME_ENABLED = False
+KEYFRAME_INTERVAL = 3  # N inicial
+KEYFRAME_MIN_INTERVAL = 1  # N se adapta ao movimento da cena entre os limites
+KEYFRAME_MAX_INTERVAL = 8
+
+# Gate de movimento: sem movimento na cena, a inferência é pulada e o
+# último resultado reaproveitado (corredores vazios, turnos da noite)
+MOTION_GATE_ENABLED = False
+MOTION_THRESHOLD = 0.005  # Fração de pixels alterados que conta como movimento
+MOTION_THRESHOLDS = {}  # Limiar por câmera, ex: {"doca": 0.02}
+MOTION_PIXEL_DELTA = 25  # Diferença de cinza (0-255) para o pixel contar como alterado
+MOTION_MAX_INTERVAL = 10.0  # Segundos máximos sem inferência (refresh forçado)
+
+# Inferência em lote (detect_batch, main_multicam)
+BATCH_MAX_SIZE = 8  # Máximo de frames por chamada do modelo
+BATCH_MAX_WAIT = 0.02  # Segundos esperando mais câmeras após o primeiro frame pronto (0 = sem espera)
+
+# Processos de inferência em paralelo (0 = tudo no processo principal)
+# Frames trafegam por memória compartilhada. "spawn": cada worker carrega o
+# próprio modelo; "fork" (Linux): workers herdam o modelo já carregado e
+# aquecido do processo principal (pesos compartilhados copy-on-write; só com
+# INFERENCE_BACKEND = "pytorch" e pool criado na thread principal, senão cada
+# worker carrega o seu; pools da troca de modelo a quente usam "spawn")
+INFERENCE_WORKERS = 0
+WORKER_START_METHOD = "spawn"
+
 # Salvar vídeo anotado (True/False)
 SAVE_ANNOTATED_VIDEO = False
 OUTPUT_VIDEO_PATH = LOGS_DIR / "annotated_output.mp4"
@@ -68,9 +162,20 @@ OUTPUT_VIDEO_PATH = LOGS_DIR / "annotated_output.mp4"
 # Logging CSV
 CSV_LOG_PATH = LOGS_DIR / "ppe_audit.csv"
 
-# Banco de dados (opcional)
-# USE_DATABASE = True
-# DATABASE_URL = "sqlite:///logs/ppe_detector.db"
+# Escrita do CSV em thread própria (o loop de detecção não espera pelo disco)
+AUDIT_ASYNC_WRITE = True
+AUDIT_WRITER_OPTIONS = {
+    "queue_size": 10000,  # Linhas aguardando escrita
+    "flush_rows": 100,  # Flush a cada N linhas...
+    "flush_interval": 1.0,  # ...ou a cada N segundos, o que vier primeiro
+    "fsync_interval": 5.0,  # fsync a cada N segundos (0 = todo flush, None = nunca)
+    "backpressure": "drop_oldest",  # Fila cheia: "block", "drop_oldest" ou "spill"
+}
+
+# Banco de dados (opcional): auditoria em SQLite (WAL, inserções em lote, índices)
+# Recomendado para logs grandes e consultas por período/severidade/câmera
+USE_DATABASE = False
+DATABASE_PATH = LOGS_DIR / "ppe_detector.db"
 
 # API REST
 API_HOST = "0.0.0.0"
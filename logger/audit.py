@@ -2,24 +2,60 @@
 Sistema de logging estruturado para auditoria.
 """
 import csv
-import json
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
-from dataclasses import asdict
+from typing import Iterator, List, Dict
+
+from logger.export import in_time_range, write_rows
+from logger.writer import AsyncCSVWriter
 
 logger = logging.getLogger(__name__)
 
+CSV_HEADER = [
+    "timestamp",
+    "frame",
+    "pessoa_id",
+    "bbox",
+    "missing_ppe",
+    "person_conf",
+    "severity",
+    "camera_id",
+]
+
 
 class AuditLogger:
     """Registra detecções e alertas em CSV e JSON."""
 
-    def __init__(self, csv_path: Path, json_path: Path = None):
+    def __init__(
+        self,
+        csv_path: Path,
+        json_path: Path = None,
+        async_write: bool = False,
+        writer_options: Dict = None,
+    ):
+        """
+        Inicializar logger.
+
+        Args:
+            csv_path: Arquivo CSV de auditoria
+            json_path: Destino padrão de export_json
+            async_write: Escrever o CSV em thread própria (AsyncCSVWriter)
+            writer_options: Parâmetros do AsyncCSVWriter (queue_size, flush_rows,
+                flush_interval, fsync_interval, backpressure)
+        """
         self.csv_path = csv_path
         self.json_path = json_path
         self._init_csv()
         self.logs_buffer = []
+        self.writer = AsyncCSVWriter(csv_path, **(writer_options or {})) if async_write else None
+
+        # Contadores incrementais (get_stats em O(1), sem reler o CSV)
+        self._total = 0
+        self._violations = 0
+        self._critical = 0
+        self._warning = 0
+        self._rebuild_stats()
 
     def _init_csv(self):
         """Criar arquivo CSV com cabeçalhos se não existir."""
@@ -29,16 +65,49 @@ class AuditLogger:
         if not self.csv_path.exists():
             with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    "timestamp",
-                    "frame",
-                    "pessoa_id",
-                    "bbox",
-                    "missing_ppe",
-                    "person_conf",
-                    "severity",
-                ])
+                writer.writerow(CSV_HEADER)
             logger.info(f"Arquivo CSV criado: {self.csv_path}")
+        else:
+            self._migrate_header()
+
+    def _migrate_header(self):
+        """Adicionar colunas novas (ex: camera_id) a um CSV de versão anterior."""
+        with open(self.csv_path, "r", newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+            if header == CSV_HEADER or not header:
+                return
+            missing = [col for col in CSV_HEADER if col not in header]
+            if not missing:
+                return
+
+            tmp_path = self.csv_path.with_suffix(".csv.tmp")
+            with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+                writer = csv.writer(out)
+                writer.writerow(header + missing)
+                for row in csv.reader(f):
+                    writer.writerow(row + [""] * len(missing))
+
+        tmp_path.replace(self.csv_path)
+        logger.info(f"CSV migrado para novo formato (colunas adicionadas: {missing})")
+
+    def _rebuild_stats(self):
+        """Recalcular os contadores a partir do CSV (uma vez, na inicialização)."""
+        try:
+            with open(self.csv_path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self._count(row.get("missing_ppe", ""), row.get("severity"))
+        except Exception as e:
+            logger.error(f"Erro ao ler CSV: {e}")
+
+    def _count(self, missing_str: str, severity: str):
+        """Atualizar contadores com uma detecção."""
+        self._total += 1
+        if missing_str:
+            self._violations += 1
+        if severity == "critical":
+            self._critical += 1
+        elif severity == "warning":
+            self._warning += 1
 
     def log_detection(
         self,
@@ -48,13 +117,21 @@ class AuditLogger:
         missing_epis: List[str],
         person_conf: float,
         severity: str = "info",
+        camera_id: str = "",
     ):
         """Registrar uma detecção."""
         timestamp = datetime.now().isoformat(timespec="milliseconds")
         bbox_str = f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}"
         missing_str = ";".join(missing_epis) if missing_epis else ""
 
-        row = [timestamp, frame_number, person_id, bbox_str, missing_str, person_conf, severity]
+        row = [timestamp, frame_number, person_id, bbox_str, missing_str, person_conf, severity, camera_id]
+
+        self._count(missing_str, severity)
+
+        if self.writer is not None:
+            # Escrita em background: não bloqueia o loop de detecção
+            self.writer.write(row)
+            return
 
         self.logs_buffer.append(row)
 
@@ -64,6 +141,10 @@ class AuditLogger:
 
     def flush(self):
         """Escrever buffer em CSV."""
+        if self.writer is not None:
+            self.writer.flush()
+            return
+
         if not self.logs_buffer:
             return
 
@@ -75,51 +156,154 @@ class AuditLogger:
         except Exception as e:
             logger.error(f"Erro ao escrever CSV: {e}")
 
+    def close(self):
+        """Escrever pendências e liberar o arquivo (chamar ao encerrar)."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.flush()
+
     def get_logs(self, limit: int | None = 100) -> List[Dict]:
         """Retornar logs recentes em formato JSON.
 
+        Lê o CSV de trás para frente em blocos, então o custo é proporcional
+        a `limit` e não ao tamanho do arquivo.
+
         Args:
             limit: número máximo de registros a retornar. Se `None`, retorna todos.
         """
         self.flush()  # Garantir que tudo foi escrito
 
+        if limit is None:
+            logs, _ = self.read_page(cursor=0, limit=None)
+            return logs
+        if limit <= 0:
+            return []
+
+        try:
+            with open(self.csv_path, "rb") as f:
+                header_end = len(f.readline())
+                lines = self._tail_lines(f, header_end, limit)
+            return self._parse_lines(lines)
+        except Exception as e:
+            logger.error(f"Erro ao ler CSV: {e}")
+            return []
+
+    @staticmethod
+    def _tail_lines(f, header_end: int, limit: int, block_size: int = 64 * 1024) -> List[bytes]:
+        """Últimas `limit` linhas do arquivo (depois do cabeçalho), lendo blocos do fim."""
+        f.seek(0, 2)
+        pos = f.tell()
+        blocks = []
+        newlines = 0
+        # Precisa de limit+1 quebras de linha para garantir `limit` linhas completas
+        while pos > header_end and newlines <= limit:
+            read_size = min(block_size, pos - header_end)
+            pos -= read_size
+            f.seek(pos)
+            block = f.read(read_size)
+            newlines += block.count(b"\n")
+            blocks.append(block)
+        data = b"".join(reversed(blocks))
+
+        lines = data.split(b"\n")
+        if pos > header_end:
+            lines = lines[1:]  # Primeira linha do bloco pode estar incompleta
+        lines = [line for line in lines if line.strip()]
+        return lines[-limit:]
+
+    def _parse_lines(self, lines: List[bytes]) -> List[Dict]:
+        """Converter linhas CSV (bytes) em dicts com as colunas do cabeçalho."""
+        text = [line.decode("utf-8").rstrip("\r") for line in lines]
+        return [dict(zip(CSV_HEADER, row)) for row in csv.reader(text)]
+
+    def read_page(self, cursor: int = 0, limit: int | None = 100):
+        """
+        Ler logs para frente a partir de um cursor (posição em bytes no CSV).
+
+        Args:
+            cursor: 0 = início do arquivo; ou o `next_cursor` de uma chamada anterior
+            limit: máximo de registros (None = até o fim)
+
+        Returns:
+            (logs, next_cursor). Passe next_cursor na próxima chamada para
+            receber apenas as linhas novas.
+        """
+        self.flush()
         logs = []
         try:
-            with open(self.csv_path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    logs.append(row)
+            with open(self.csv_path, "rb") as f:
+                header_end = len(f.readline())
+                f.seek(max(cursor, header_end))
+                next_cursor = f.tell()
+                lines = []
+                while limit is None or len(lines) < limit:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break  # Fim do arquivo ou linha ainda sendo escrita
+                    next_cursor += len(line)
+                    if line.strip():
+                        lines.append(line)
+            logs = self._parse_lines(lines)
         except Exception as e:
             logger.error(f"Erro ao ler CSV: {e}")
+            return logs, cursor
+        return logs, next_cursor
 
-        if limit is None:
-            return logs
-        # Se limit for maior que o total, devolve tudo
-        if limit >= len(logs):
-            return logs
-        return logs[-limit:]
+    def end_cursor(self) -> int:
+        """Cursor do fim atual do arquivo (para acompanhar apenas linhas novas)."""
+        self.flush()
+        return self.csv_path.stat().st_size
 
-    def export_json(self, output_path: Path = None):
-        """Exportar logs em JSON."""
+    def iter_logs(self, since: str = None, until: str = None) -> Iterator[Dict]:
+        """Percorrer os logs em ordem, um registro por vez (memória constante).
+
+        Args:
+            since, until: Intervalo de timestamp ISO (since <= timestamp < until)
+        """
         self.flush()
-        output_path = output_path or self.json_path or self.csv_path.parent / "ppe_audit.json"
+        with open(self.csv_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Cabeçalho
+            for row in reader:
+                if row and in_time_range(row[0], since, until):
+                    yield dict(zip(CSV_HEADER, row))
+
+    def export_json(
+        self,
+        output_path: Path = None,
+        fmt: str = "json",
+        since: str = None,
+        until: str = None,
+        compress: bool = None,
+    ) -> int:
+        """Exportar logs em JSON/NDJSON gravando em streaming.
+
+        Args:
+            output_path: Arquivo de saída (".gz" ativa compressão automaticamente)
+            fmt: "json" (array) ou "ndjson" (um registro por linha)
+            since, until: Intervalo de timestamp ISO opcional
+            compress: Forçar (True) ou desativar (False) gzip
+
+        Returns:
+            Número de registros exportados
+        """
+        output_path = output_path or self.json_path or self.csv_path.parent / f"ppe_audit.{fmt}"
 
-        logs = self.get_logs(limit=None)
         try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
-            logger.info(f"Logs exportados para JSON: {output_path}")
+            count = write_rows(self.iter_logs(since, until), output_path, fmt, compress)
+            logger.info(f"{count} logs exportados para {fmt.upper()}: {output_path}")
+            return count
         except Exception as e:
             logger.error(f"Erro ao exportar JSON: {e}")
+            return 0
 
     def get_stats(self) -> Dict:
-        """Retornar estatísticas dos logs."""
-        logs = self.get_logs(limit=None)
-
-        total = len(logs)
-        violations = len([log for log in logs if log.get("missing_ppe", "")])
-        critical = len([log for log in logs if log.get("severity") == "critical"])
-        warning = len([log for log in logs if log.get("severity") == "warning"])
+        """Retornar estatísticas dos logs (contadores mantidos em memória)."""
+        total = self._total
+        violations = self._violations
+        critical = self._critical
+        warning = self._warning
 
         return {
             "total_detections": total,
@@ -128,3 +312,17 @@ class AuditLogger:
             "warning_alerts": warning,
             "compliance_rate": (1 - violations / total) * 100 if total > 0 else 100,
         }
+
+
+def create_audit_logger(
+    csv_path: Path,
+    db_path: Path = None,
+    async_write: bool = False,
+    writer_options: Dict = None,
+):
+    """Criar o logger de auditoria: SQLite se db_path for informado, senão CSV."""
+    if db_path is not None:
+        from logger.sqlite_audit import SQLiteAuditLogger
+
+        return SQLiteAuditLogger(db_path, writer_options=writer_options)
+    return AuditLogger(csv_path, async_write=async_write, writer_options=writer_options)
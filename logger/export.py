@@ -0,0 +1,66 @@
+"""
+Exportação da auditoria em streaming (JSON ou NDJSON, opcionalmente gzip).
+As linhas são escritas uma a uma, então a memória usada é constante
+independentemente do tamanho do log.
+"""
+import gzip
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("json", "ndjson")
+
+
+def in_time_range(timestamp: str, since: Optional[str], until: Optional[str]) -> bool:
+    """Timestamps ISO são comparáveis como texto: since <= timestamp < until."""
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp >= until:
+        return False
+    return True
+
+
+def write_rows(
+    rows: Iterable[Dict],
+    output_path: Path,
+    fmt: str = "json",
+    compress: Optional[bool] = None,
+) -> int:
+    """
+    Gravar registros em JSON (array) ou NDJSON (um objeto por linha).
+
+    Args:
+        rows: Iterável de dicts (consumido sob demanda)
+        output_path: Arquivo de saída
+        fmt: "json" ou "ndjson"
+        compress: Gravar gzip. None = automático pela extensão .gz
+
+    Returns:
+        Número de registros exportados
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {fmt} (use {EXPORT_FORMATS})")
+
+    output_path = Path(output_path)
+    if compress is None:
+        compress = output_path.suffix == ".gz"
+    opener = gzip.open if compress else open
+
+    count = 0
+    with opener(output_path, "wt", encoding="utf-8", newline="\n") as f:
+        if fmt == "json":
+            f.write("[")
+        for row in rows:
+            line = json.dumps(row, ensure_ascii=False)
+            if fmt == "json":
+                f.write(",\n  " if count else "\n  ")
+            f.write(line)
+            if fmt == "ndjson":
+                f.write("\n")
+            count += 1
+        if fmt == "json":
+            f.write("\n]\n" if count else "]\n")
+    return count
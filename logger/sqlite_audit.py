@@ -0,0 +1,292 @@
+"""
+Backend de auditoria em SQLite local.
+Mesma interface do AuditLogger (CSV), com modo WAL, inserções em lote numa
+thread própria e índices por timestamp, câmera, severidade e pessoa/track.
+"""
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from logger.audit import CSV_HEADER
+from logger.export import write_rows
+from logger.writer import AsyncBatchWriter
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    frame INTEGER,
+    pessoa_id INTEGER,
+    bbox TEXT,
+    missing_ppe TEXT,
+    person_conf REAL,
+    severity TEXT,
+    camera_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections (timestamp);
+CREATE INDEX IF NOT EXISTS idx_detections_camera ON detections (camera_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_detections_severity ON detections (severity, timestamp);
+CREATE INDEX IF NOT EXISTS idx_detections_person ON detections (pessoa_id, timestamp);
+"""
+
+INSERT_SQL = (
+    f"INSERT INTO detections ({', '.join(CSV_HEADER)}) "
+    f"VALUES ({', '.join('?' for _ in CSV_HEADER)})"
+)
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path), timeout=30.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # Seguro com WAL; fsync no checkpoint
+    return conn
+
+
+class SQLiteBatchWriter(AsyncBatchWriter):
+    """Escritor em background: cada lote é uma transação com executemany."""
+
+    def __init__(self, db_path: Path, **options):
+        self.db_path = Path(db_path)
+        self._conn = None
+        super().__init__(self.db_path.with_suffix(".spill.csv"), **options)
+
+    def _open(self):
+        self._conn = _connect(self.db_path)
+
+    def _write_batch(self, rows: List[List]):
+        with self._conn:  # Uma transação por lote
+            self._conn.executemany(INSERT_SQL, rows)
+
+    def _sync(self):
+        self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def _close(self):
+        self._conn.close()
+
+
+class SQLiteAuditLogger:
+    """Registra detecções em SQLite (mesma API do AuditLogger)."""
+
+    def __init__(self, db_path: Path, json_path: Path = None, writer_options: Dict = None):
+        """
+        Inicializar logger.
+
+        Args:
+            db_path: Arquivo do banco SQLite
+            json_path: Destino padrão de export_json
+            writer_options: Parâmetros do escritor em lote (queue_size, flush_rows,
+                flush_interval, fsync_interval, backpressure)
+        """
+        self.db_path = Path(db_path)
+        self.json_path = json_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Conexão de leitura (WAL permite ler enquanto a thread do escritor grava)
+        self._conn = _connect(self.db_path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        logger.info(f"Banco de auditoria: {self.db_path}")
+
+        self._total = 0
+        self._violations = 0
+        self._critical = 0
+        self._warning = 0
+        self._rebuild_stats()
+
+        self.writer = SQLiteBatchWriter(self.db_path, **(writer_options or {}))
+
+    def _rebuild_stats(self):
+        """Carregar contadores com consultas indexadas (uma vez, na inicialização)."""
+        self._total = self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+        self._critical = self._count_severity("critical")
+        self._warning = self._count_severity("warning")
+        self._violations = self._conn.execute(
+            "SELECT COUNT(*) FROM detections WHERE missing_ppe != ''"
+        ).fetchone()[0]
+
+    def _count_severity(self, severity: str, since: str = None) -> int:
+        sql = "SELECT COUNT(*) FROM detections WHERE severity = ?"
+        params = [severity]
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        return self._conn.execute(sql, params).fetchone()[0]
+
+    def log_detection(
+        self,
+        frame_number: int,
+        person_id: int,
+        bbox: tuple,
+        missing_epis: List[str],
+        person_conf: float,
+        severity: str = "info",
+        camera_id: str = "",
+    ):
+        """Registrar uma detecção (inserida em lote pela thread do escritor)."""
+        timestamp = datetime.now().isoformat(timespec="milliseconds")
+        bbox_str = f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}"
+        missing_str = ";".join(missing_epis) if missing_epis else ""
+
+        self._total += 1
+        if missing_str:
+            self._violations += 1
+        if severity == "critical":
+            self._critical += 1
+        elif severity == "warning":
+            self._warning += 1
+
+        self.writer.write(
+            [timestamp, frame_number, person_id, bbox_str, missing_str, person_conf, severity, camera_id]
+        )
+
+    def flush(self):
+        """Esperar a gravação das linhas pendentes."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """Gravar pendências e fechar o banco."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self._conn.close()
+
+    def query(
+        self,
+        since: str = None,
+        until: str = None,
+        severity: str = None,
+        camera_id: str = None,
+        person_id: int = None,
+        limit: Optional[int] = 100,
+    ) -> List[Dict]:
+        """
+        Consultar detecções usando os índices (mais recentes primeiro).
+
+        Args:
+            since, until: Intervalo de timestamp ISO (ex: "2025-11-26T14:00:00")
+            severity: "ok", "warning" ou "critical"
+            camera_id: Filtrar por câmera
+            person_id: Filtrar por pessoa/track
+            limit: Máximo de registros (None = todos)
+        """
+        self.flush()
+        sql, params = self._where(since, until, severity, camera_id, person_id)
+        sql = f"SELECT {', '.join(CSV_HEADER)} FROM detections{sql} ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    @staticmethod
+    def _where(since, until, severity, camera_id, person_id):
+        clauses, params = [], []
+        for column, op, value in (
+            ("timestamp", ">=", since),
+            ("timestamp", "<", until),
+            ("severity", "=", severity),
+            ("camera_id", "=", camera_id),
+            ("pessoa_id", "=", person_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def get_logs(self, limit: int | None = 100) -> List[Dict]:
+        """Retornar logs recentes (ordem cronológica, como no AuditLogger)."""
+        self.flush()
+        sql = f"SELECT {', '.join(CSV_HEADER)} FROM detections ORDER BY id DESC"
+        params = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = [dict(row) for row in self._conn.execute(sql, params)]
+        rows.reverse()
+        return rows
+
+    def read_page(self, cursor: int = 0, limit: Optional[int] = 100):
+        """
+        Ler logs para frente a partir de um cursor (id da última linha lida).
+
+        Returns:
+            (logs, next_cursor), como em AuditLogger.read_page
+        """
+        self.flush()
+        sql = f"SELECT id, {', '.join(CSV_HEADER)} FROM detections WHERE id > ? ORDER BY id"
+        params = [cursor]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = [dict(row) for row in self._conn.execute(sql, params)]
+        next_cursor = rows[-1]["id"] if rows else cursor
+        for row in rows:
+            del row["id"]
+        return rows, next_cursor
+
+    def end_cursor(self) -> int:
+        """Cursor da última linha gravada (para acompanhar apenas linhas novas)."""
+        self.flush()
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM detections").fetchone()[0]
+
+    def iter_logs(self, since: str = None, until: str = None) -> Iterator[Dict]:
+        """Percorrer os logs em ordem cronológica sem carregar tudo em memória."""
+        self.flush()
+        where, params = self._where(since, until, None, None, None)
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(CSV_HEADER)} FROM detections{where} ORDER BY timestamp, id",
+            params,
+        )
+        for row in cursor:
+            yield dict(row)
+
+    def export_json(
+        self,
+        output_path: Path = None,
+        fmt: str = "json",
+        since: str = None,
+        until: str = None,
+        compress: bool = None,
+    ) -> int:
+        """Exportar logs em JSON/NDJSON gravando em streaming (ver AuditLogger.export_json)."""
+        output_path = output_path or self.json_path or self.db_path.parent / f"ppe_audit.{fmt}"
+
+        try:
+            count = write_rows(self.iter_logs(since, until), output_path, fmt, compress)
+            logger.info(f"{count} logs exportados para {fmt.upper()}: {output_path}")
+            return count
+        except Exception as e:
+            logger.error(f"Erro ao exportar JSON: {e}")
+            return 0
+
+    def get_stats(self, since: str = None, camera_id: str = None) -> Dict:
+        """
+        Retornar estatísticas.
+        Sem filtros usa os contadores em memória; com filtros, consulta indexada.
+        """
+        if since is None and camera_id is None:
+            total, violations = self._total, self._violations
+            critical, warning = self._critical, self._warning
+        else:
+            self.flush()
+            where, params = self._where(since, None, None, camera_id, None)
+            total, violations, critical, warning = self._conn.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(missing_ppe != ''), 0), "
+                "COALESCE(SUM(severity = 'critical'), 0), "
+                "COALESCE(SUM(severity = 'warning'), 0) "
+                f"FROM detections{where}",
+                params,
+            ).fetchone()
+
+        return {
+            "total_detections": total,
+            "violations": violations,
+            "critical_alerts": critical,
+            "warning_alerts": warning,
+            "compliance_rate": (1 - violations / total) * 100 if total > 0 else 100,
+        }
@@ -0,0 +1,316 @@
+"""
+Escrita assíncrona da auditoria.
+Uma thread dedicada consome linhas de uma fila limitada e mantém o destino
+(arquivo CSV ou banco SQLite) aberto, para que o loop de detecção nunca
+espere por I/O de disco.
+"""
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "spill")
+
+# Marcadores de controle: vão pela fila de controle, nunca pela de dados
+_STOP = object()
+_WAKE = object()  # Acorda a thread para olhar a fila de controle (pode ser descartado)
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AsyncBatchWriter(ABC):
+    """
+    Base dos escritores em background.
+
+    As linhas são acumuladas e gravadas em lote por quantidade ou tempo, o que
+    vier primeiro. Subclasses implementam _open, _write_batch, _sync e _close,
+    todos executados na thread do escritor. Um lote que falha (banco travado,
+    disco cheio) fica pendente e é regravado no próximo prazo de gravação.
+    """
+
+    def __init__(
+        self,
+        spill_path: Path,
+        queue_size: int = 10000,
+        flush_rows: int = 100,
+        flush_interval: float = 1.0,
+        fsync_interval: Optional[float] = 5.0,
+        backpressure: str = "drop_oldest",
+    ):
+        """
+        Inicializar escritor.
+
+        Args:
+            spill_path: Arquivo auxiliar usado com backpressure="spill"
+            queue_size: Máximo de linhas aguardando escrita
+            flush_rows: Gravar após esta quantidade de linhas pendentes
+            flush_interval: Gravar após este tempo (s) desde a última gravação
+            fsync_interval: Intervalo (s) entre fsync; 0 = a cada gravação, None = nunca
+            backpressure: Fila cheia -> "block" (espera), "drop_oldest"
+                (descarta a linha mais antiga) ou "spill" (grava em arquivo auxiliar)
+        """
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure inválido: {backpressure} (use {BACKPRESSURE_POLICIES})")
+
+        self.spill_path = Path(spill_path)
+        self.queue_size = queue_size
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.backpressure = backpressure
+
+        self._queue = queue.Queue(maxsize=queue_size)  # Só linhas (e _WAKE)
+        self._control = queue.Queue()  # Flush/parada: fora da fila de dados, nunca descartados
+        self._spill_lock = threading.Lock()
+        self._closed = False
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.rows_spilled = 0
+
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    @abstractmethod
+    def _open(self):
+        """Abrir o destino."""
+
+    @abstractmethod
+    def _write_batch(self, rows: List[List]):
+        """Gravar um lote (de preferência atômico: um lote que falha é regravado inteiro)."""
+
+    def _sync(self):
+        """Garantir durabilidade (fsync/checkpoint)."""
+
+    @abstractmethod
+    def _close(self):
+        """Fechar o destino."""
+
+    def write(self, row: List):
+        """Enfileirar uma linha. Nunca bloqueia, exceto com backpressure='block'."""
+        if self._closed:
+            raise RuntimeError("Escritor de auditoria já foi fechado")
+
+        if self.backpressure == "block":
+            self._queue.put(row)
+            return
+
+        try:
+            self._queue.put_nowait(row)
+            return
+        except queue.Full:
+            pass
+
+        if self.backpressure == "drop_oldest":
+            try:
+                if self._queue.get_nowait() is not _WAKE:
+                    self.rows_dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.rows_dropped += 1
+        else:  # spill
+            self._spill(row)
+
+    def _spill(self, row: List):
+        """Fila cheia: gravar em arquivo auxiliar (juntado ao destino no próximo flush)."""
+        with self._spill_lock:
+            with open(self.spill_path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(row)
+            self.rows_spilled += 1
+            if self.rows_spilled == 1:
+                logger.warning(f"Fila de auditoria cheia; gravando excedente em {self.spill_path}")
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass  # Fila cheia: a thread está consumindo e verá o pedido no próximo item
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Pedir gravação imediata (linhas enfileiradas e spill) e esperar.
+
+        Returns:
+            False se o escritor não terminou dentro de timeout
+        """
+        if self._closed:
+            return True
+        request = _FlushRequest()
+        self._control.put(request)
+        self._wake()
+        if not request.done.wait(timeout):
+            logger.warning(f"Flush da auditoria não terminou em {timeout}s")
+            return False
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Gravar tudo que está na fila, fechar o destino e encerrar a thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._control.put(_STOP)
+        self._wake()
+        self._thread.join(timeout)
+        logger.info(
+            f"Escritor de auditoria encerrado: {self.rows_written} linhas, "
+            f"{self.rows_dropped} descartadas, {self.rows_spilled} em spill"
+        )
+
+    def _merge_spill(self):
+        """Gravar no destino as linhas do arquivo de spill."""
+        with self._spill_lock:
+            if not self.spill_path.exists():
+                return
+            try:
+                with open(self.spill_path, "r", newline="", encoding="utf-8") as f:
+                    rows = list(csv.reader(f))
+                self._write_batch(rows)
+                self.rows_written += len(rows)
+                self.spill_path.unlink()
+            except Exception as e:
+                logger.error(f"Erro ao juntar spill de auditoria: {e}")
+
+    def _run(self):
+        batch = []  # Linhas aguardando gravação
+        unsynced = False  # Gravado mas ainda sem fsync
+        failing = False  # Última gravação falhou: nova tentativa só no prazo
+        last_flush = time.monotonic()
+        last_fsync = last_flush
+
+        self._open()
+
+        def do_flush(force_fsync=False):
+            nonlocal unsynced, last_flush, last_fsync, failing
+            now = time.monotonic()
+            last_flush = now
+            try:
+                if batch:
+                    self._write_batch(batch)
+                    self.rows_written += len(batch)
+                    batch.clear()
+                    unsynced = True
+                if unsynced and self.fsync_interval is not None and (
+                    force_fsync or now - last_fsync >= self.fsync_interval
+                ):
+                    self._sync()
+                    last_fsync = now
+                    unsynced = False
+                failing = False
+            except Exception as e:
+                failing = True
+                # Lote mantido para nova tentativa, limitado ao tamanho da fila
+                excess = len(batch) - self.queue_size
+                if excess > 0:
+                    del batch[:excess]
+                    self.rows_dropped += excess
+                logger.error(
+                    f"Erro ao gravar auditoria ({len(batch)} linhas pendentes, nova tentativa "
+                    f"em {self.flush_interval}s): {e}"
+                )
+
+        def wait_timeout():
+            """Tempo até a próxima gravação/fsync devida (None = esperar sem limite)."""
+            now = time.monotonic()
+            deadlines = []
+            if batch:
+                deadlines.append(last_flush + self.flush_interval)
+            if unsynced and self.fsync_interval is not None:
+                deadlines.append(last_fsync + self.fsync_interval)
+            return max(0.0, min(deadlines) - now) if deadlines else None
+
+        def drain():
+            """Passar para o lote as linhas que já estão na fila."""
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                if item is not _WAKE:
+                    batch.append(item)
+
+        def handle_control() -> bool:
+            """Atender pedidos de flush; True se foi pedida a parada."""
+            while True:
+                try:
+                    request = self._control.get_nowait()
+                except queue.Empty:
+                    return False
+                if request is _STOP:
+                    return True
+                drain()
+                do_flush()
+                self._merge_spill()  # Linhas em spill visíveis em get_logs() sem esperar close()
+                request.done.set()
+
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=wait_timeout())
+                except queue.Empty:
+                    item = None
+                    do_flush()  # Prazo de gravação/fsync esgotado
+
+                if item is not None and item is not _WAKE:
+                    batch.append(item)
+                    if (len(batch) >= self.flush_rows and not failing) or (
+                        time.monotonic() - last_flush >= self.flush_interval
+                    ):
+                        do_flush()
+                if handle_control():
+                    break
+        finally:
+            # Drenar o que restou na fila antes de fechar
+            drain()
+            do_flush()
+            self._merge_spill()
+            do_flush(force_fsync=True)
+            if batch:
+                self.rows_dropped += len(batch)
+                logger.error(f"{len(batch)} linhas de auditoria perdidas no encerramento (destino com erro)")
+                batch.clear()
+            self._close()
+            # Flushes pedidos junto com a parada não ficam esperando
+            while True:
+                try:
+                    request = self._control.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not _STOP:
+                    request.done.set()
+
+
+class AsyncCSVWriter(AsyncBatchWriter):
+    """Escritor de CSV em background (arquivo mantido aberto em modo append)."""
+
+    def __init__(self, csv_path: Path, **options):
+        self.csv_path = Path(csv_path)
+        self._file = None
+        self._writer = None
+        super().__init__(self.csv_path.with_suffix(".spill.csv"), **options)
+
+    def _open(self):
+        self._file = open(self.csv_path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+
+    def _write_batch(self, rows: List[List]):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
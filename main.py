@@ -17,16 +17,28 @@ from config.settings import (
     CONF_THRESHOLD,
     DEFAULT_REQUIRED_PPE,
     CSV_LOG_PATH,
+    AUDIT_ASYNC_WRITE,
+    AUDIT_WRITER_OPTIONS,
+    USE_DATABASE,
+    DATABASE_PATH,
     COLOR_OK,
     COLOR_ALERT,
     COLOR_WARNING,
     EPI_CLASS_MAPPING,
     OVERLAP_THRESHOLD,
     CENTROID_DISTANCE_THRESHOLD,
+    TRACKING_ENABLED,
+    TRACK_IOU_THRESHOLD,
+    TRACK_MAX_AGE,
+    IMGSZ,
+    INFERENCE_BACKEND,
 )
 from utils.detector import EPIDetector
+from utils.model_manager import COCO_MODEL_CANDIDATES, ModelManager, find_model
 from utils.validator import EPIValidator
-from logger.audit import AuditLogger
+from utils.capture import FrameGrabber
+from utils.tracker import PersonTracker
+from logger.audit import create_audit_logger
 
 # Configurar logging
 logging.basicConfig(
@@ -46,11 +58,24 @@ class EPIMonitoringSystem:
         required_ppes: list = None,
         conf_threshold: float = 0.4,
     ):
-        self.detector = EPIDetector(model_path, conf_threshold)
+        self.detector = ModelManager(
+            model_path,
+            conf_threshold,
+            detector_options={"imgsz": IMGSZ, "backend": INFERENCE_BACKEND},
+            detector_cls=EPIDetector,
+        ).load()
         self.validator = EPIValidator(required_ppes or DEFAULT_REQUIRED_PPE)
-        self.audit_logger = AuditLogger(CSV_LOG_PATH)
+        self.audit_logger = create_audit_logger(
+            CSV_LOG_PATH,
+            db_path=DATABASE_PATH if USE_DATABASE else None,
+            async_write=AUDIT_ASYNC_WRITE,
+            writer_options=AUDIT_WRITER_OPTIONS,
+        )
         self.video_source = video_source
+        self.tracker = PersonTracker(TRACK_IOU_THRESHOLD, TRACK_MAX_AGE) if TRACKING_ENABLED else None
         self.frame_count = 0
+        self.dropped_frames = 0
+        self.last_latency_ms = 0.0
 
         logger.info(
             f"Sistema inicializado. EPIs obrigatórios: {self.validator.required_epis}"
@@ -58,18 +83,11 @@ class EPIMonitoringSystem:
 
     def run(self):
         """Executar monitoramento de vídeo."""
-        cap = cv2.VideoCapture(self.video_source)
+        grabber = FrameGrabber(self.video_source)
 
-        if not cap.isOpened():
-            logger.error(f"Erro ao abrir fonte de vídeo: {self.video_source}")
+        if not grabber.start():
             return
 
-        # Otimizar câmera para CPU
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Buffer pequeno
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)  # Reduzir resolução
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
-
         logger.info("Iniciando detecção. Pressione 'Q' para sair.")
 
         frame_times = []
@@ -77,12 +95,14 @@ class EPIMonitoringSystem:
 
         while True:
             start_time = time.time()
-            success, frame = cap.read()
+            captured = grabber.read_latest()
 
-            if not success:
+            if captured is None:
                 logger.info("Fim do vídeo ou falha na leitura.")
                 break
 
+            frame = captured.frame
+            self.dropped_frames += captured.dropped
             self.frame_count += 1
 
             # Detectar pessoas e EPIs
@@ -96,6 +116,14 @@ class EPIMonitoringSystem:
                 centroid_threshold=CENTROID_DISTANCE_THRESHOLD,
             )
 
+            # IDs de track no lugar do índice da detecção
+            if self.tracker is not None:
+                for status, track_id in zip(person_statuses, self.tracker.update(persons)):
+                    status.person_id = int(track_id)
+
+            # Latência vidro-a-alerta: captura do frame até o fim da inferência
+            self.last_latency_ms = (time.time() - captured.timestamp) * 1000
+
             # Validar e desenhar
             annotated_frame = self._process_detections(
                 frame, person_statuses, persons, ppes
@@ -128,9 +156,9 @@ class EPIMonitoringSystem:
                 break
 
         # Finalizar
-        cap.release()
+        grabber.stop()
         cv2.destroyAllWindows()
-        self.audit_logger.flush()
+        self.audit_logger.close()
 
         logger.info("Monitoramento encerrado.")
         logger.info(f"Estatísticas: {self.audit_logger.get_stats()}")
@@ -207,6 +235,7 @@ class EPIMonitoringSystem:
             f"Frame: {self.frame_count}",
             f"Pessoas: {total_persons}",
             f"Violações: {violations_count}",
+            f"Descartados: {self.dropped_frames} | Latência: {self.last_latency_ms:.0f}ms",
             f"Conformidade: {stats['compliance_rate']:.1f}%",
         ]
 
@@ -228,22 +257,7 @@ def main():
     """Função principal."""
     try:
         # Procurar modelo
-        model_candidates = [
-            Path("yolov8n.pt"),
-            Path("best.pt"),
-            "yolov8n.pt",  # Download automático
-        ]
-
-        model_path = None
-        for candidate in model_candidates:
-            if isinstance(candidate, Path) and candidate.exists():
-                model_path = str(candidate)
-                logger.info(f"Modelo encontrado: {model_path}")
-                break
-
-        if not model_path:
-            logger.warning("Nenhum modelo local encontrado. Tentando download automático...")
-            model_path = "yolov8n.pt"
+        model_path, _ = find_model(COCO_MODEL_CANDIDATES)
 
         # Inicializar sistema
         system = EPIMonitoringSystem(
@@ -6,9 +6,13 @@ Versão com suporte a EPIs customizados (capacete, óculos, luvas)
 """
 import cv2
 import logging
+import signal
 import sys
 import time
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -16,23 +20,55 @@ from config.settings import (
     VIDEO_SOURCE,
     CONF_THRESHOLD,
     DEFAULT_REQUIRED_PPE,
+    REQUIRED_PPE_BY_SECTOR,
     CSV_LOG_PATH,
+    AUDIT_ASYNC_WRITE,
+    AUDIT_WRITER_OPTIONS,
+    USE_DATABASE,
+    DATABASE_PATH,
     EPI_CLASS_MAPPING,
     OVERLAP_THRESHOLD,
     CENTROID_DISTANCE_THRESHOLD,
+    TRACKING_ENABLED,
+    TRACK_IOU_THRESHOLD,
+    TRACK_MAX_AGE,
+    KEYFRAME_ENABLED,
+    KEYFRAME_INTERVAL,
+    KEYFRAME_MIN_INTERVAL,
+    KEYFRAME_MAX_INTERVAL,
+    MOTION_GATE_ENABLED,
+    MOTION_THRESHOLD,
+    MOTION_THRESHOLDS,
+    MOTION_PIXEL_DELTA,
+    MOTION_MAX_INTERVAL,
+    CAMERA_ROIS,
+    CAMERA_ZONES,
+    IMGSZ,
+    INFERENCE_BACKEND,
+    MODEL_WARMUP_SHAPE,
+    MODEL_HOT_SWAP_ENABLED,
+    MODEL_WATCH_INTERVAL,
+    MODEL_SWAP_GRACE_FRAMES,
+    DETECTION_MODE,
+    TWO_STAGE_CROP_MARGIN,
+    TWO_STAGE_IMGSZ,
+    TILE_SIZE,
+    TILE_OVERLAP,
+    PERSON_MODEL_PATH,
+    PERSON_IMGSZ,
+    PERSON_DETECTION_INTERVAL,
 )
 
-# Tentar importar novo detector/validator, fallback para antigos
-try:
-    from utils.detector_epi import EPIDetector
-    from utils.validator_epi import EPIValidator
-    logger_init_msg = "✓ Usando detectors customizados (com suporte a EPIs)"
-except ImportError:
-    from utils.detector import EPIDetector
-    from utils.validator import EPIValidator
-    logger_init_msg = "⚠ Usando detectors padrão (sem EPIs customizados)"
-
-from logger.audit import AuditLogger
+from utils.validator_epi import EPIValidator
+from utils.hot_swap import LoadedModel, ModelHotSwapper, sanity_check
+from utils.model_manager import ModelManager, find_model
+from utils.pipeline import CameraContext
+from utils.keyframes import KeyframeScheduler
+from utils.motion import MotionGate
+from utils.roi import RegionOfInterest
+from utils.tracker import PersonTracker
+from utils.zones import SectorZones, display_name
+from logger.audit import create_audit_logger
 
 # Configurar logging
 logging.basicConfig(
@@ -40,7 +76,6 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
-logger.info(logger_init_msg)
 
 
 class EPIMonitoringSystem:
@@ -53,6 +88,7 @@ class EPIMonitoringSystem:
         required_ppes: list = None,
         conf_threshold: float = 0.3,
         is_custom_model: bool = False,
+        camera_id: Optional[str] = "cam0",
     ):
         """
         Inicializar sistema.
@@ -63,36 +99,232 @@ class EPIMonitoringSystem:
             required_ppes: EPIs obrigatórios
             conf_threshold: Confiança mínima
             is_custom_model: Se modelo é customizado
+            camera_id: Identificador da câmera registrado na auditoria; None = sem
+                câmera padrão (subclasses que criam as próprias, ex: MultiCameraMonitor)
         """
-        # Detectar se pode passar is_custom
-        try:
-            self.detector = EPIDetector(model_path, conf_threshold, is_custom=is_custom_model)
-        except TypeError:
-            # Fallback para detector antigo
-            self.detector = EPIDetector(model_path, conf_threshold)
+        # Parâmetros extras do detector (também usados pelos workers de inferência)
+        self.detector_options = {
+            "imgsz": IMGSZ,
+            "backend": INFERENCE_BACKEND,
+            "mode": DETECTION_MODE,
+            "crop_margin": TWO_STAGE_CROP_MARGIN,
+            "crop_imgsz": TWO_STAGE_IMGSZ,
+            "tile_size": TILE_SIZE,
+            "tile_overlap": TILE_OVERLAP,
+            "person_model_path": PERSON_MODEL_PATH,
+            "person_imgsz": PERSON_IMGSZ,
+        }
+
+        # Carregar e aquecer o modelo antes de abrir as câmeras (tempos por fase no log)
+        self.model_manager = ModelManager(
+            model_path, conf_threshold, is_custom=is_custom_model, detector_options=self.detector_options
+        )
+        self.detector = self.model_manager.load()
+        self.hot_swap = None  # Iniciado em run(), com as câmeras abertas
         
         self.validator = EPIValidator(required_ppes or DEFAULT_REQUIRED_PPE)
-        self.audit_logger = AuditLogger(CSV_LOG_PATH)
+        self.sector_validators = {}  # Setor -> validador, compartilhado entre câmeras
+        self._compile_validator()
+        self.audit_logger = create_audit_logger(
+            CSV_LOG_PATH,
+            db_path=DATABASE_PATH if USE_DATABASE else None,
+            async_write=AUDIT_ASYNC_WRITE,
+            writer_options=AUDIT_WRITER_OPTIONS,
+        )
+        self.model_path = model_path
         self.video_source = video_source
-        self.frame_count = 0
+        self.camera = self._new_camera(camera_id, video_source) if camera_id is not None else None
 
         logger.info(
             f"Sistema inicializado. EPIs obrigatórios: {self.validator.required_epis}"
         )
 
+    def _new_camera(self, camera_id: str, source) -> CameraContext:
+        """Criar o contexto de uma câmera (com rastreador e keyframes próprios)."""
+        tracker = PersonTracker(TRACK_IOU_THRESHOLD, TRACK_MAX_AGE) if TRACKING_ENABLED else None
+        keyframes = None
+        if KEYFRAME_ENABLED and tracker is not None:
+            keyframes = KeyframeScheduler(
+                tracker,
+                interval=KEYFRAME_INTERVAL,
+                min_interval=KEYFRAME_MIN_INTERVAL,
+                max_interval=KEYFRAME_MAX_INTERVAL,
+                association_distance=CENTROID_DISTANCE_THRESHOLD,
+            )
+        person_keyframes = None
+        if DETECTION_MODE == "dual" and PERSON_DETECTION_INTERVAL > 1 and tracker is not None and keyframes is None:
+            # Só o modelo de pessoas é espaçado; o de EPIs roda em todo frame
+            person_keyframes = KeyframeScheduler(
+                tracker,
+                interval=PERSON_DETECTION_INTERVAL,
+                min_interval=1,
+                max_interval=PERSON_DETECTION_INTERVAL,
+                association_distance=CENTROID_DISTANCE_THRESHOLD,
+            )
+        motion_gate = None
+        if MOTION_GATE_ENABLED:
+            motion_gate = MotionGate(
+                threshold=MOTION_THRESHOLDS.get(camera_id, MOTION_THRESHOLD),
+                pixel_delta=MOTION_PIXEL_DELTA,
+                max_interval=MOTION_MAX_INTERVAL,
+            )
+        roi = RegionOfInterest(CAMERA_ROIS[camera_id]) if camera_id in CAMERA_ROIS else None
+        zones = None
+        if camera_id in CAMERA_ZONES:
+            zones = SectorZones.from_config(CAMERA_ZONES[camera_id])
+            for sector in zones.sectors:
+                self._sector_validator(sector)  # Setor desconhecido falha na partida
+        return CameraContext(
+            camera_id,
+            source,
+            tracker=tracker,
+            keyframes=keyframes,
+            person_keyframes=person_keyframes,
+            motion_gate=motion_gate,
+            roi=roi,
+            zones=zones,
+        )
+
+    def _skip_inference(self, camera, captured):
+        """
+        Resultado de um frame sem passar pelo detector, se possível.
+
+        Returns:
+            (persons, ppes, track_ids) reaproveitado (cena parada) ou propagado
+            pelo rastreador (entre keyframes); None se o frame precisa de inferência
+        """
+        if camera.motion_gate is not None:
+            moving = camera.motion_gate.update(camera.inference_frame(captured.frame), captured.timestamp)
+            if not moving and camera.last_detections is not None:
+                camera.motion_gate.skipped += 1  # Só quando o resultado anterior é de fato reaproveitado
+                return camera.last_detections
+        if camera.keyframes is not None and not camera.keyframes.needs_detection():
+            return camera.keyframes.propagate()
+        return None
+
+    def _person_hint(self, camera):
+        """
+        Modo dual: pessoas propagadas pelo rastreador nos frames em que o modelo
+        de pessoas não roda (o de EPIs roda em todo frame, nos recortes).
+
+        Returns:
+            (persons no frame inteiro, track_ids), ou (None, None) se o modelo
+            de pessoas deve rodar neste frame
+        """
+        schedule = camera.person_keyframes
+        if schedule is None or schedule.needs_detection():
+            return None, None
+        persons, _, track_ids = schedule.propagate()
+        return persons, track_ids
+
+    def _load_model(self, path: str) -> LoadedModel:
+        """Carregar, aquecer e checar um modelo novo (thread do hot-swap)."""
+        detector = ModelManager(
+            path,
+            self.detector.conf_threshold,
+            is_custom=self.detector.is_custom_model,
+            detector_options=self.detector_options,
+        ).load(reuse=False)
+        sanity_check(detector, self.detector, MODEL_WARMUP_SHAPE)
+        return LoadedModel(path, detector)
+
+    def _compile_validator(self, validator=None):
+        """Classes do modelo em uso -> bits dos EPIs obrigatórios (aliases do detector incluídos)."""
+        validators = [validator] if validator is not None else [self.validator, *self.sector_validators.values()]
+        for v in validators:
+            if hasattr(v, "compile_classes"):
+                v.compile_classes(self.detector.class_names, getattr(self.detector, "normalize_ppe_name", None))
+
+    def _sector_validator(self, sector):
+        """Validador de um setor (REQUIRED_PPE_BY_SECTOR), criado uma vez; None = EPIs padrão."""
+        if sector is None:
+            return self.validator
+        validator = self.sector_validators.get(sector)
+        if validator is None:
+            if sector not in REQUIRED_PPE_BY_SECTOR:
+                raise ValueError(f"Setor '{sector}' não está em REQUIRED_PPE_BY_SECTOR")
+            validator = self.sector_validators[sector] = EPIValidator(REQUIRED_PPE_BY_SECTOR[sector])
+            self._compile_validator(validator)
+        return validator
+
+    def _validate_persons(self, camera, person_statuses, frame_shape):
+        """
+        Validar as pessoas de um frame: cada uma contra o setor da zona onde
+        pisa (ou os EPIs padrão), numa chamada vetorizada por setor presente.
+
+        Returns:
+            (validação de cada pessoa, setor de cada pessoa, número de violações)
+        """
+        sectors = [None] * len(person_statuses)
+        if camera.zones is not None and person_statuses:
+            boxes = np.array([s.person_detection.bbox for s in person_statuses])
+            labels = camera.zones.lookup(boxes, frame_shape)
+            sectors = [camera.zones.sectors[label] if label >= 0 else None for label in labels.tolist()]
+
+        validations = [None] * len(person_statuses)
+        violations = 0
+        for sector in dict.fromkeys(sectors):
+            validator = self._sector_validator(sector)
+            indices = [i for i, s in enumerate(sectors) if s == sector]
+            masks = validator.frame_masks([person_statuses[i] for i in indices])
+            violations += int(np.count_nonzero(validator.validate_frame(masks)["severity"] != "ok"))
+            for i, mask in zip(indices, masks.tolist()):
+                validations[i] = validator.result_for(mask)
+        return validations, sectors, violations
+
+    def _use_model(self, loaded: LoadedModel):
+        """Passar a usar um modelo (entre frames)."""
+        self.detector = loaded.detector
+        self.model_path = loaded.path
+        self._compile_validator()
+
+    def _start_hot_swap(self, pool=None):
+        """Observar o arquivo de pesos e aceitar recarga por tecla R / SIGHUP."""
+        if not MODEL_HOT_SWAP_ENABLED:
+            return
+        self.hot_swap = ModelHotSwapper(
+            LoadedModel(self.model_path, self.detector, pool),
+            self._load_model,
+            poll_interval=MODEL_WATCH_INTERVAL,
+            grace_frames=MODEL_SWAP_GRACE_FRAMES,
+        )
+        self.hot_swap.start()
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda *_: self.hot_swap.request_swap())
+
+    def _infer(self, frames, persons=None):
+        """Uma chamada do modelo para os frames (persons: pessoas já conhecidas, modo dual)."""
+        return self.detector.detect_batch(frames, persons=persons)
+
+    def _detect(self, frames, persons=None):
+        """Inferência com troca de modelo entre frames e rollback se o modelo novo falhar."""
+        if self.hot_swap is None:
+            return self._infer(frames, persons)
+        if self.hot_swap.poll():
+            self._use_model(self.hot_swap.current)
+        try:
+            results = self._infer(frames, persons)
+        except Exception:
+            if not self.hot_swap.rollback():
+                raise
+            self._use_model(self.hot_swap.current)
+            results = self._infer(frames, persons)
+        self.hot_swap.frame_ok()
+        return results
+
+    def _handle_key(self, key) -> bool:
+        """Teclas comuns às janelas. Retorna True para sair."""
+        if key in (ord("r"), ord("R")) and self.hot_swap is not None:
+            self.hot_swap.request_swap()
+        return key == ord("q") or key == ord("Q") or key == 27  # 27 = ESC
+
     def run(self):
         """Executar monitoramento de vídeo."""
-        cap = cv2.VideoCapture(self.video_source)
+        camera = self.camera
 
-        if not cap.isOpened():
-            logger.error(f"Erro ao abrir fonte de vídeo: {self.video_source}")
+        if not camera.open():
             return
-
-        # Otimizar câmera para CPU
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
+        self._start_hot_swap()
 
         logger.info("Iniciando detecção. Pressione 'Q' para sair.")
 
@@ -101,29 +333,29 @@ class EPIMonitoringSystem:
 
         while True:
             start_time = time.time()
-            success, frame = cap.read()
+            captured = camera.grabber.read_latest()
 
-            if not success:
+            if captured is None:
                 logger.info("Fim do vídeo ou falha na leitura.")
                 break
 
-            self.frame_count += 1
-
-            # Detectar pessoas e EPIs
-            persons, ppes = self.detector.detect_frame(frame)
+            skipped = self._skip_inference(camera, captured)
+            if skipped is not None:
+                # Cena parada ou frame intermediário: sem inferência
+                persons, ppes, track_ids = skipped
+            else:
+                # Detectar pessoas e EPIs (só na ROI, se configurada)
+                propagated, track_ids = self._person_hint(camera)
+                persons, ppes = camera.restore_detections(
+                    *self._detect(
+                        [camera.inference_frame(captured.frame)], [camera.to_inference_coords(propagated)]
+                    )[0]
+                )
+                if propagated is not None:
+                    persons = propagated  # Mesma ordem dos track_ids
 
-            # Associar EPIs às pessoas
-            person_statuses = self.detector.associate_ppes_to_persons(
-                persons,
-                ppes,
-                overlap_threshold=OVERLAP_THRESHOLD,
-                centroid_threshold=CENTROID_DISTANCE_THRESHOLD,
-            )
-
-            # Validar e desenhar
-            annotated_frame = self._process_detections(
-                frame, person_statuses, persons, ppes
-            )
+            # Associar, validar e desenhar
+            annotated_frame = self._handle_detections(camera, captured, persons, ppes, track_ids)
 
             # Calcular FPS
             frame_time = time.time() - start_time
@@ -146,38 +378,79 @@ class EPIMonitoringSystem:
             # Mostrar
             cv2.imshow("EPI Detector - Monitoramento de Equipamentos", annotated_frame)
 
-            # Pressionar 'Q' para sair
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord("q") or key == ord("Q") or key == 27:  # 27 = ESC
+            # Pressionar 'Q' para sair, 'R' para recarregar o modelo
+            if self._handle_key(cv2.waitKey(1) & 0xFF):
                 break
 
         # Finalizar
-        cap.release()
+        if self.hot_swap is not None:
+            self.hot_swap.stop()
+        camera.close()
         cv2.destroyAllWindows()
-        self.audit_logger.flush()
+        self.audit_logger.close()
 
         logger.info("Monitoramento encerrado.")
         logger.info(f"Estatísticas: {self.audit_logger.get_stats()}")
 
-    def _process_detections(self, frame, person_statuses, persons, ppes):
+    def _handle_detections(self, camera, captured, persons, ppes, track_ids=None):
+        """
+        Associar EPIs às pessoas de um frame capturado e gerar a imagem anotada.
+        track_ids vem preenchido em frames sem inferência (reaproveitados ou propagados).
+        """
+        camera.dropped_frames += captured.dropped
+        camera.frame_count += 1
+
+        # Associar EPIs às pessoas
+        person_statuses = self.detector.associate_ppes_to_persons(
+            persons,
+            ppes,
+            overlap_threshold=OVERLAP_THRESHOLD,
+            centroid_threshold=CENTROID_DISTANCE_THRESHOLD,
+        )
+
+        # IDs de track no lugar do índice da detecção
+        if track_ids is None and camera.keyframes is not None:
+            track_ids = camera.keyframes.on_detections(persons, ppes)
+        elif track_ids is None and camera.person_keyframes is not None:
+            track_ids = camera.person_keyframes.on_detections(persons, ppes)
+        elif track_ids is None and camera.tracker is not None:
+            track_ids = camera.tracker.update(persons)
+        if track_ids is not None:
+            for status, track_id in zip(person_statuses, track_ids):
+                status.person_id = int(track_id)
+        camera.last_detections = (persons, ppes, track_ids)
+
+        # Latência vidro-a-alerta: captura do frame até o fim da inferência
+        camera.last_latency_ms = (time.time() - captured.timestamp) * 1000
+
+        # Validar e desenhar
+        return self._process_detections(
+            captured.frame, person_statuses, persons, ppes, camera
+        )
+
+    def _process_detections(self, frame, person_statuses, persons, ppes, camera):
         """Processar detecções e desenhar na imagem."""
         annotated = frame.copy()
-        violations_count = 0
         total_persons = len(person_statuses)
 
-        for status in person_statuses:
+        if camera.roi is not None:
+            camera.roi.draw(annotated)
+        if camera.zones is not None:
+            camera.zones.draw(annotated)
+
+        # Validar EPIs de todas as pessoas do frame (máscaras de bits, um lote por setor)
+        validations, sectors, violations_count = self._validate_persons(camera, person_statuses, frame.shape)
+
+        for status, validation, sector in zip(person_statuses, validations, sectors):
             person_det = status.person_detection
             x1, y1, x2, y2 = person_det.bbox
 
-            # Validar EPIs
-            validation = self.validator.validate_person(status.detected_ppes)
             missing_epis = validation["missing"]
             severity = validation["severity"]
             color = validation.get("color", (128, 128, 128))
             message = validation.get("message", "")
-
-            if severity != "ok":
-                violations_count += 1
+            if sector is not None:
+                message = f"[{display_name(sector)}] {message}"
 
             # Desenhar caixa da pessoa com cor baseada em severidade
             cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 3)
@@ -193,12 +466,13 @@ class EPIMonitoringSystem:
 
             # Registrar log
             self.audit_logger.log_detection(
-                frame_number=self.frame_count,
+                frame_number=camera.frame_count,
                 person_id=status.person_id,
                 bbox=person_det.bbox,
                 missing_epis=missing_epis,
                 person_conf=person_det.confidence,
                 severity=severity,
+                camera_id=camera.camera_id,
             )
 
             # Desenhar EPIs detectados (caixas menores)
@@ -220,11 +494,21 @@ class EPIMonitoringSystem:
         stats = self.audit_logger.get_stats()
         y_offset = 25
         info_lines = [
-            f"Frame: {self.frame_count}",
+            f"Frame: {camera.frame_count}",
             f"Pessoas: {total_persons}",
             f"Violações: {violations_count}",
+            f"Descartados: {camera.dropped_frames} | Latência: {camera.last_latency_ms:.0f}ms",
             f"Conformidade: {stats.get('compliance_rate', 0):.1f}%",
         ]
+        if camera.keyframes is not None:
+            info_lines.append(f"Keyframe a cada {camera.keyframes.interval} frames")
+        if camera.person_keyframes is not None:
+            info_lines.append(f"Pessoas a cada {camera.person_keyframes.interval} frames")
+        if camera.motion_gate is not None:
+            info_lines.append(
+                f"Movimento: {camera.motion_gate.motion_ratio * 100:.1f}% | "
+                f"Sem inferência: {camera.motion_gate.skipped}"
+            )
 
         for i, line in enumerate(info_lines):
             cv2.putText(
@@ -244,26 +528,7 @@ def main():
     """Função principal."""
     try:
         # Procurar modelo
-        model_candidates = [
-            ("models/epi_custom_best.pt", True),   # Modelo customizado
-            ("best.pt", False),                     # Modelo local
-            ("yolov8n.pt", False),                  # Modelo padrão COCO
-        ]
-
-        model_path = None
-        is_custom = False
-        
-        for candidate, is_custom_candidate in model_candidates:
-            if Path(candidate).exists():
-                model_path = str(candidate)
-                is_custom = is_custom_candidate
-                logger.info(f"Modelo encontrado: {model_path}")
-                break
-
-        if not model_path:
-            logger.warning("Nenhum modelo local encontrado. Tentando download automático...")
-            model_path = "yolov8n.pt"
-            is_custom = False
+        model_path, is_custom = find_model()
 
         # Inicializar sistema
         system = EPIMonitoringSystem(
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+EPI Detector - Monitoramento de várias câmeras em um único processo.
+Um único modelo atende todas as câmeras: os frames mais recentes de cada
+fonte são agendados em rodízio e processados em lote com detect_batch.
+Cada linha da auditoria registra o camera_id de origem.
+
+Uso:
+    python main_multicam.py                          # Câmeras de CAMERA_SOURCES
+    python main_multicam.py --source cam0=0 --source doca=rtsp://...
+"""
+import argparse
+import cv2
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.settings import (
+    CAMERA_SOURCES,
+    CONF_THRESHOLD,
+    DEFAULT_REQUIRED_PPE,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT,
+    INFERENCE_WORKERS,
+    WORKER_START_METHOD,
+)
+from main_epi import EPIMonitoringSystem, find_model
+from utils.hot_swap import LoadedModel
+from utils.workers import InferenceWorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class MultiCameraMonitor(EPIMonitoringSystem):
+    """Monitora várias câmeras compartilhando detector, validador e auditoria."""
+
+    def __init__(
+        self,
+        model_path: str,
+        sources: Dict[str, Union[int, str]],
+        required_ppes: list = None,
+        conf_threshold: float = 0.3,
+        is_custom_model: bool = False,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_batch_wait: float = BATCH_MAX_WAIT,
+        show_windows: bool = True,
+        num_workers: int = INFERENCE_WORKERS,
+    ):
+        """
+        Inicializar sistema.
+
+        Args:
+            model_path: Caminho do modelo (carregado uma única vez)
+            sources: Dict camera_id -> fonte de vídeo
+            required_ppes: EPIs obrigatórios
+            conf_threshold: Confiança mínima
+            is_custom_model: Se modelo é customizado
+            max_batch_size: Máximo de frames (câmeras) por chamada do modelo
+            max_batch_wait: Segundos esperando completar o lote depois do primeiro frame pronto
+            show_windows: Mostrar uma janela por câmera
+            num_workers: Processos de inferência (0 = inferência neste processo)
+        """
+        super().__init__(
+            model_path=model_path,
+            video_source=None,
+            required_ppes=required_ppes,
+            conf_threshold=conf_threshold,
+            is_custom_model=is_custom_model,
+            camera_id=None,  # Câmeras criadas abaixo, uma por fonte
+        )
+        self.cameras = [self._new_camera(camera_id, source) for camera_id, source in sources.items()]
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.show_windows = show_windows
+        self.num_workers = num_workers
+        self.pool = None
+        self._next_camera = 0  # Início do rodízio
+        self._frame_event = threading.Event()  # Sinalizado pelas capturas a cada frame novo
+
+        logger.info(f"Câmeras configuradas: {[c.camera_id for c in self.cameras]}")
+
+    def _select_ready_cameras(self):
+        """Escolher, em rodízio, até max_batch_size câmeras com frame novo."""
+        n = len(self.cameras)
+        ready = []
+        for i in range(n):
+            camera = self.cameras[(self._next_camera + i) % n]
+            if camera.grabber is not None and camera.grabber.has_new_frame():
+                ready.append(camera)
+                if len(ready) >= self.max_batch_size:
+                    break
+        return ready
+
+    def _collect_ready_cameras(self):
+        """
+        Câmeras do próximo lote: dorme até alguma ter frame novo e, a partir
+        daí, espera até max_batch_wait segundos por mais câmeras (lote cheio
+        sai na hora). Retorna [] só quando todas as fontes terminaram.
+        """
+        deadline = None
+        while True:
+            # Limpar antes de consultar: frame que chegar depois acorda o wait
+            self._frame_event.clear()
+            ready = self._select_ready_cameras()
+            running = sum(c.grabber.is_running for c in self.cameras)
+            if not ready and not running:
+                return []
+            if ready:
+                now = time.time()
+                deadline = now + self.max_batch_wait if deadline is None else deadline
+                if len(ready) >= min(self.max_batch_size, running) or now >= deadline:
+                    break
+            self._frame_event.wait(deadline - time.time() if ready else 0.5)
+
+        # Próximo lote começa depois da última câmera atendida
+        self._next_camera = (self.cameras.index(ready[-1]) + 1) % len(self.cameras)
+        return ready
+
+    def _load_model(self, path: str) -> LoadedModel:
+        """Modelo novo e, com workers, um pool novo já pronto (thread do hot-swap)."""
+        loaded = super()._load_model(path)
+        if self.num_workers > 0:
+            loaded.pool = self._new_pool(path, loaded.detector)
+        return loaded
+
+    def _use_model(self, loaded: LoadedModel):
+        super()._use_model(loaded)
+        self.pool = loaded.pool
+
+    def _new_pool(self, model_path: str, detector) -> InferenceWorkerPool:
+        # Slots do anel no tamanho da maior câmera aberta (ex: 4K no modo tiled)
+        shapes = [c.grabber.frame_shape for c in self.cameras if c.grabber is not None]
+        max_frame_shape = tuple(int(v) for v in np.max(shapes, axis=0)) if shapes else (1080, 1920, 3)
+        pool = InferenceWorkerPool(
+            model_path,
+            num_workers=self.num_workers,
+            max_frame_shape=max_frame_shape,
+            conf_threshold=detector.conf_threshold,
+            is_custom=detector.is_custom_model,
+            detector_options=self.detector_options,
+            start_method=WORKER_START_METHOD,
+            shared_detector=detector,
+        )
+        pool.start()
+        return pool
+
+    def _person_hint(self, camera):
+        if self.pool is not None:
+            # Workers não recebem pessoas propagadas: modelo de pessoas em todo frame
+            return None, None
+        return super()._person_hint(camera)
+
+    def _infer(self, frames, persons=None):
+        if self.pool is not None:
+            # Frames distribuídos entre os processos de inferência
+            return self.pool.detect_many(frames)
+        # Uma chamada do modelo para os frames de todas as câmeras prontas
+        return self.detector.detect_batch(frames, max_batch_size=self.max_batch_size, persons=persons)
+
+    def run(self):
+        """Executar monitoramento de todas as câmeras."""
+        for camera in self.cameras:
+            if not camera.open(self._frame_event):
+                camera.close()
+
+        active = [c for c in self.cameras if c.grabber is not None]
+        if not active:
+            logger.error("Nenhuma câmera pôde ser aberta.")
+            return
+        self.cameras = active
+
+        if self.num_workers > 0:
+            self.pool = self._new_pool(self.model_path, self.detector)
+        self._start_hot_swap(self.pool)
+
+        logger.info("Iniciando detecção multi-câmera. Pressione 'Q' para sair.")
+        start_time = time.time()
+        frames_processed = 0
+
+        while True:
+            ready = self._collect_ready_cameras()
+            if not ready:
+                logger.info("Todas as fontes de vídeo terminaram.")
+                break
+
+            batch = []
+            for camera in ready:
+                captured = camera.grabber.read_latest()
+                if captured is not None:
+                    batch.append((camera, captured))
+            if not batch:
+                continue
+
+            # Câmeras paradas ou fora do keyframe não entram no lote do detector
+            skipped = [self._skip_inference(camera, captured) for camera, captured in batch]
+            pending = [(camera, captured) for (camera, captured), skip in zip(batch, skipped) if skip is None]
+            # Modo dual: pessoas propagadas onde o modelo de pessoas não roda neste frame
+            hints = [self._person_hint(camera) for camera, _ in pending]
+            frames = [camera.inference_frame(captured.frame) for camera, captured in pending]
+            known = [camera.to_inference_coords(propagated) for (camera, _), (propagated, _) in zip(pending, hints)]
+            results = self._detect(frames, known) if frames else []
+            frames_processed += len(batch)
+
+            results = iter(results)
+            hints = iter(hints)
+            for (camera, captured), skip in zip(batch, skipped):
+                if skip is None:
+                    persons, ppes = camera.restore_detections(*next(results))
+                    propagated, track_ids = next(hints)
+                    if propagated is not None:
+                        persons = propagated  # Mesma ordem dos track_ids
+                else:
+                    persons, ppes, track_ids = skip
+                annotated_frame = self._handle_detections(camera, captured, persons, ppes, track_ids)
+                if self.show_windows:
+                    cv2.imshow(camera.window_name, annotated_frame)
+
+            if self.show_windows and self._handle_key(cv2.waitKey(1) & 0xFF):
+                break
+
+        # Finalizar
+        if self.hot_swap is not None:
+            self.hot_swap.stop()
+        for camera in self.cameras:
+            camera.close()
+        if self.pool is not None:
+            self.pool.close()
+        if self.show_windows:
+            cv2.destroyAllWindows()
+        self.audit_logger.close()
+
+        elapsed = time.time() - start_time
+        logger.info("Monitoramento encerrado.")
+        logger.info(
+            f"Frames processados: {frames_processed} em {elapsed:.1f}s "
+            f"({frames_processed / elapsed if elapsed > 0 else 0:.1f} FPS total)"
+        )
+        for camera in self.cameras:
+            inference = ""
+            if camera.keyframes is not None:
+                inference += f", {camera.keyframes.keyframes} com inferência"
+            if camera.motion_gate is not None:
+                inference += f", {camera.motion_gate.skipped} sem movimento"
+            logger.info(
+                f"  {camera.camera_id}: {camera.frame_count} frames{inference}, "
+                f"{camera.dropped_frames} descartados"
+            )
+        logger.info(f"Estatísticas: {self.audit_logger.get_stats()}")
+
+
+def parse_sources(values) -> Dict[str, Union[int, str]]:
+    """Converter ["cam0=0", "doca=rtsp://..."] em dict camera_id -> fonte."""
+    sources = {}
+    for i, value in enumerate(values):
+        camera_id, sep, source = value.partition("=")
+        if not sep:
+            camera_id, source = f"cam{i}", value
+        sources[camera_id] = int(source) if source.isdigit() else source
+    return sources
+
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="Monitoramento de EPIs em várias câmeras")
+    parser.add_argument(
+        "--source",
+        action="append",
+        default=[],
+        help="Câmera no formato camera_id=fonte (pode repetir). Padrão: CAMERA_SOURCES",
+    )
+    parser.add_argument("--no-gui", action="store_true", help="Não abrir janelas")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=INFERENCE_WORKERS,
+        help="Processos de inferência (0 = inferência no processo principal)",
+    )
+    args = parser.parse_args()
+
+    try:
+        sources = parse_sources(args.source) if args.source else CAMERA_SOURCES
+        model_path, is_custom = find_model()
+
+        system = MultiCameraMonitor(
+            model_path=model_path,
+            sources=sources,
+            required_ppes=DEFAULT_REQUIRED_PPE,
+            conf_threshold=CONF_THRESHOLD,
+            is_custom_model=is_custom,
+            show_windows=not args.no_gui,
+            num_workers=args.workers,
+        )
+        system.run()
+
+    except Exception as e:
+        logger.error(f"Erro fatal: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
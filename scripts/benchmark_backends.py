@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Latência por frame de cada backend de inferência em CPU.
+
+Roda o mesmo EPIDetector com "pytorch", "onnxruntime" e "openvino" (os que
+estiverem instalados) e compara ms/frame e a concordância das caixas com o
+PyTorch. A primeira execução exporta os modelos para models/exported/.
+
+Uso:
+  python scripts/benchmark_backends.py --model yolov8n.pt --frames 100
+  python scripts/benchmark_backends.py --video logs/test_output.mp4 --imgsz 416
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.association import iou_matrix
+from utils.backends import BACKENDS
+from utils.detections import DetectionBatch
+from utils.detector_epi import EPIDetector
+
+
+def load_frames(args):
+    """Frames do vídeo informado ou frames sintéticos com ruído."""
+    frames = []
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+    return [frames[i % len(frames)] for i in range(args.frames)]
+
+
+def agreement(reference, other) -> float:
+    """Fração das caixas de referência com par (IoU >= 0.5) no outro backend."""
+    matched = total = 0
+    for ref, out in zip(reference, other):
+        total += len(ref)
+        if len(ref) and len(out):
+            matched += int((iou_matrix(ref.xyxy.astype(np.float64), out.xyxy.astype(np.float64)).max(axis=1) >= 0.5).sum())
+    return matched / total if total else 1.0
+
+
+def run_backend(args, frames, backend):
+    detector = EPIDetector(args.model, args.conf, imgsz=args.imgsz, backend=backend)
+    detector.detect_frame(frames[0])  # Aquecimento
+
+    times, outputs = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        persons, ppes = detector.detect_frame(frame)
+        times.append((time.perf_counter() - t0) * 1000)
+        outputs.append(DetectionBatch.concat([persons, ppes], detector.class_names))
+    return times, outputs
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de backends de inferência")
+    p.add_argument("--model", default="yolov8n.pt", help="Pesos YOLO (.pt)")
+    p.add_argument("--video", default=None, help="Vídeo de entrada (padrão: frames sintéticos)")
+    p.add_argument("--frames", type=int, default=100, help="Frames medidos por backend")
+    p.add_argument("--conf", type=float, default=0.3, help="Confiança mínima")
+    p.add_argument("--imgsz", type=int, default=320, help="Entrada do modelo")
+    p.add_argument("--backends", default=",".join(BACKENDS), help="Lista separada por vírgula")
+    args = p.parse_args()
+
+    frames = load_frames(args)
+    print(f"Frames: {len(frames)} | modelo: {args.model} | imgsz: {args.imgsz}")
+    print(f"{'backend':<14}{'ms/frame':>10}{'p95':>10}{'speedup':>10}{'concordância':>14}")
+
+    reference = baseline_ms = None
+    for backend in args.backends.split(","):
+        try:
+            times, outputs = run_backend(args, frames, backend)
+        except ImportError as e:
+            print(f"{backend:<14}indisponível ({e.name} não instalado)")
+            continue
+        ms = float(np.mean(times))
+        if reference is None:
+            reference, baseline_ms = outputs, ms
+        print(
+            f"{backend:<14}{ms:>10.1f}{np.percentile(times, 95):>10.1f}"
+            f"{baseline_ms / ms:>9.2f}x{agreement(reference, outputs):>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
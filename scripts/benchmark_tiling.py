@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Custo da inferência fatiada (modo "tiled") por número de tiles.
+
+Para cada tamanho de tile, mostra quantos tiles cobrem o frame, a latência
+por frame e o custo relativo ao modo "single" (uma passada no frame reduzido).
+
+Uso:
+  python scripts/benchmark_tiling.py --model models/epi_custom_best.pt --tile-sizes 1280,960,640
+  python scripts/benchmark_tiling.py --video camera4k.mp4 --overlap 0.25
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.detector_epi import EPIDetector
+from utils.tiling import tile_grid
+
+
+def load_frames(args):
+    """Frames do vídeo informado ou frames sintéticos 4K com ruído."""
+    frames = []
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+    return [frames[i % len(frames)] for i in range(args.frames)]
+
+
+def bench(detector, frames):
+    detector.detect_frame(frames[0])  # Aquecimento
+    t0 = time.perf_counter()
+    for frame in frames:
+        detector.detect_frame(frame)
+    return (time.perf_counter() - t0) / len(frames) * 1000
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark da inferência fatiada")
+    p.add_argument("--model", default="yolov8n.pt", help="Modelo YOLO")
+    p.add_argument("--tile-sizes", default="1280,960,640", help="Tamanhos de tile (ex: 1280,960,640)")
+    p.add_argument("--overlap", type=float, default=0.2, help="Sobreposição entre tiles")
+    p.add_argument("--frames", type=int, default=20, help="Frames por medição")
+    p.add_argument("--video", default=None, help="Vídeo de entrada (opcional)")
+    p.add_argument("--width", type=int, default=3840, help="Largura dos frames sintéticos")
+    p.add_argument("--height", type=int, default=2160, help="Altura dos frames sintéticos")
+    p.add_argument("--conf", type=float, default=0.3, help="Confiança mínima")
+    args = p.parse_args()
+
+    frames = load_frames(args)
+    h, w = frames[0].shape[:2]
+    print(f"Frames: {len(frames)} ({w}x{h}) | modelo: {args.model} | overlap: {args.overlap}")
+
+    baseline = bench(EPIDetector(args.model, args.conf, mode="single"), frames)
+    print(f"{'modo':<16}{'tiles':>7}{'ms/frame':>10}{'FPS':>8}{'custo':>8}{'ms/tile':>9}")
+    print(f"{'single':<16}{1:>7}{baseline:>10.1f}{1000 / baseline:>8.2f}{1.0:>8.2f}{baseline:>9.1f}")
+
+    for size in [int(s) for s in args.tile_sizes.split(",") if s.strip()]:
+        detector = EPIDetector(args.model, args.conf, mode="tiled", tile_size=size, tile_overlap=args.overlap)
+        # +1: frame inteiro reduzido que vai na mesma chamada
+        num_images = len(tile_grid(frames[0].shape, size, args.overlap)) + 1
+        ms = bench(detector, frames)
+        print(
+            f"{f'tiled {size}px':<16}{num_images:>7}{ms:>10.1f}{1000 / ms:>8.2f}"
+            f"{ms / baseline:>8.2f}{ms / num_images:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
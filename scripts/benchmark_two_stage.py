@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Comparação entre os modos de detecção "single" e "two_stage".
+
+Mede a latência por frame de cada modo e, para os EPIs, quantos foram
+encontrados e quantos ficaram associados a alguma pessoa. Com --labels
+(anotações YOLO .txt com o mesmo nome das imagens) calcula também o recall
+de EPIs com IoU >= 0.5.
+
+Uso:
+  python scripts/benchmark_two_stage.py --model models/epi_custom_best.pt --images dataset/valid/images
+  python scripts/benchmark_two_stage.py --images dataset/valid/images --labels dataset/valid/labels
+  python scripts/benchmark_two_stage.py --video logs/test_output.mp4 --frames 100
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.association import iou_matrix
+from utils.detector_epi import EPIDetector
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def load_samples(args):
+    """Lista de (frame, caminho da anotação ou None)."""
+    samples = []
+    if args.images:
+        for path in sorted(Path(args.images).iterdir()):
+            if path.suffix.lower() not in IMAGE_SUFFIXES:
+                continue
+            label = Path(args.labels) / f"{path.stem}.txt" if args.labels else None
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                samples.append((frame, label))
+            if len(samples) >= args.frames:
+                break
+    elif args.video:
+        cap = cv2.VideoCapture(args.video)
+        while len(samples) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            samples.append((frame, None))
+        cap.release()
+    return samples
+
+
+def load_ppe_labels(label_path, frame_shape, person_class_ids):
+    """Caixas xyxy (pixels) dos EPIs anotados (formato YOLO: cls cx cy w h)."""
+    if label_path is None or not label_path.exists():
+        return None
+    h, w = frame_shape[:2]
+    rows = np.loadtxt(label_path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros((0, 4))
+    rows = rows[~np.isin(rows[:, 0].astype(int), person_class_ids)]
+    cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+    return np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+
+
+def run_mode(args, samples, mode):
+    detector = EPIDetector(
+        args.model, args.conf, is_custom=True, mode=mode, crop_imgsz=args.crop_imgsz
+    )
+    detector.detect_frame(samples[0][0])  # Aquecimento
+
+    times = []
+    found = associated = 0
+    hits = total_labels = 0
+    for frame, label_path in samples:
+        t0 = time.perf_counter()
+        persons, ppes = detector.detect_frame(frame)
+        times.append((time.perf_counter() - t0) * 1000)
+
+        statuses = detector.associate_ppes_to_persons(persons, ppes)
+        found += len(ppes)
+        associated += sum(len(s.detected_ppes) for s in statuses)
+
+        gt = load_ppe_labels(label_path, frame.shape, detector.person_class_ids)
+        if gt is not None and len(gt):
+            total_labels += len(gt)
+            if len(ppes):
+                hits += int((iou_matrix(gt, ppes.xyxy.astype(np.float64)).max(axis=1) >= 0.5).sum())
+
+    recall = hits / total_labels if total_labels else None
+    return {
+        "ms": float(np.mean(times)),
+        "p95": float(np.percentile(times, 95)),
+        "ppes": found / len(samples),
+        "associated": associated / len(samples),
+        "recall": recall,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Comparação single × two_stage")
+    p.add_argument("--model", default="models/epi_custom_best.pt", help="Modelo YOLO")
+    p.add_argument("--images", default=None, help="Pasta de imagens")
+    p.add_argument("--labels", default=None, help="Pasta de anotações YOLO (opcional, para recall)")
+    p.add_argument("--video", default=None, help="Vídeo de entrada (alternativa a --images)")
+    p.add_argument("--frames", type=int, default=100, help="Máximo de frames/imagens")
+    p.add_argument("--conf", type=float, default=0.3, help="Confiança mínima")
+    p.add_argument("--crop-imgsz", type=int, default=320, help="Resolução dos recortes no two_stage")
+    args = p.parse_args()
+
+    samples = load_samples(args)
+    if not samples:
+        print("Nenhum frame carregado (use --images ou --video)")
+        sys.exit(1)
+
+    print(f"Frames: {len(samples)} | modelo: {args.model}")
+    print(f"{'modo':<12}{'ms/frame':>10}{'p95':>10}{'EPIs/frame':>12}{'associados':>12}{'recall':>10}")
+    for mode in EPIDetector.DETECTION_MODES:
+        r = run_mode(args, samples, mode)
+        recall = f"{r['recall']:.3f}" if r["recall"] is not None else "-"
+        print(
+            f"{mode:<12}{r['ms']:>10.1f}{r['p95']:>10.1f}"
+            f"{r['ppes']:>12.2f}{r['associated']:>12.2f}{recall:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark de throughput da inferência em vários processos.
+
+Mede frames/s do InferenceWorkerPool para diferentes números de workers e
+compara com a inferência no processo principal (detect_frame em série).
+
+Uso:
+  python scripts/benchmark_workers.py --model yolov8n.pt --workers 1,2,4,8 --frames 200
+  python scripts/benchmark_workers.py --video logs/test_output.mp4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.detector_epi import EPIDetector
+from utils.workers import InferenceWorkerPool
+
+
+def load_frames(args):
+    """Frames do vídeo informado ou frames sintéticos com ruído."""
+    frames = []
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    # Repetir até o número pedido
+    return [frames[i % len(frames)] for i in range(args.frames)]
+
+
+def bench_inline(args, frames):
+    detector = EPIDetector(args.model, args.conf)
+    detector.detect_frame(frames[0])  # Aquecimento
+    t0 = time.perf_counter()
+    for frame in frames:
+        detector.detect_frame(frame)
+    return len(frames) / (time.perf_counter() - t0)
+
+
+def bench_pool(args, frames, num_workers):
+    h, w = frames[0].shape[:2]
+    pool = InferenceWorkerPool(
+        args.model,
+        num_workers=num_workers,
+        conf_threshold=args.conf,
+        max_frame_shape=(h, w, 3),
+    )
+    pool.start()
+    try:
+        pool.detect_many(frames[:num_workers])  # Aquecimento
+        t0 = time.perf_counter()
+        # Lotes grandes mantêm todos os workers ocupados
+        chunk = max(4 * num_workers, 1)
+        for start in range(0, len(frames), chunk):
+            pool.detect_many(frames[start:start + chunk])
+        return len(frames) / (time.perf_counter() - t0)
+    finally:
+        pool.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark do pool de workers de inferência")
+    p.add_argument("--model", default="yolov8n.pt", help="Modelo YOLO")
+    p.add_argument("--workers", default="1,2,4", help="Lista de números de workers (ex: 1,2,4,8)")
+    p.add_argument("--frames", type=int, default=100, help="Frames por medição")
+    p.add_argument("--video", default=None, help="Vídeo de entrada (opcional)")
+    p.add_argument("--width", type=int, default=640, help="Largura dos frames sintéticos")
+    p.add_argument("--height", type=int, default=480, help="Altura dos frames sintéticos")
+    p.add_argument("--conf", type=float, default=0.3, help="Confiança mínima")
+    args = p.parse_args()
+
+    frames = load_frames(args)
+    worker_counts = [int(n) for n in args.workers.split(",") if n.strip()]
+
+    print(f"Frames: {len(frames)} ({frames[0].shape[1]}x{frames[0].shape[0]}) | modelo: {args.model}")
+    baseline = bench_inline(args, frames)
+    print(f"{'modo':<12}{'FPS':>10}{'speedup':>10}")
+    print(f"{'inline':<12}{baseline:>10.2f}{1.0:>10.2f}")
+
+    for n in worker_counts:
+        fps = bench_pool(args, frames, n)
+        print(f"{f'{n} workers':<12}{fps:>10.2f}{fps / baseline:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
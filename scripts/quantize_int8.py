@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Quantização INT8 pós-treino (ONNX Runtime) com relatório FP32 × INT8.
+
+1. Exporta os pesos para ONNX FP32 (cache em models/exported/)
+2. Calibra as ativações com frames capturados (ex: dataset/images de
+   scripts/capture_images.py), com o mesmo letterbox usado na inferência
+3. Grava o modelo INT8 (QDQ, pesos por canal) e os nomes das classes
+4. Compara FP32 e INT8 no EPIDetector: latência (p50/p90/p99), concordância
+   das caixas e, com --labels (anotações YOLO .txt), mAP@0.5
+
+O modelo gerado é carregado com INFERENCE_BACKEND = "onnxruntime" e
+USE_INT8_MODEL = True em config/settings.py.
+
+Uso:
+  python scripts/quantize_int8.py --calib dataset/images --val dataset/valid/images --labels dataset/valid/labels
+  python scripts/quantize_int8.py --model models/epi_custom_best.pt --imgsz 320 --calib-frames 200
+"""
+import argparse
+import json
+import random
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import QUANTIZED_MODEL_PATH
+from utils.association import iou_matrix
+from utils.backends import export_model, names_path, to_blob
+from utils.detections import DetectionBatch
+from utils.detector_epi import EPIDetector
+from utils.preprocess import LetterboxPreprocessor
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def list_images(folder, limit=None, seed=0):
+    paths = sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if limit and len(paths) > limit:
+        paths = sorted(random.Random(seed).sample(paths, limit))
+    return paths
+
+
+class FrameCalibrationReader:
+    """Entrega os frames de calibração ao quantize_static, um por vez."""
+
+    def __init__(self, paths, input_name, imgsz):
+        self.paths = list(paths)
+        self.input_name = input_name
+        # Mesma geometria da inferência: letterbox do detector e entrada quadrada do backend
+        self.detector_letterbox = LetterboxPreprocessor(imgsz)
+        self.model_letterbox = LetterboxPreprocessor(imgsz, auto=False)
+        self._index = 0
+
+    def get_next(self):
+        while self._index < len(self.paths):
+            frame = cv2.imread(str(self.paths[self._index]))
+            self._index += 1
+            if frame is None:
+                continue
+            image, _ = self.detector_letterbox(frame)
+            image, _ = self.model_letterbox(image)
+            return {self.input_name: to_blob([image])}
+        return None
+
+    def rewind(self):
+        self._index = 0
+
+
+def head_nodes(model_path):
+    """Nós do último bloco (Detect/DFL): mantidos em FP32, são os mais sensíveis."""
+    import onnx
+
+    graph = onnx.load(str(model_path)).graph
+    blocks = [int(m.group(1)) for n in graph.node if (m := re.match(r"/model\.(\d+)/", n.name))]
+    if not blocks:
+        return []
+    last = f"/model.{max(blocks)}/"
+    return [n.name for n in graph.node if n.name.startswith(last)]
+
+
+def quantize(args) -> Path:
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    import onnxruntime as ort
+
+    fp32 = export_model(args.model, "onnxruntime", args.imgsz)
+    prepared = fp32.with_name(fp32.stem + "-prep.onnx")
+    quant_pre_process(str(fp32), str(prepared))
+
+    input_name = ort.InferenceSession(str(fp32), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    calib = list_images(args.calib, args.calib_frames)
+    if not calib:
+        raise SystemExit(f"Nenhuma imagem de calibração em {args.calib}")
+    print(f"Calibrando com {len(calib)} frames de {args.calib}...")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    quantize_static(
+        str(prepared),
+        str(output),
+        FrameCalibrationReader(calib, input_name, args.imgsz),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+        calibrate_method=CalibrationMethod.MinMax if args.method == "minmax" else CalibrationMethod.Percentile,
+        nodes_to_exclude=[] if args.quantize_head else head_nodes(prepared),
+    )
+    prepared.unlink(missing_ok=True)
+    shutil.copyfile(names_path(fp32), names_path(output))
+    print(f"Modelo INT8: {output} ({output.stat().st_size / 1e6:.1f} MB, FP32: {fp32.stat().st_size / 1e6:.1f} MB)")
+    return fp32
+
+
+def load_labels(path, frame_shape):
+    """Anotações YOLO (cls cx cy w h normalizados) -> (class_ids, xyxy em pixels)."""
+    if path is None or not path.exists():
+        return None
+    rows = np.loadtxt(path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros(0, dtype=int), np.zeros((0, 4))
+    h, w = frame_shape[:2]
+    cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+    return rows[:, 0].astype(int), np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+
+
+def average_precision(scores, matched, num_labels):
+    """AP (interpolação em todos os pontos) a partir das detecções de uma classe."""
+    if num_labels == 0:
+        return None
+    if not len(scores):
+        return 0.0
+    order = np.argsort(-np.asarray(scores))
+    tp = np.asarray(matched, dtype=np.float64)[order]
+    recall = np.cumsum(tp) / num_labels
+    precision = np.cumsum(tp) / np.arange(1, len(tp) + 1)
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.concatenate([[1.0], precision, [0.0]])
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    return float(np.sum((recall[1:] - recall[:-1]) * precision[1:]))
+
+
+def map50(outputs, labels):
+    """mAP@0.5 das saídas (DetectionBatch por frame) contra as anotações."""
+    per_class = {}  # cls -> (scores, matched, num_labels)
+    for batch, gt in zip(outputs, labels):
+        if gt is None:
+            continue
+        gt_cls, gt_xyxy = gt
+        for cid in set(gt_cls.tolist()) | set(batch.class_ids.tolist()):
+            scores, matched, count = per_class.setdefault(cid, ([], [], [0]))
+            gt_boxes = gt_xyxy[gt_cls == cid]
+            count[0] += len(gt_boxes)
+            det = batch[batch.class_ids == cid]
+            used = np.zeros(len(gt_boxes), dtype=bool)
+            ious = iou_matrix(det.xyxy.astype(np.float64), gt_boxes) if len(det) and len(gt_boxes) else None
+            for i in np.argsort(-det.confidences):
+                hit = False
+                if ious is not None:
+                    candidates = np.where(~used & (ious[i] >= 0.5))[0]
+                    if len(candidates):
+                        used[candidates[ious[i, candidates].argmax()]] = hit = True
+                scores.append(float(det.confidences[i]))
+                matched.append(hit)
+    aps = [ap for s, m, c in per_class.values() if (ap := average_precision(s, m, c[0])) is not None]
+    return float(np.mean(aps)) if aps else None
+
+
+def agreement(reference, other):
+    """Fração das caixas FP32 com par INT8 da mesma classe (IoU >= 0.5)."""
+    matched = total = 0
+    for ref, out in zip(reference, other):
+        total += len(ref)
+        if len(ref) and len(out):
+            ious = iou_matrix(ref.xyxy.astype(np.float64), out.xyxy.astype(np.float64))
+            ious[ref.class_ids[:, None] != out.class_ids[None, :]] = 0
+            matched += int((ious.max(axis=1) >= 0.5).sum())
+    return matched / total if total else 1.0
+
+
+def evaluate(model_path, frames, args):
+    detector = EPIDetector(str(model_path), args.conf, imgsz=args.imgsz, backend="onnxruntime")
+    detector.detect_frame(frames[0])  # Aquecimento
+    times, outputs = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        persons, ppes = detector.detect_frame(frame)
+        times.append((time.perf_counter() - t0) * 1000)
+        outputs.append(DetectionBatch.concat([persons, ppes], detector.class_names))
+    return times, outputs
+
+
+def report(fp32, int8, args):
+    paths = list_images(args.val or args.calib, args.val_frames, seed=1)
+    frames, labels = [], []
+    for path in paths:
+        frame = cv2.imread(str(path))
+        if frame is None:
+            continue
+        frames.append(frame)
+        label = Path(args.labels) / f"{path.stem}.txt" if args.labels else None
+        labels.append(load_labels(label, frame.shape))
+
+    results, outputs_by_model = {}, {}
+    for name, model in (("fp32", fp32), ("int8", int8)):
+        times, outputs = evaluate(model, frames, args)
+        outputs_by_model[name] = outputs
+        results[name] = {
+            "model": str(model),
+            "size_mb": round(Path(model).stat().st_size / 1e6, 2),
+            "p50_ms": float(np.percentile(times, 50)),
+            "p90_ms": float(np.percentile(times, 90)),
+            "p99_ms": float(np.percentile(times, 99)),
+            "map50": map50(outputs, labels),
+        }
+    results["agreement"] = agreement(outputs_by_model["fp32"], outputs_by_model["int8"])
+    results["frames"] = len(frames)
+
+    print(f"\nValidação: {len(frames)} frames de {args.val or args.calib}")
+    print(f"{'modelo':<8}{'MB':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'mAP@0.5':>10}")
+    for name in ("fp32", "int8"):
+        r = results[name]
+        m = f"{r['map50']:.3f}" if r["map50"] is not None else "-"
+        print(f"{name:<8}{r['size_mb']:>8.1f}{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}{r['p99_ms']:>9.1f}{m:>10}")
+    print(f"Speedup p50: {results['fp32']['p50_ms'] / results['int8']['p50_ms']:.2f}x")
+    print(f"Concordância INT8 × FP32 (IoU >= 0.5, mesma classe): {results['agreement']:.3f}")
+    return results
+
+
+def main():
+    p = argparse.ArgumentParser(description="Quantização INT8 (ONNX Runtime) com relatório FP32 × INT8")
+    p.add_argument("--model", default="models/epi_custom_best.pt", help="Pesos YOLO (.pt)")
+    p.add_argument("--calib", default="dataset/images", help="Pasta de frames para calibração")
+    p.add_argument("--calib-frames", type=int, default=300, help="Máximo de frames de calibração")
+    p.add_argument("--method", choices=["minmax", "percentile"], default="minmax", help="Calibração das ativações")
+    p.add_argument("--quantize-head", action="store_true", help="Quantizar também o bloco Detect (menos preciso)")
+    p.add_argument("--val", default=None, help="Pasta de validação (padrão: a de calibração)")
+    p.add_argument("--val-frames", type=int, default=200, help="Máximo de frames de validação")
+    p.add_argument("--labels", default=None, help="Anotações YOLO da validação (para mAP)")
+    p.add_argument("--imgsz", type=int, default=320, help="Entrada do modelo")
+    p.add_argument("--conf", type=float, default=0.3, help="Confiança mínima")
+    p.add_argument("--output", default=QUANTIZED_MODEL_PATH, help="Modelo INT8 gerado")
+    p.add_argument("--report", default="logs/int8_report.json", help="Relatório JSON")
+    args = p.parse_args()
+
+    fp32 = quantize(args)
+    results = report(fp32, Path(args.output), args)
+    results["imgsz"] = args.imgsz
+    Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.report).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Relatório: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
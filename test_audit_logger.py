@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Teste do logger de auditoria (CSV)"""
+
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from logger.audit import AuditLogger
+
+print("\n" + "="*60)
+print("TESTE: LOGGER DE AUDITORIA")
+print("="*60 + "\n")
+
+tmp_dir = Path(tempfile.mkdtemp())
+csv_path = tmp_dir / "ppe_audit.csv"
+
+# Teste 1: Contadores incrementais
+print("Teste 1: Estatísticas incrementais")
+audit = AuditLogger(csv_path)
+for i in range(25):
+    missing = ["helmet", "goggles"] if i % 5 == 0 else (["goggles"] if i % 2 else [])
+    severity = "critical" if i % 5 == 0 else ("warning" if i % 2 else "ok")
+    audit.log_detection(i, 0, (10, 10, 50, 90), missing, 0.9, severity, camera_id="cam0")
+stats = audit.get_stats()
+print(f"  Stats: {stats}")
+assert stats["total_detections"] == 25
+assert stats["critical_alerts"] == 5
+assert stats["warning_alerts"] == 10
+assert stats["violations"] == 15
+print()
+
+# Teste 2: Reconstrução a partir do disco
+print("Teste 2: Estatísticas reconstruídas na inicialização")
+audit.flush()
+reopened = AuditLogger(csv_path)
+print(f"  Stats: {reopened.get_stats()}")
+assert reopened.get_stats() == stats
+print()
+
+# Teste 2b: Leitura do fim do arquivo e paginação por cursor
+print("Teste 2b: get_logs (tail) e read_page (cursor)")
+tail = reopened.get_logs(limit=3)
+assert [row["frame"] for row in tail] == ["22", "23", "24"]
+page1, cursor = reopened.read_page(cursor=0, limit=20)
+page2, cursor = reopened.read_page(cursor=cursor, limit=20)
+assert len(page1) == 20 and len(page2) == 5
+reopened.log_detection(25, 0, (10, 10, 50, 90), [], 0.9, "ok", camera_id="cam0")
+page3, _ = reopened.read_page(cursor=cursor)
+print(f"  Tail: {[row['frame'] for row in tail]} | Nova página: {[row['frame'] for row in page3]}")
+assert [row["frame"] for row in page3] == ["25"]
+print()
+
+# Teste 2c: Exportação em streaming
+print("Teste 2c: export_json (JSON, NDJSON gzip e filtro de período)")
+import gzip
+import json
+
+exported = reopened.export_json(tmp_dir / "audit.json")
+assert exported == 26 and len(json.load(open(tmp_dir / "audit.json", encoding="utf-8"))) == 26
+assert reopened.export_json(tmp_dir / "audit.ndjson.gz", fmt="ndjson") == 26
+with gzip.open(tmp_dir / "audit.ndjson.gz", "rt", encoding="utf-8") as f:
+    assert len([json.loads(line) for line in f]) == 26
+assert reopened.export_json(tmp_dir / "future.json", since="2999-01-01") == 0
+print(f"  Exportados: {exported}")
+print()
+
+# Teste 3: Escrita assíncrona
+print("Teste 3: Escrita em background (AsyncCSVWriter)")
+async_path = tmp_dir / "ppe_audit_async.csv"
+async_audit = AuditLogger(
+    async_path,
+    async_write=True,
+    writer_options={"queue_size": 50, "flush_rows": 10, "backpressure": "block"},
+)
+for i in range(500):
+    async_audit.log_detection(i, 0, (10, 10, 50, 90), [], 0.9, "ok", camera_id="cam1")
+async_audit.close()
+with open(async_path, encoding="utf-8") as f:
+    written = sum(1 for _ in f) - 1
+print(f"  Linhas gravadas: {written}")
+assert written == 500
+print()
+
+# Teste 3b: flush com a fila cheia (drop_oldest) e linhas em spill
+print("Teste 3b: flush sob pressão (drop_oldest) e spill visível após flush")
+pressure = AuditLogger(
+    tmp_dir / "ppe_audit_drop.csv",
+    async_write=True,
+    writer_options={"queue_size": 5, "flush_rows": 1000, "backpressure": "drop_oldest"},
+)
+for i in range(2000):
+    pressure.log_detection(i, 0, (10, 10, 50, 90), [], 0.9, "ok", camera_id="cam1")
+    if i % 100 == 0:
+        assert pressure.writer.flush(timeout=5.0), "flush travou com a fila cheia"
+dropped = pressure.writer.rows_dropped
+pressure.close()
+
+spill_audit = AuditLogger(
+    tmp_dir / "ppe_audit_spill.csv",
+    async_write=True,
+    writer_options={"queue_size": 1, "flush_rows": 1000, "backpressure": "spill"},
+)
+for i in range(300):
+    spill_audit.log_detection(i, 0, (10, 10, 50, 90), [], 0.9, "ok", camera_id="cam1")
+spill_audit.flush()
+visible = len(spill_audit.get_logs(limit=None))
+print(f"  Descartadas: {dropped} | Em spill: {spill_audit.writer.rows_spilled} | Visíveis: {visible}")
+assert visible == 300
+spill_audit.close()
+print()
+
+# Teste 4: Backend SQLite
+print("Teste 4: Backend SQLite (consultas indexadas)")
+from logger.sqlite_audit import SQLiteAuditLogger
+
+db = SQLiteAuditLogger(tmp_dir / "ppe_audit.db", writer_options={"backpressure": "block"})
+for i in range(200):
+    severity = "critical" if i % 4 == 0 else "ok"
+    missing = ["helmet", "goggles"] if severity == "critical" else []
+    db.log_detection(i, i % 3, (10, 10, 50, 90), missing, 0.9, severity, camera_id=f"cam{i % 2}")
+critical = db.query(severity="critical", limit=None)
+print(f"  Críticos: {len(critical)} | Stats cam1: {db.get_stats(camera_id='cam1')}")
+assert len(critical) == 50
+assert db.get_stats(camera_id="cam1")["total_detections"] == 100
+assert [row["frame"] for row in db.get_logs(limit=3)] == [197, 198, 199]
+db.close()
+print()
+
+print("="*60)
+print("OK - LOGGER FUNCIONANDO!")
+print("="*60)
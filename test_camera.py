@@ -21,6 +21,7 @@ from config.settings import (
     CENTROID_DISTANCE_THRESHOLD,
 )
 from utils.detector import EPIDetector
+from utils.model_manager import ModelManager
 from utils.validator import EPIValidator
 from logger.audit import AuditLogger
 
@@ -36,9 +37,8 @@ def test_camera(duration_seconds=30, output_video="test_output.avi"):
     
     logger.info("🎥 Iniciando teste de câmera...")
     
-    # Inicializar detector
-    model_path = "yolov8n.pt"
-    detector = EPIDetector(model_path, CONF_THRESHOLD)
+    # Inicializar detector (modelo resolvido e aquecido pelo ModelManager)
+    detector = ModelManager("yolov8n.pt", CONF_THRESHOLD, detector_cls=EPIDetector).load()
     validator = EPIValidator(DEFAULT_REQUIRED_PPE)
     audit_logger = AuditLogger(CSV_LOG_PATH)
     
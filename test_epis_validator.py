@@ -39,6 +39,47 @@ print(f"  Color: {r['color']}")
 print(f"  Message: {r['message']}")
 print()
 
+# Teste 4: Máscaras por class_id == máscaras por nome
+print("Teste 4: compile_classes (class_id) equivalente ao casamento por nome")
+import numpy as np
+
+from utils.detections import DetectionBatch
+from utils.detector_epi import EPIDetector, PersonEPIStatus
+
+normalize = EPIDetector.__new__(EPIDetector).normalize_ppe_name  # Aliases do detector
+class_names = {0: "person", 1: "hardhat", 2: "safety_glasses", 3: "glove", 4: "Safety_Vest", 5: "cap", 6: "boots"}
+# "personal_harness" casaria "person" por prefixo: IGNORED_NAMES impede
+required = ["helmet", "goggles", "gloves", "vest", "personal_harness"]
+by_name = EPIValidator(required)
+by_class = EPIValidator(required)
+by_class.compile_classes(class_names, normalize)
+
+rng = np.random.default_rng(0)
+statuses = []
+for i in range(300):
+    ids = rng.choice(len(class_names), size=rng.integers(0, 5), replace=False)
+    batch = DetectionBatch.from_arrays(np.tile([0, 0, 10, 10], (len(ids), 1)), ids, np.full(len(ids), 0.9), class_names)
+    ppes = {normalize(class_names[int(d.class_id)]): d for d in batch}
+    statuses.append(PersonEPIStatus(i, None, ppes, [], 0.9))
+name_masks = by_name.frame_masks(statuses)
+class_masks = by_class.frame_masks(statuses)
+assert by_class.rules.class_bits is not None and by_name.rules.class_bits is None
+assert (name_masks == class_masks).all(), "Máscaras por class_id diferentes das por nome"
+assert by_class.rules.class_bits[0] == 0, "Classe 'person' não pode satisfazer EPI"
+assert by_class.rules.class_bits[[1, 5]].tolist() == [by_class.rules.bit_of("helmet")] * 2, "Aliases de capacete"
+print(f"  {len(statuses)} pessoas, máscaras iguais; bits por classe: {by_class.rules.class_bits.tolist()}")
+print()
+
+# Teste 5: Limite de EPIs por lista
+print("Teste 5: Mais de 16 EPIs obrigatórios")
+try:
+    EPIValidator([f"epi{i}" for i in range(17)])
+except ValueError as e:
+    print(f"  Rejeitado: {e}")
+else:
+    raise AssertionError("Lista com 17 EPIs deveria ser rejeitada")
+print()
+
 print("="*60)
 print("OK - SISTEMA FUNCIONANDO!")
 print("="*60)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Teste da troca de modelo a quente (checagem, troca, carência e rollback)"""
+
+import gc
+import sys
+import time
+import weakref
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from utils.detections import DetectionBatch
+from utils import model_manager
+from utils.hot_swap import LoadedModel, ModelHotSwapper, sanity_check
+
+
+class FakeDetector:
+    """Detector mínimo: classes do modelo e uma saída fixa por frame."""
+
+    def __init__(self, class_names, boxes=()):
+        self.class_names = dict(class_names)
+        self.person_class_ids = [cid for cid, name in self.class_names.items() if name == "person"]
+        self.boxes = boxes
+
+    def normalize_ppe_name(self, name):
+        return {"hardhat": "helmet"}.get(name.lower(), name)
+
+    def detect_frame(self, frame):
+        ppes = DetectionBatch.from_arrays(
+            np.array(self.boxes, dtype=float).reshape(-1, 4), np.zeros(len(self.boxes)),
+            np.full(len(self.boxes), 0.9), self.class_names,
+        )
+        return DetectionBatch.empty(self.class_names), ppes
+
+
+class FakePool:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "Tempo esgotado"
+        time.sleep(0.01)
+
+
+print("\n" + "="*60)
+print("TESTE: TROCA DE MODELO A QUENTE")
+print("="*60 + "\n")
+
+# Teste 1: Checagem comparada com o modelo em uso
+print("Teste 1: sanity_check contra o modelo atual")
+ppe_only = FakeDetector({0: "helmet", 1: "gloves"})
+with_person = FakeDetector({0: "person", 1: "helmet", 2: "gloves"})
+sanity_check(FakeDetector({0: "hardhat", 1: "gloves", 2: "vest"}), ppe_only)  # Retreinado só de EPIs
+sanity_check(with_person, ppe_only)
+rejections = [
+    (ppe_only, with_person),  # Perdeu a classe de pessoa
+    (FakeDetector({0: "person", 1: "helmet"}), with_person),  # Perdeu luvas
+    (FakeDetector({0: "helmet", 1: "gloves"}, boxes=[(-5, 0, 10, 10)]), ppe_only),  # Caixa fora do frame
+]
+for new, current in rejections:
+    try:
+        sanity_check(new, current)
+    except ValueError as e:
+        print(f"  Rejeitado: {e}")
+    else:
+        raise AssertionError("Modelo deveria ser rejeitado")
+print()
+
+# Teste 2: Troca entre frames, carência e liberação do anterior
+print("Teste 2: poll() e liberação após a carência")
+pools = []
+
+
+def load_model(path):
+    if "ruim" in path:
+        raise ValueError("modelo inválido")
+    pools.append(FakePool())
+    return LoadedModel(path, FakeDetector({0: "person"}), pools[-1])
+
+
+first = LoadedModel("atual.pt", FakeDetector({0: "person"}), FakePool())
+swapper = ModelHotSwapper(first, load_model, watch=False, poll_interval=0.05, grace_frames=3)
+swapper.start()
+assert not swapper.poll(), "Nada pronto ainda"
+swapper.request_swap("novo.pt")
+wait_until(lambda: swapper._ready is not None)
+assert swapper.poll() and swapper.current.path == "novo.pt" and swapper.swaps == 1
+for _ in range(2):
+    swapper.frame_ok()
+assert swapper._previous is first, "Anterior guardado durante a carência"
+swapper.frame_ok()
+wait_until(lambda: first.pool is None)
+print(f"  Trocado para {swapper.current.path}; anterior liberado após 3 inferências")
+print()
+
+# Teste 3: Rollback quando o modelo novo falha em uso
+print("Teste 3: rollback()")
+swapper.request_swap("outro.pt")
+wait_until(lambda: swapper._ready is not None)
+failed = swapper._ready
+assert swapper.poll() and swapper.current is failed
+assert swapper.rollback() and swapper.current.path == "novo.pt" and swapper.rollbacks == 1
+wait_until(lambda: pools[-1].closed)
+assert not swapper.rollback(), "Sem anterior guardado, não há para onde voltar"
+print(f"  Voltou para {swapper.current.path} (rollbacks: {swapper.rollbacks})")
+print()
+
+# Teste 4: Modelo rejeitado no carregamento não entra em uso
+print("Teste 4: Carregamento rejeitado")
+swapper.request_swap("ruim.pt")
+wait_until(lambda: swapper.rejected == 1)
+assert not swapper.poll() and swapper.current.path == "novo.pt"
+print(f"  Rejeitados: {swapper.rejected}; em uso: {swapper.current.path}")
+print()
+
+# Teste 5: stop() libera o modelo pronto que nunca foi usado
+print("Teste 5: stop() com modelo pronto")
+swapper.request_swap("ultimo.pt")
+wait_until(lambda: swapper._ready is not None)
+unused = swapper._ready.pool
+swapper.stop()
+assert unused.closed and swapper._ready is None
+print("  Pool do modelo não usado encerrado")
+print()
+
+# Teste 6: Modelo trocado sai da memória (inclusive do cache do ModelManager)
+print("Teste 6: Detector anterior coletado após a liberação")
+cached = FakeDetector({0: "person"})
+model_manager._detectors[("teste",)] = cached  # Como um detector carregado com reuse=True
+old_ref = weakref.ref(cached)
+swapper = ModelHotSwapper(LoadedModel("cache.pt", cached), load_model, watch=False, poll_interval=0.05, grace_frames=1)
+del cached
+swapper.start()
+swapper.request_swap("novo.pt")
+wait_until(lambda: swapper._ready is not None)
+swapper.poll()
+swapper.frame_ok()
+wait_until(lambda: (gc.collect(), old_ref() is None)[1])
+swapper.stop()
+assert ("teste",) not in model_manager._detectors
+print("  Detector anterior coletado (weakref morto, fora do cache)")
+print()
+
+print("="*60)
+print("OK - TROCA DE MODELO FUNCIONANDO!")
+print("="*60)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Teste do rastreador de pessoas (IDs estáveis entre frames)"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from utils.detections import DetectionBatch
+from utils.keyframes import KeyframeScheduler
+from utils.tracker import PersonTracker, greedy_assignment, linear_assignment
+
+print("\n" + "="*60)
+print("TESTE: RASTREADOR DE PESSOAS")
+print("="*60 + "\n")
+
+# Teste 1: IDs estáveis com pessoas em movimento e ordem embaralhada
+print("Teste 1: IDs estáveis com ordem de detecção variável")
+rng = np.random.default_rng(0)
+tracker = PersonTracker(iou_threshold=0.3, max_age=5)
+start = np.array([[100, 100, 180, 300], [400, 120, 480, 330], [700, 90, 790, 310]], dtype=float)
+speed = np.array([[6, 0, 6, 0], [-4, 2, -4, 2], [0, -3, 0, -3]], dtype=float)
+first_ids = tracker.update(start)
+for step in range(1, 40):
+    order = rng.permutation(3)
+    ids = tracker.update((start + speed * step)[order])
+    assert list(ids) == list(first_ids[order]), f"IDs mudaram no frame {step}"
+print(f"  IDs: {first_ids.tolist()} mantidos por 40 frames")
+print()
+
+# Teste 2: Nascimento e morte de tracks
+print("Teste 2: Nascimento e morte de tracks")
+tracker = PersonTracker(max_age=2)
+a = tracker.update(np.array([[0, 0, 50, 100]]))
+for _ in range(3):
+    tracker.update(np.zeros((0, 4)))
+assert len(tracker) == 0, "Track deveria ter morrido após max_age"
+b = tracker.update(np.array([[0, 0, 50, 100]]))
+assert b[0] != a[0], "Pessoa que reaparece após max_age ganha ID novo"
+print(f"  ID antigo {a[0]} removido, novo ID {b[0]}")
+print()
+
+# Teste 3: Atribuição gulosa x ótima em matriz simples
+print("Teste 3: Atribuição linear")
+cost = np.array([[0.1, 0.9], [0.2, 0.3]])
+for fn in (greedy_assignment, linear_assignment):
+    rows, cols = fn(cost)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 0), (1, 1)]
+print("  ✓ Pares corretos")
+print()
+
+# Teste 4: Keyframes com propagação de pessoas e EPIs
+print("Teste 4: Detectar a cada N frames e propagar entre keyframes")
+names = {0: "person", 1: "helmet"}
+scheduler = KeyframeScheduler(PersonTracker(), interval=3, max_interval=8)
+detections = 0
+for t in range(60):
+    persons = DetectionBatch.from_arrays([[100 + 2 * t, 100, 180 + 2 * t, 300]], [0], [0.9], names)
+    helmets = DetectionBatch.from_arrays([[120 + 2 * t, 100, 160 + 2 * t, 130]], [1], [0.8], names)
+    if scheduler.needs_detection():
+        scheduler.on_detections(persons, helmets)
+        detections += 1
+    else:
+        p, e, ids = scheduler.propagate()
+        assert np.abs(p.xyxy - persons.xyxy).max() <= 1, "Pessoa propagada fora do lugar"
+        assert np.abs(e.xyxy - helmets.xyxy).max() <= 1, "EPI não acompanhou a pessoa"
+print(f"  Inferência em {detections}/60 frames (N final = {scheduler.interval})")
+assert detections < 30
+print()
+
+# Teste 5: Pessoa sai da cena: tracks inativas não forçam keyframes
+print("Teste 5: Cena vazia depois que a pessoa sai")
+scheduler = KeyframeScheduler(PersonTracker(max_age=30), interval=3, max_interval=8)
+person = DetectionBatch.from_arrays([[100, 100, 180, 300]], [0], [0.9], names)
+empty = DetectionBatch.empty(names)
+no_ppes = DetectionBatch.empty(names)
+for _ in range(3):
+    scheduler.on_detections(person, no_ppes)
+scheduler.on_detections(empty, no_ppes)  # Saiu: este keyframe não casa nada
+assert scheduler.tracker.match_ratio == 0.0
+ratios = []
+detections = 0
+for t in range(20):
+    if scheduler.needs_detection():
+        scheduler.on_detections(empty, no_ppes)
+        ratios.append(scheduler.tracker.match_ratio)
+        detections += 1
+    else:
+        scheduler.propagate()
+assert len(scheduler.tracker) == 1, "Track ainda não expirou (max_age=30)"
+assert all(r == 1.0 for r in ratios), f"Razão baixa com a cena vazia: {ratios}"
+print(f"  Inferência em {detections}/20 frames com a cena vazia (razão {ratios[-1]})")
+assert detections < 10
+print()
+
+print("="*60)
+print("OK - RASTREADOR FUNCIONANDO!")
+print("="*60)
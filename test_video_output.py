@@ -25,6 +25,7 @@ from config.settings import (
     CENTROID_DISTANCE_THRESHOLD,
 )
 from utils.detector import EPIDetector
+from utils.model_manager import COCO_MODEL_CANDIDATES, ModelManager, find_model
 from utils.validator import EPIValidator
 from logger.audit import AuditLogger
 
@@ -44,20 +45,9 @@ def test_video_output(duration_seconds=15, output_video="logs/test_output.mp4"):
         output_video: Caminho do vídeo de saída
     """
     
-    # Procurar modelo
-    model_path = None
-    for candidate in ["yolov8n.pt", "best.pt"]:
-        if Path(candidate).exists():
-            model_path = str(candidate)
-            logger.info(f"Modelo encontrado: {model_path}")
-            break
-    
-    if not model_path:
-        logger.error("Modelo não encontrado!")
-        return
-    
-    # Inicializar
-    detector = EPIDetector(model_path, CONF_THRESHOLD)
+    # Inicializar (modelo COCO com classe "person", aquecido pelo ModelManager)
+    model_path, _ = find_model(COCO_MODEL_CANDIDATES)
+    detector = ModelManager(model_path, CONF_THRESHOLD, detector_cls=EPIDetector).load()
     validator = EPIValidator(DEFAULT_REQUIRED_PPE)
     audit_logger = AuditLogger(CSV_LOG_PATH)
     
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Teste das zonas por câmera (setor pelo ponto do pé e validação por setor)"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from utils.detections import DetectionBatch
+from utils.detector_epi import PersonEPIStatus
+from utils.zones import SectorZones, display_name
+
+print("\n" + "="*60)
+print("TESTE: ZONAS E SETORES")
+print("="*60 + "\n")
+
+FRAME_SHAPE = (720, 1280, 3)
+zones = SectorZones.from_config({
+    "química": [(0, 300), (640, 300), (640, 720), (0, 720)],
+    "escritório": [[(640, 0), (1280, 0), (1280, 720), (640, 720)], [(0, 0), (200, 0), (200, 200), (0, 200)]],
+})
+
+# Teste 1: Setor pelo ponto do pé (centro da base da caixa)
+print("Teste 1: lookup()")
+boxes = np.array([
+    [100, 200, 200, 500],   # Pé em (150, 500): química
+    [900, 100, 1000, 400],  # Pé em (950, 400): escritório
+    [100, 50, 200, 150],    # Pé em (150, 150): segundo polígono do escritório
+    [300, 50, 400, 250],    # Pé em (350, 250): fora de zona
+    [1200, 600, 1400, 900], # Caixa saindo do frame: pé recortado para a borda (escritório)
+])
+sectors = zones.lookup(boxes, FRAME_SHAPE)
+print(f"  Setores: {[zones.sectors[s] if s >= 0 else None for s in sectors]}")
+assert sectors.tolist() == [0, 1, 1, -1, 1]
+assert zones.lookup(np.zeros((0, 4)), FRAME_SHAPE).shape == (0,)
+print()
+
+# Teste 2: Nomes para cv2.putText
+print("Teste 2: display_name()")
+assert display_name("química") == "quimica"
+assert display_name("escritório") == "escritorio"
+assert display_name("construção") == "construcao"
+print(f"  {[display_name(s) for s in zones.sectors]}")
+print()
+
+# Teste 3: Cada pessoa validada pelos EPIs do seu setor
+print("Teste 3: _validate_persons()")
+from main_epi import EPIMonitoringSystem
+from utils.validator_epi import EPIValidator
+
+system = EPIMonitoringSystem.__new__(EPIMonitoringSystem)
+system.detector = SimpleNamespace(class_names={0: "person", 1: "helmet", 2: "goggles", 3: "gloves"})
+system.validator = EPIValidator(["helmet", "goggles"])  # Fora de zona
+system.sector_validators = {}
+camera = SimpleNamespace(zones=zones)
+
+people = DetectionBatch.from_arrays(boxes[:4], np.zeros(4), np.full(4, 0.9), system.detector.class_names)
+ppes = DetectionBatch.from_arrays(np.tile([0, 0, 10, 10], (2, 1)), [1, 2], [0.9, 0.9], system.detector.class_names)
+helmet, goggles = ppes
+worn = [
+    {"helmet": helmet, "goggles": goggles},  # Química: faltam luvas
+    {"goggles": goggles},                    # Escritório: só óculos, OK
+    {},                                      # Escritório: sem óculos
+    {"helmet": helmet, "goggles": goggles},  # Fora de zona: padrão, OK
+]
+statuses = [PersonEPIStatus(i, person, w, [], 0.9) for i, (person, w) in enumerate(zip(people, worn))]
+validations, person_sectors, violations = system._validate_persons(camera, statuses, FRAME_SHAPE)
+print(f"  Setores: {person_sectors} | Faltando: {[v['missing'] for v in validations]}")
+assert person_sectors == ["química", "escritório", "escritório", None]
+assert [v["missing"] for v in validations] == [["gloves"], [], ["goggles"], []]
+assert violations == 2
+assert set(system.sector_validators) == {"química", "escritório"}
+print()
+
+print("="*60)
+print("OK - ZONAS FUNCIONANDO!")
+print("="*60)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Associação vetorizada EPI↔pessoa.
+Calcula de uma vez, com broadcasting NumPy, as matrizes pessoa × EPI de
+razão de overlap e distância entre centroids, em vez do laço duplo em Python.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def boxes_to_array(detections) -> np.ndarray:
+    """Converter lista de Detection (ou DetectionBatch) em array (N, 4) de xyxy."""
+    if hasattr(detections, "xyxy"):
+        return detections.xyxy.astype(np.float64)
+    if len(detections) == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    return np.array([d.bbox for d in detections], dtype=np.float64)
+
+
+def centroids_of(xyxy: np.ndarray) -> np.ndarray:
+    """Centroids inteiros (como em Detection.centroid) de um array xyxy inteiro."""
+    xyxy = xyxy.astype(np.int64)
+    return np.stack(
+        [(xyxy[:, 0] + xyxy[:, 2]) // 2, (xyxy[:, 1] + xyxy[:, 3]) // 2], axis=1
+    ).astype(np.float64)
+
+
+def overlap_ratio_matrix(person_xyxy: np.ndarray, ppe_xyxy: np.ndarray) -> np.ndarray:
+    """Matriz (P, E): área de interseção / área do EPI (0 se área do EPI = 0)."""
+    p = person_xyxy[:, None, :]
+    e = ppe_xyxy[None, :, :]
+    overlap_x = np.clip(np.minimum(p[..., 2], e[..., 2]) - np.maximum(p[..., 0], e[..., 0]), 0, None)
+    overlap_y = np.clip(np.minimum(p[..., 3], e[..., 3]) - np.maximum(p[..., 1], e[..., 1]), 0, None)
+    overlap_area = overlap_x * overlap_y
+
+    ppe_area = (ppe_xyxy[:, 2] - ppe_xyxy[:, 0]) * (ppe_xyxy[:, 3] - ppe_xyxy[:, 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(ppe_area[None, :] > 0, overlap_area / ppe_area[None, :], 0.0)
+    return ratio
+
+
+def centroid_distance_matrix(person_centroids: np.ndarray, ppe_centroids: np.ndarray) -> np.ndarray:
+    """Matriz (P, E) de distâncias euclidianas entre centroids."""
+    diff = person_centroids[:, None, :] - ppe_centroids[None, :, :]
+    return np.sqrt((diff ** 2).sum(axis=2))
+
+
+def association_mask(
+    person_xyxy: np.ndarray,
+    ppe_xyxy: np.ndarray,
+    overlap_threshold: float = 0.08,
+    centroid_threshold: float = 150,
+    person_centroids: np.ndarray = None,
+    ppe_centroids: np.ndarray = None,
+) -> np.ndarray:
+    """Matriz booleana (P, E): EPI associado se overlap > limiar ou distância < limiar."""
+    if person_centroids is None:
+        person_centroids = centroids_of(person_xyxy)
+    if ppe_centroids is None:
+        ppe_centroids = centroids_of(ppe_xyxy)
+
+    return (overlap_ratio_matrix(person_xyxy, ppe_xyxy) > overlap_threshold) | (
+        centroid_distance_matrix(person_centroids, ppe_centroids) < centroid_threshold
+    )
+
+
+def best_ppe_per_type(
+    mask: np.ndarray,
+    ppe_types: Sequence[str],
+    ppe_confidences: np.ndarray,
+) -> List[Dict[str, int]]:
+    """
+    Para cada pessoa, o índice do EPI de maior confiança de cada tipo associado.
+
+    Em empate de confiança vence o EPI que aparece primeiro (mesmo
+    comportamento do laço original com comparação estrita).
+
+    Returns:
+        Lista (uma por pessoa) de dicts tipo_epi -> índice do EPI
+    """
+    num_persons = mask.shape[0]
+    results = [dict() for _ in range(num_persons)]
+    if mask.size == 0:
+        return results
+
+    types = np.asarray(ppe_types, dtype=object)
+    scores = np.where(mask, np.asarray(ppe_confidences, dtype=np.float64)[None, :], -np.inf)
+
+    # Para cada tipo: melhor EPI e primeira ocorrência por pessoa (para a ordem das chaves)
+    _, first_of_type = np.unique(types, return_index=True)
+    per_type = []
+    for ppe_type in types[np.sort(first_of_type)]:
+        cols = np.flatnonzero(types == ppe_type)
+        sub = scores[:, cols]
+        best = cols[np.argmax(sub, axis=1)]
+        has_any = mask[:, cols].any(axis=1)
+        first = np.where(has_any, cols[np.argmax(mask[:, cols], axis=1)], -1)
+        per_type.append((ppe_type, best, has_any, first))
+
+    for pid in range(num_persons):
+        matched = [(first[pid], t, best[pid]) for t, best, has_any, first in per_type if has_any[pid]]
+        matched.sort()
+        results[pid] = {t: int(idx) for _, t, idx in matched}
+    return results
+
+
+def _intersection_and_areas(a_xyxy: np.ndarray, b_xyxy: np.ndarray):
+    a = a_xyxy[:, None, :]
+    b = b_xyxy[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    area_a = (a_xyxy[:, 2] - a_xyxy[:, 0]) * (a_xyxy[:, 3] - a_xyxy[:, 1])
+    area_b = (b_xyxy[:, 2] - b_xyxy[:, 0]) * (b_xyxy[:, 3] - b_xyxy[:, 1])
+    return inter_w * inter_h, area_a, area_b
+
+
+def iou_matrix(a_xyxy: np.ndarray, b_xyxy: np.ndarray) -> np.ndarray:
+    """Matriz (A, B) de IoU entre dois conjuntos de caixas xyxy."""
+    inter, area_a, area_b = _intersection_and_areas(a_xyxy, b_xyxy)
+    union = area_a[:, None] + area_b[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def ios_matrix(a_xyxy: np.ndarray, b_xyxy: np.ndarray) -> np.ndarray:
+    """
+    Matriz (A, B) de interseção / área da menor caixa.
+    Detecta uma caixa cortada na borda de um tile contida na caixa inteira.
+    """
+    inter, area_a, area_b = _intersection_and_areas(a_xyxy, b_xyxy)
+    smaller = np.minimum(area_a[:, None], area_b[None, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(smaller > 0, inter / smaller, 0.0)
+
+
+def nms(
+    xyxy: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float = 0.5,
+    class_ids: np.ndarray = None,
+    metric: str = "iou",
+) -> np.ndarray:
+    """
+    Non-maximum suppression com a matriz de sobreposição calculada de uma vez.
+
+    Args:
+        xyxy: Caixas (N, 4)
+        scores: Confianças (N,)
+        iou_threshold: Caixas com sobreposição acima disso com uma de maior confiança são removidas
+        class_ids: Se informado, só suprime caixas da mesma classe
+        metric: "iou" ou "ios" (interseção / menor área, para junção entre tiles)
+
+    Returns:
+        Índices mantidos, em ordem decrescente de confiança
+    """
+    order, owner = _suppress(xyxy, scores, iou_threshold, class_ids, metric)
+    return order[owner == np.arange(len(owner))]
+
+
+def nms_merge(
+    xyxy: np.ndarray,
+    scores: np.ndarray,
+    threshold: float = 0.6,
+    class_ids: np.ndarray = None,
+    metric: str = "ios",
+):
+    """
+    NMS que une cada caixa suprimida à caixa que a suprimiu (união dos
+    retângulos). Junta pedaços de um objeto cortado entre tiles numa caixa só.
+
+    Returns:
+        (índices mantidos, caixas unidas (K, 4)), em ordem decrescente de confiança
+    """
+    if len(xyxy) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.float64)
+
+    order, owner = _suppress(xyxy, scores, threshold, class_ids, metric)
+    boxes = np.asarray(xyxy, dtype=np.float64)[order]
+    merged = boxes.copy()
+    for col, reduce in ((0, np.minimum), (1, np.minimum), (2, np.maximum), (3, np.maximum)):
+        reduce.at(merged[:, col], owner, boxes[:, col])
+    kept = np.flatnonzero(owner == np.arange(len(owner)))
+    return order[kept], merged[kept]
+
+
+def _suppress(xyxy, scores, threshold, class_ids, metric):
+    """
+    Supressão gulosa. Retorna (ordem por confiança, dono de cada caixa na ordem);
+    caixas mantidas são donas de si mesmas.
+    """
+    if len(xyxy) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    boxes = np.asarray(xyxy, dtype=np.float64)[order]
+    overlap_fn = ios_matrix if metric == "ios" else iou_matrix
+    overlap = overlap_fn(boxes, boxes) > threshold
+    if class_ids is not None:
+        classes = np.asarray(class_ids)[order]
+        overlap &= classes[:, None] == classes[None, :]
+    # Só caixas de menor confiança podem ser suprimidas
+    overlap = np.triu(overlap, k=1)
+
+    owner = np.arange(len(boxes))
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if not suppressed[i]:
+            newly = overlap[i] & ~suppressed
+            owner[newly] = i
+            suppressed |= newly
+    return order, owner
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Backends de inferência do detector.
+
+- "pytorch": Ultralytics YOLO (eager), como antes
+- "onnxruntime" / "openvino": modelo exportado uma vez e guardado em cache
+  em models/exported/, com chave pelo hash dos pesos e pelo imgsz; letterbox,
+  decodificação da saída e NMS são feitos em NumPy
+
+Todos devolvem, por imagem, arrays (xyxy, class_ids, confidences) nas
+coordenadas da imagem recebida.
+"""
+import ast
+import hashlib
+import json
+import logging
+import shutil
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.association import nms
+from utils.preprocess import LetterboxPreprocessor
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "onnxruntime", "openvino")
+EXPORT_DIR = Path("models") / "exported"
+
+
+@dataclass
+class RawDetections:
+    """Saída do modelo para uma imagem (coordenadas da imagem de entrada)."""
+    xyxy: np.ndarray  # (N, 4) float
+    class_ids: np.ndarray  # (N,)
+    confidences: np.ndarray  # (N,)
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+
+def weights_hash(path: str, length: int = 12) -> str:
+    """Hash SHA-256 (prefixo) do arquivo de pesos."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def exported_model_path(weights: str, backend: str, imgsz: int, cache_dir: Path = EXPORT_DIR) -> Path:
+    """Caminho do modelo exportado em cache (.onnx ou pasta OpenVINO)."""
+    stem = f"{Path(weights).stem}-{weights_hash(weights)}-{imgsz}"
+    if backend == "openvino":
+        return Path(cache_dir) / f"{stem}_openvino_model"
+    return Path(cache_dir) / f"{stem}.onnx"
+
+
+def export_model(weights: str, backend: str, imgsz: int, cache_dir: Path = EXPORT_DIR) -> Path:
+    """
+    Exportar os pesos .pt para o backend (ou reaproveitar o cache).
+
+    Returns:
+        Caminho do modelo exportado
+    """
+    target = exported_model_path(weights, backend, imgsz, cache_dir)
+    if target.exists():
+        logger.info(f"Modelo exportado em cache: {target}")
+        return target
+
+    from ultralytics import YOLO
+
+    logger.info(f"Exportando {weights} para {backend} (imgsz={imgsz})...")
+    model = YOLO(weights)
+    fmt = "openvino" if backend == "openvino" else "onnx"
+    exported = Path(model.export(format=fmt, imgsz=imgsz, dynamic=(fmt == "onnx"), half=False))
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(exported), str(target))
+    # Nomes das classes ao lado do modelo (o exportado não depende do .pt)
+    names_path(target).write_text(json.dumps(model.names, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"Modelo exportado: {target}")
+    return target
+
+
+def names_path(model_path: Path) -> Path:
+    """Arquivo JSON com os nomes das classes de um modelo exportado."""
+    return model_path.with_name(model_path.stem + ".names.json")
+
+
+def to_blob(images: List[np.ndarray]) -> np.ndarray:
+    """Imagens BGR HWC uint8 (mesmo shape) -> blob RGB NCHW float32 em [0, 1]."""
+    blob = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+
+
+def decode_yolo_output(
+    output: np.ndarray,
+    conf_threshold: float,
+    iou_threshold: float = 0.7,
+    max_det: int = 300,
+) -> RawDetections:
+    """
+    Decodificar a saída de uma imagem de um YOLOv8 exportado.
+
+    Args:
+        output: (4 + num_classes, N) — cx, cy, w, h e score de cada classe
+        conf_threshold: Confiança mínima
+        iou_threshold: IoU do NMS por classe (o padrão do Ultralytics)
+        max_det: Máximo de detecções mantidas
+
+    Returns:
+        RawDetections nas coordenadas da entrada do modelo
+    """
+    preds = output.T  # (N, 4 + nc)
+    scores = preds[:, 4:]
+    class_ids = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(preds)), class_ids]
+    keep = confidences >= conf_threshold
+    preds, class_ids, confidences = preds[keep], class_ids[keep], confidences[keep]
+
+    cxcy, half = preds[:, :2], preds[:, 2:4] / 2
+    xyxy = np.concatenate([cxcy - half, cxcy + half], axis=1).astype(np.float64)
+    kept = nms(xyxy, confidences, iou_threshold, class_ids)[:max_det]
+    return RawDetections(xyxy[kept], class_ids[kept], confidences[kept])
+
+
+class InferenceBackend(ABC):
+    """Interface comum: nomes das classes e predict em lote."""
+
+    name = ""
+    names: Dict[int, str] = {}
+
+    def prepare(self, imgsz: int):
+        """Exportar/carregar o modelo de um imgsz antes do primeiro frame."""
+
+    def fuse(self):
+        """Fundir camadas (Conv + BN) antes do primeiro predict, se o runtime fizer isso."""
+
+    @abstractmethod
+    def predict(self, images: List[np.ndarray], conf: float, imgsz: int) -> List[RawDetections]:
+        """Detecções de cada imagem, nas coordenadas da imagem recebida."""
+
+
+class PyTorchBackend(InferenceBackend):
+    """Ultralytics YOLO em CPU (PyTorch eager)."""
+
+    name = "pytorch"
+
+    def __init__(self, model_path: str):
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def fuse(self):
+        # Senão o Ultralytics funde no primeiro predict
+        self.model.fuse()
+
+    def predict(self, images: List[np.ndarray], conf: float, imgsz: int) -> List[RawDetections]:
+        results = self.model.predict(images, conf=conf, imgsz=imgsz, verbose=False, device="cpu", half=False)
+        outputs = []
+        for r in results:
+            if r.boxes is None or len(r.boxes) == 0:
+                outputs.append(RawDetections(np.zeros((0, 4)), np.zeros(0, dtype=np.int64), np.zeros(0)))
+                continue
+            outputs.append(RawDetections(
+                r.boxes.xyxy.cpu().numpy(),
+                r.boxes.cls.cpu().numpy(),
+                r.boxes.conf.cpu().numpy(),
+            ))
+        return outputs
+
+
+class ExportedBackend(InferenceBackend):
+    """
+    Base dos backends exportados: letterbox, blob NCHW e decodificação em NumPy.
+
+    Com pesos .pt, exporta (com cache) um modelo por imgsz pedido; com um
+    modelo já exportado, usa o tamanho fixo dele para qualquer imgsz.
+    """
+
+    def __init__(self, model_path: str, cache_dir: Path = EXPORT_DIR):
+        self.model_path = str(model_path)
+        self.cache_dir = cache_dir
+        self.from_weights = Path(model_path).suffix == ".pt"
+        if self.from_weights and not Path(model_path).exists():
+            # Nome padrão (ex: yolov8n.pt): o Ultralytics baixa; o hash precisa do arquivo
+            from ultralytics import YOLO
+
+            self.model_path = str(YOLO(model_path).ckpt_path)
+        self._models: Dict[int, object] = {}  # imgsz -> modelo carregado
+        self._input_sizes: Dict[int, int] = {}  # imgsz pedido -> tamanho real da entrada
+        self._preprocessors: Dict[int, LetterboxPreprocessor] = {}
+        self.names = {}
+        if not self.from_weights:
+            self._load_fixed()
+
+    # --- Implementado por cada runtime ---
+    @abstractmethod
+    def _load(self, path: Path):
+        """Carregar modelo exportado; retorna (modelo, imgsz da entrada ou None se dinâmico)."""
+
+    @abstractmethod
+    def _run(self, model, blob: np.ndarray) -> np.ndarray:
+        """Executar o modelo num blob (B, 3, H, W) float32; retorna (B, 4 + nc, N)."""
+
+    def _embedded_names(self, model) -> Optional[Dict[int, str]]:
+        """Nomes das classes gravados nos metadados do modelo (se houver)."""
+        return None
+
+    # --- Comum ---
+    def _load_fixed(self):
+        path = Path(self.model_path)
+        model, size = self._load(path)
+        self._models[0] = model
+        self._input_sizes[0] = size
+        self.names = self._read_names(path, model)
+
+    def _read_names(self, path: Path, model) -> Dict[int, str]:
+        sidecar = names_path(path)
+        if sidecar.exists():
+            names = json.loads(sidecar.read_text(encoding="utf-8"))
+        else:
+            names = self._embedded_names(model) or {}
+        return {int(k): v for k, v in names.items()}
+
+    def _model_for(self, imgsz: int):
+        """Modelo e tamanho de entrada para um imgsz (exporta na primeira vez)."""
+        if not self.from_weights:
+            size = self._input_sizes[0] or imgsz
+            return self._models[0], size
+        if imgsz not in self._models:
+            path = export_model(self.model_path, self.name, imgsz, self.cache_dir)
+            self._models[imgsz], _ = self._load(path)
+            self._input_sizes[imgsz] = imgsz
+            if not self.names:
+                self.names = self._read_names(path, self._models[imgsz])
+        return self._models[imgsz], self._input_sizes[imgsz]
+
+    def prepare(self, imgsz: int):
+        self._model_for(imgsz)
+
+    def predict(self, images: List[np.ndarray], conf: float, imgsz: int) -> List[RawDetections]:
+        model, size = self._model_for(imgsz)
+        preprocess = self._preprocessors.get(size)
+        if preprocess is None:
+            # Entrada quadrada fixa (exportação estática)
+            preprocess = self._preprocessors[size] = LetterboxPreprocessor(size, auto=False)
+
+        letterboxed, transforms = preprocess.batch(images)
+        blob = to_blob(letterboxed)
+
+        outputs = []
+        for output, transform in zip(self._run(model, blob), transforms):
+            raw = decode_yolo_output(output, conf)
+            raw.xyxy = transform.to_frame(raw.xyxy)
+            outputs.append(raw)
+        return outputs
+
+
+class OnnxRuntimeBackend(ExportedBackend):
+    """ONNX Runtime (CPUExecutionProvider)."""
+
+    name = "onnxruntime"
+
+    def _load(self, path: Path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        shape = session.get_inputs()[0].shape  # [B, 3, H, W]; dims dinâmicas vêm como str
+        size = shape[2] if isinstance(shape[2], int) else None
+        return session, size
+
+    def _run(self, session, blob: np.ndarray) -> np.ndarray:
+        model_input = session.get_inputs()[0]
+        input_name = model_input.name
+        if model_input.shape[0] == 1 and len(blob) > 1:
+            # Exportação com lote fixo de 1
+            return np.concatenate([session.run(None, {input_name: blob[i:i + 1]})[0] for i in range(len(blob))])
+        return session.run(None, {input_name: blob})[0]
+
+    def _embedded_names(self, session) -> Optional[Dict[int, str]]:
+        names = session.get_modelmeta().custom_metadata_map.get("names")
+        return ast.literal_eval(names) if names else None
+
+
+class OpenVINOBackend(ExportedBackend):
+    """OpenVINO em CPU (modelo compilado, lote de 1)."""
+
+    name = "openvino"
+
+    def _load(self, path: Path):
+        import openvino as ov
+
+        xml = next(Path(path).glob("*.xml")) if Path(path).is_dir() else Path(path)
+        core = ov.Core()
+        model = core.read_model(str(xml))
+        compiled = core.compile_model(model, "CPU", {"PERFORMANCE_HINT": "LATENCY"})
+        shape = model.inputs[0].get_partial_shape()
+        size = shape[2].get_length() if shape[2].is_static else None
+        return compiled, size
+
+    def _run(self, compiled, blob: np.ndarray) -> np.ndarray:
+        # Exportação estática com lote 1: uma requisição por imagem
+        return np.concatenate([compiled(blob[i:i + 1])[0] for i in range(len(blob))])
+
+    def _read_names(self, path: Path, model) -> Dict[int, str]:
+        metadata = (Path(path) if Path(path).is_dir() else Path(path).parent) / "metadata.yaml"
+        if not names_path(Path(path)).exists() and metadata.exists():
+            import yaml
+
+            return {int(k): v for k, v in yaml.safe_load(metadata.read_text(encoding="utf-8"))["names"].items()}
+        return super()._read_names(path, model)
+
+
+def create_backend(model_path: str, backend: str = "pytorch") -> InferenceBackend:
+    """
+    Criar backend de inferência.
+
+    Args:
+        model_path: Pesos .pt (exportados sob demanda) ou modelo já exportado
+            (.onnx, pasta *_openvino_model)
+        backend: Um de BACKENDS
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inválido: {backend} (use {BACKENDS})")
+    if backend == "pytorch":
+        return PyTorchBackend(model_path)
+    if backend == "onnxruntime":
+        return OnnxRuntimeBackend(model_path)
+    return OpenVINOBackend(model_path)
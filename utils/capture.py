@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Captura de vídeo em thread separada.
+Mantém apenas o frame mais recente (slot único) para que a inferência
+sempre processe a imagem mais nova, descartando o backlog da câmera.
+"""
+import cv2
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CapturedFrame:
+    """Frame entregue pela thread de captura."""
+    frame: np.ndarray
+    frame_id: int  # Número sequencial do frame lido da câmera (1, 2, ...)
+    timestamp: float  # time.time() no momento da leitura
+    dropped: int  # Frames descartados desde a última leitura consumida
+
+
+def is_live_source(source: Union[int, str]) -> bool:
+    """Webcams e streams de rede são 'ao vivo'; arquivos de vídeo não."""
+    if isinstance(source, int):
+        return True
+    return str(source).lower().startswith(("rtsp://", "rtmp://", "http://", "https://"))
+
+
+class FrameGrabber:
+    """Lê frames continuamente em background e guarda apenas o mais recente."""
+
+    def __init__(
+        self,
+        source: Union[int, str] = 0,
+        width: int = 640,
+        height: int = 480,
+        fps: int = 30,
+        drop_frames: Optional[bool] = None,
+        frame_event: Optional[threading.Event] = None,
+    ):
+        """
+        Inicializar captura.
+
+        Args:
+            source: Fonte de vídeo (0=webcam, caminho de arquivo ou URL)
+            width, height, fps: Parâmetros solicitados à câmera
+            drop_frames: Se True, sobrescreve frames não consumidos (ao vivo).
+                Se False, a captura espera o consumo (arquivos de vídeo).
+                None = automático pela fonte.
+            frame_event: Sinalizado a cada frame novo e no fim da captura; um
+                único Event compartilhado deixa o consumidor de várias câmeras
+                dormir até alguma ter frame (em vez de consultar em laço)
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.drop_frames = is_live_source(source) if drop_frames is None else drop_frames
+        self.frame_event = frame_event
+
+        self.cap = None
+        self._thread = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._ended = False
+
+        # Slot único: (frame, frame_id, timestamp)
+        self._slot = None
+        self._last_consumed_id = 0
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+    def start(self) -> bool:
+        """Abrir a fonte e iniciar a thread de captura. Retorna False se falhar."""
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            logger.error(f"Erro ao abrir fonte de vídeo: {self.source}")
+            return False
+
+        # Otimizar câmera para CPU
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Buffer pequeno
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._capture_loop, name=f"capture-{self.source}", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Captura iniciada: {self.source} "
+            f"({'descarta frames antigos' if self.drop_frames else 'sem descarte'})"
+        )
+        return True
+
+    @property
+    def frame_shape(self) -> Tuple[int, int, int]:
+        """Resolução real entregue pela fonte (altura, largura, canais); a pedida antes de abrir."""
+        if self.cap is not None and self.cap.isOpened():
+            w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if w > 0 and h > 0:
+                return h, w, 3
+        return self.height, self.width, 3
+
+    def _capture_loop(self):
+        """Loop da thread de captura."""
+        while self._running:
+            success, frame = self.cap.read()
+            if not success:
+                break
+
+            with self._cond:
+                if not self.drop_frames:
+                    # Esperar o consumidor liberar o slot (vídeo offline)
+                    while self._running and self._slot is not None:
+                        self._cond.wait(0.1)
+                self.frames_captured += 1
+                self._slot = (frame, self.frames_captured, time.time())
+                self._cond.notify_all()
+            if self.frame_event is not None:
+                self.frame_event.set()
+
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+        if self.frame_event is not None:
+            self.frame_event.set()
+
+    def read_latest(self, stall_warning: Optional[float] = 5.0) -> Optional[CapturedFrame]:
+        """
+        Pegar o frame mais recente ainda não consumido.
+
+        Bloqueia até chegar um frame novo. Retorna None só quando a captura
+        terminou (fim do vídeo, falha de leitura ou stop()); uma câmera que
+        trava por alguns segundos (RTSP) não encerra o monitoramento: a cada
+        stall_warning segundos sem frame um aviso vai para o log e a espera continua.
+        """
+        stalled = 0.0
+        with self._cond:
+            while self._slot is None:
+                if self._ended or not self._running:
+                    return None
+                if not self._cond.wait(stall_warning) and stall_warning is not None:
+                    stalled += stall_warning
+                    logger.warning(f"Sem frames de {self.source} há {stalled:.0f}s; aguardando")
+
+            frame, frame_id, timestamp = self._slot
+            self._slot = None
+            dropped = frame_id - self._last_consumed_id - 1
+            self._last_consumed_id = frame_id
+            self.frames_dropped += dropped
+            self._cond.notify_all()
+
+        return CapturedFrame(frame=frame, frame_id=frame_id, timestamp=timestamp, dropped=dropped)
+
+    def has_new_frame(self) -> bool:
+        """Indica se há frame novo disponível sem bloquear."""
+        with self._cond:
+            return self._slot is not None
+
+    @property
+    def is_running(self) -> bool:
+        with self._cond:
+            return self._running and not (self._ended and self._slot is None)
+
+    def stop(self):
+        """Parar a thread e liberar a câmera."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        logger.info(
+            f"Captura encerrada: {self.source} | "
+            f"lidos={self.frames_captured} descartados={self.frames_dropped}"
+        )
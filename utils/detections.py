@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Detecções em estrutura de arrays (structure-of-arrays).
+
+DetectionBatch guarda xyxy, classes, confianças e centroids de todas as
+caixas de um frame em arrays NumPy contíguos, sem criar um objeto por caixa.
+DetectionView é uma visão leve de uma linha, com os mesmos atributos da
+dataclass Detection, para o código que ainda trabalha objeto a objeto.
+"""
+from typing import Dict, Iterator, Sequence, Tuple
+
+import numpy as np
+
+
+class DetectionView:
+    """Visão de uma detecção dentro de um DetectionBatch (sem copiar dados)."""
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "DetectionBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def class_id(self) -> int:
+        return int(self._batch.class_ids[self._index])
+
+    @property
+    def class_name(self) -> str:
+        return self._batch.class_name_of(self.class_id)
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        x1, y1, x2, y2 = self._batch.xyxy[self._index].tolist()
+        return (x1, y1, x2, y2)
+
+    @property
+    def confidence(self) -> float:
+        return float(self._batch.confidences[self._index])
+
+    @property
+    def centroid(self) -> Tuple[int, int]:
+        cx, cy = self._batch.centroids[self._index].tolist()
+        return (cx, cy)
+
+    def area(self) -> int:
+        x1, y1, x2, y2 = self.bbox
+        return (x2 - x1) * (y2 - y1)
+
+    def iou(self, other) -> float:
+        """Calcular IoU (Intersection over Union) com outra detecção."""
+        x1_a, y1_a, x2_a, y2_a = self.bbox
+        x1_b, y1_b, x2_b, y2_b = other.bbox
+
+        inter = max(0, min(x2_a, x2_b) - max(x1_a, x1_b)) * max(0, min(y2_a, y2_b) - max(y1_a, y1_b))
+        union = (x2_a - x1_a) * (y2_a - y1_a) + (x2_b - x1_b) * (y2_b - y1_b) - inter
+        return inter / union if union > 0 else 0
+
+    def _key(self):
+        return (self.class_id, self.class_name, self.bbox, self.confidence, self.centroid)
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self._key() == (
+                other.class_id, other.class_name, other.bbox, other.confidence, other.centroid
+            )
+        except AttributeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (
+            f"DetectionView(class_id={self.class_id}, class_name={self.class_name!r}, "
+            f"bbox={self.bbox}, confidence={self.confidence:.3f}, centroid={self.centroid})"
+        )
+
+
+class DetectionBatch:
+    """Detecções de um frame em arrays contíguos (N caixas)."""
+
+    __slots__ = ("xyxy", "class_ids", "confidences", "centroids", "class_names")
+
+    def __init__(
+        self,
+        xyxy: np.ndarray,
+        class_ids: np.ndarray,
+        confidences: np.ndarray,
+        centroids: np.ndarray,
+        class_names: Dict[int, str],
+    ):
+        self.xyxy = xyxy  # (N, 4) int32
+        self.class_ids = class_ids  # (N,) int32
+        self.confidences = confidences  # (N,) float32
+        self.centroids = centroids  # (N, 2) int32
+        self.class_names = class_names  # Compartilhado (não copiado) entre lotes
+
+    @classmethod
+    def from_arrays(
+        cls,
+        xyxy: np.ndarray,
+        class_ids: np.ndarray,
+        confidences: np.ndarray,
+        class_names: Dict[int, str],
+    ) -> "DetectionBatch":
+        """Criar a partir das saídas do modelo (xyxy float já na escala do frame)."""
+        boxes = np.ascontiguousarray(np.asarray(xyxy).reshape(-1, 4).astype(np.int32))  # Trunca como int()
+        centroids = np.empty((len(boxes), 2), dtype=np.int32)
+        np.floor_divide(boxes[:, 0] + boxes[:, 2], 2, out=centroids[:, 0])
+        np.floor_divide(boxes[:, 1] + boxes[:, 3], 2, out=centroids[:, 1])
+        return cls(
+            boxes,
+            np.asarray(class_ids, dtype=np.int32).reshape(-1),
+            np.asarray(confidences, dtype=np.float32).reshape(-1),
+            centroids,
+            class_names,
+        )
+
+    @classmethod
+    def empty(cls, class_names: Dict[int, str]) -> "DetectionBatch":
+        return cls(
+            np.zeros((0, 4), dtype=np.int32),
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros((0, 2), dtype=np.int32),
+            class_names,
+        )
+
+    @classmethod
+    def from_detections(cls, detections: Sequence, class_names: Dict[int, str] = None) -> "DetectionBatch":
+        """Converter uma lista de Detection/DetectionView (compatibilidade)."""
+        if isinstance(detections, DetectionBatch):
+            return detections
+        names = dict(class_names or {})
+        for d in detections:
+            names.setdefault(d.class_id, d.class_name)
+        if not detections:
+            return cls.empty(names)
+        batch = cls(
+            np.array([d.bbox for d in detections], dtype=np.int32),
+            np.array([d.class_id for d in detections], dtype=np.int32),
+            np.array([d.confidence for d in detections], dtype=np.float32),
+            np.array([d.centroid for d in detections], dtype=np.int32),
+            names,
+        )
+        return batch
+
+    @classmethod
+    def concat(cls, batches: Sequence["DetectionBatch"], class_names: Dict[int, str] = None) -> "DetectionBatch":
+        """Juntar vários lotes (ex: pessoas + EPIs, ou tiles)."""
+        names = class_names if class_names is not None else (batches[0].class_names if batches else {})
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty(names)
+        return cls(
+            np.concatenate([b.xyxy for b in batches]),
+            np.concatenate([b.class_ids for b in batches]),
+            np.concatenate([b.confidences for b in batches]),
+            np.concatenate([b.centroids for b in batches]),
+            names,
+        )
+
+    def class_name_of(self, class_id: int) -> str:
+        return self.class_names.get(class_id, str(class_id))
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, key):
+        """Inteiro -> DetectionView; slice/máscara/índices -> novo DetectionBatch."""
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("DetectionBatch index out of range")
+            return DetectionView(self, index)
+        return DetectionBatch(
+            self.xyxy[key],
+            self.class_ids[key],
+            self.confidences[key],
+            self.centroids[key],
+            self.class_names,
+        )
+
+    def __iter__(self) -> Iterator[DetectionView]:
+        for index in range(len(self)):
+            yield DetectionView(self, index)
+
+    def __repr__(self) -> str:
+        return f"DetectionBatch(n={len(self)})"
+
+    def split(self, mask: np.ndarray) -> Tuple["DetectionBatch", "DetectionBatch"]:
+        """Dividir em (batch[mask], batch[~mask])."""
+        return self[mask], self[~mask]
+
+    def shifted(self, dx: int, dy: int) -> "DetectionBatch":
+        """Cópia com as coordenadas deslocadas (ex: de um recorte para o frame inteiro)."""
+        offset = np.array([dx, dy, dx, dy], dtype=np.int32)
+        return DetectionBatch(
+            self.xyxy + offset,
+            self.class_ids,
+            self.confidences,
+            self.centroids + offset[:2],
+            self.class_names,
+        )
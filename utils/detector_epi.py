@@ -5,14 +5,18 @@ Detector melhorado para EPIs específicos (capacete, óculos, luvas)
 Com suporte a modelo customizado e mapeamento automático de classes
 """
 
-import cv2
 import numpy as np
-from ultralytics import YOLO
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 import logging
 
+from utils.association import association_mask, best_ppe_per_type, nms, nms_merge
+from utils.backends import RawDetections, create_backend
+from utils.tiling import tile_grid
+from utils.detections import DetectionBatch
+from utils.preprocess import LetterboxPreprocessor, LetterboxTransform
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,8 +53,8 @@ class Detection:
 class PersonEPIStatus:
     """Status de uma pessoa e seus EPIs."""
     person_id: int
-    person_detection: Detection
-    detected_ppes: Dict[str, Detection]  # chave: tipo EPI (ex: "helmet"), valor: Detection
+    person_detection: Detection  # DetectionView quando vem de um DetectionBatch
+    detected_ppes: Dict[str, Detection]  # chave: tipo EPI (ex: "helmet"), valor: detecção
     missing_ppes: List[str]
     confidence_score: float  # média de confiança
 
@@ -66,7 +70,28 @@ class EPIDetector:
         "vest": ["vest", "safety_vest", "colete", "collared_vest"],
     }
 
-    def __init__(self, model_path: str, conf_threshold: float = 0.3, is_custom: bool = False):
+    # "single": uma passada no frame reduzido para imgsz
+    # "two_stage": pessoas no frame reduzido, EPIs nos recortes em resolução original
+    # "tiled": frame em resolução original dividido em tiles sobrepostos (câmeras 4K)
+    # "dual": pessoas com um modelo próprio (ex: COCO), EPIs com o modelo customizado nos recortes
+    DETECTION_MODES = ("single", "two_stage", "tiled", "dual")
+
+    def __init__(
+        self,
+        model_path: str,
+        conf_threshold: float = 0.3,
+        is_custom: bool = False,
+        max_batch_size: int = 8,
+        mode: str = "single",
+        crop_margin: float = 0.15,
+        crop_imgsz: int = 320,
+        tile_size: int = 640,
+        tile_overlap: float = 0.2,
+        imgsz: int = 320,
+        backend: str = "pytorch",
+        person_model_path: Optional[str] = None,
+        person_imgsz: int = 320,
+    ):
         """
         Inicializar detector.
         
@@ -74,23 +99,90 @@ class EPIDetector:
             model_path: Caminho do modelo (yolov8n.pt ou models/epi_custom_best.pt)
             conf_threshold: Confiança mínima
             is_custom: True se modelo é customizado (tem capacete, óculos, etc)
+            max_batch_size: Máximo de frames por chamada do modelo em detect_batch
+            mode: Modo de detecção (ver DETECTION_MODES)
+            crop_margin: Margem em volta da pessoa no recorte (fração da caixa), modo two_stage
+            crop_imgsz: Resolução de entrada do modelo nos recortes, modo two_stage
+            tile_size: Lado do tile em pixels do frame original, modo tiled
+            tile_overlap: Sobreposição entre tiles vizinhos (fração do tile), modo tiled
+            imgsz: Lado maior da entrada do modelo no frame inteiro (múltiplo de 32)
+            backend: Runtime de inferência (utils.backends.BACKENDS)
+            person_model_path: Modelo de pessoas, modo dual (o principal detecta só EPIs)
+            person_imgsz: Lado maior da entrada do modelo de pessoas, modo dual
         """
-        self.model = YOLO(model_path)
+        if mode not in self.DETECTION_MODES:
+            raise ValueError(f"Modo inválido: {mode} (use {self.DETECTION_MODES})")
+        if mode == "dual" and not person_model_path:
+            raise ValueError("Modo dual requer person_model_path")
+
+        self.backend = create_backend(model_path, backend)
         self.conf_threshold = conf_threshold
-        self.class_names = self.model.names
+        self.max_batch_size = max_batch_size
+        self.imgsz = imgsz  # 320 ~ antigo fator 0.5 em 640x480 (otimização para CPU)
+        self.preprocess = LetterboxPreprocessor(imgsz)
+        self.mode = mode
+        self.crop_margin = crop_margin
+        self.crop_imgsz = crop_imgsz
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self._overview_preprocess = LetterboxPreprocessor(tile_size)  # Frame inteiro no modo tiled
+        self.nms_iou = 0.5  # Junção de EPIs vindos de recortes sobrepostos
+        self.tile_nms_ios = 0.6  # Junção entre tiles (interseção / menor caixa)
+        for size in self._input_sizes():
+            self.backend.prepare(size)  # Exportados: exporta/carrega antes do primeiro frame
+        self.class_names = dict(self.backend.names)
         self.is_custom_model = is_custom
+
+        # Modo dual: classes de pessoa do segundo modelo entram depois das do principal
+        self.person_backend = None
+        self.person_model_path = person_model_path if mode == "dual" else None
+        self.person_imgsz = person_imgsz
+        self._ppe_model_person_ids = np.zeros(0, dtype=np.int64)
+        if mode == "dual":
+            self.person_backend = create_backend(person_model_path, backend)
+            self.person_backend.prepare(person_imgsz)
+            self.person_preprocess = LetterboxPreprocessor(person_imgsz)
+            self._ppe_model_person_ids = np.array(
+                [cid for cid, name in self.class_names.items() if self._is_person_name(name)], dtype=np.int64
+            )
+            self._person_model_ids = np.array(
+                [cid for cid, name in self.person_backend.names.items() if self._is_person_name(name)],
+                dtype=np.int64,
+            )
+            self._person_id_offset = max(self.class_names, default=-1) + 1
+            for cid in self._person_model_ids.tolist():
+                self.class_names[self._person_id_offset + cid] = self.person_backend.names[cid]
         self.person_class_ids = self._identify_person_classes()
+        self._ppe_type_table = self._build_ppe_type_table()
         
         logger.info(f"Modelo carregado: {model_path}")
-        logger.info(f"Tipo: {'Customizado' if is_custom else 'Genérico (COCO)'}")
+        logger.info(
+            f"Tipo: {'Customizado' if is_custom else 'Genérico (COCO)'} | modo: {mode} | backend: {backend}"
+        )
+        if self.person_backend is not None:
+            logger.info(f"Modelo de pessoas: {person_model_path} (imgsz {person_imgsz})")
         logger.info(f"Classes disponíveis: {list(self.class_names.values())}")
 
+    def _input_sizes(self) -> List[int]:
+        """Entradas do modelo de EPIs usadas pelo modo de detecção."""
+        sizes = {
+            "single": [self.imgsz],
+            "two_stage": [self.imgsz, self.crop_imgsz],
+            "tiled": [self.tile_size],  # Tiles e o frame inteiro reduzido
+            "dual": [self.crop_imgsz],  # Pessoas vêm do outro modelo
+        }[self.mode]
+        return list(dict.fromkeys(sizes))
+
+    @staticmethod
+    def _is_person_name(name: str) -> bool:
+        return "person" in name.lower() or "worker" in name.lower()
+
     def _identify_person_classes(self) -> List[int]:
         """Identificar IDs de classes que representam pessoas."""
-        person_ids = [
-            cid for cid, name in self.class_names.items()
-            if "person" in name.lower() or "worker" in name.lower()
-        ]
+        if self.person_backend is not None:
+            person_ids = (self._person_model_ids + self._person_id_offset).tolist()
+        else:
+            person_ids = [cid for cid, name in self.class_names.items() if self._is_person_name(name)]
         if not person_ids:
             logger.warning("Nenhuma classe 'person' encontrada!")
         return person_ids
@@ -110,112 +202,270 @@ class EPIDetector:
         # Se não encontrar alias, retorna a classe como está
         return detected_class
 
-    def detect_frame(self, frame: np.ndarray) -> Tuple[List[Detection], List[Detection]]:
+    def detect_frame(self, frame: np.ndarray) -> Tuple[DetectionBatch, DetectionBatch]:
         """
         Detectar pessoas e EPIs em um frame.
-        Retorna: (persons, ppes)
+        Retorna: (persons, ppes) como DetectionBatch (iterar gera cada detecção)
         """
-        # Otimização para CPU: reduzir tamanho do frame
-        h, w = frame.shape[:2]
-        scale_factor = 0.5
-        frame_resized = cv2.resize(frame, (int(w * scale_factor), int(h * scale_factor)))
-        
-        # Usar modelo em CPU com parâmetros otimizados
-        results = self.model.predict(
-            frame_resized, 
-            conf=self.conf_threshold, 
-            verbose=False,
-            device="cpu",
-            half=False,
-        )
-        r = results[0]
+        return self.detect_batch([frame])[0]
 
-        persons = []
-        ppes = []
+    def detect_batch(
+        self,
+        frames: List[np.ndarray],
+        max_batch_size: Optional[int] = None,
+        persons: Optional[List[Optional[DetectionBatch]]] = None,
+    ) -> List[Tuple[DetectionBatch, DetectionBatch]]:
+        """
+        Detectar pessoas e EPIs em vários frames, uma chamada do modelo por lote.
 
-        if r.boxes is None or len(r.boxes) == 0:
-            return persons, ppes
+        Args:
+            frames: Lista de frames BGR (podem vir de câmeras diferentes)
+            max_batch_size: Tamanho máximo de cada lote (padrão: self.max_batch_size)
+            persons: Modo dual: pessoas já conhecidas por frame (ex: propagadas pelo
+                rastreador); None no lugar do frame roda o modelo de pessoas
 
-        xyxy = r.boxes.xyxy.cpu().numpy()
-        cls_ids = r.boxes.cls.cpu().numpy().astype(int)
-        confs = r.boxes.conf.cpu().numpy()
+        Returns:
+            Lista com (persons, ppes) para cada frame, na mesma ordem
+        """
+        if self.mode == "dual":
+            return self._detect_batch_dual(frames, max_batch_size, persons)
+        if self.mode == "two_stage":
+            return self._detect_batch_two_stage(frames, max_batch_size)
+        if self.mode == "tiled":
+            return [self._detect_tiled(frame) for frame in frames]
+        return self._detect_batch_single(frames, max_batch_size)
+
+    def _detect_batch_single(
+        self,
+        frames: List[np.ndarray],
+        max_batch_size: Optional[int] = None,
+    ) -> List[Tuple[DetectionBatch, DetectionBatch]]:
+        """Uma passada do modelo por frame reduzido (pessoas e EPIs juntos)."""
+        batch_size = max_batch_size or self.max_batch_size
+        outputs = []
 
-        # Fator para voltar ao tamanho original
-        scale_factor_inv = 1.0 / scale_factor
+        for start in range(0, len(frames), batch_size):
+            chunk = frames[start:start + batch_size]
 
-        for bbox, cls_id, conf in zip(xyxy, cls_ids, confs):
-            x1, y1, x2, y2 = map(int, bbox * scale_factor_inv)
-            centroid = ((x1 + x2) // 2, (y1 + y2) // 2)
-            class_name = self.class_names.get(int(cls_id), str(cls_id))
+            # Frame -> imgsz num único resize, em buffers reaproveitados
+            images, transforms = self.preprocess.batch(chunk)
 
-            detection = Detection(
-                class_id=int(cls_id),
-                class_name=class_name,
-                bbox=(x1, y1, x2, y2),
-                confidence=float(conf),
-                centroid=centroid,
-            )
+            # Usar modelo em CPU com parâmetros otimizados (uma chamada por lote)
+            results = self.backend.predict(images, self.conf_threshold, self.imgsz)
 
-            if cls_id in self.person_class_ids:
-                persons.append(detection)
-            else:
-                ppes.append(detection)
+            for r, transform in zip(results, transforms):
+                outputs.append(self._parse_result(r, transform))
 
-        return persons, ppes
+        return outputs
 
-    def associate_ppes_to_persons(
+    def _detect_batch_two_stage(
         self,
-        persons: List[Detection],
-        ppes: List[Detection],
-        overlap_threshold: float = 0.08,
-        centroid_threshold: int = 150,
-    ) -> List[PersonEPIStatus]:
+        frames: List[np.ndarray],
+        max_batch_size: Optional[int] = None,
+    ) -> List[Tuple[DetectionBatch, DetectionBatch]]:
         """
-        Associar EPIs às pessoas baseado em overlap e distância de centroid.
+        Duas etapas: pessoas no frame reduzido e EPIs nos recortes das pessoas
+        (cabeça e mãos incluídas pela margem) em resolução original, com os
+        recortes de todos os frames do lote numa mesma chamada do modelo.
         """
-        statuses = []
+        first_pass = self._detect_batch_single(frames, max_batch_size)
+        persons = [p for p, _ in first_pass]
+        ppes = self._detect_ppes_in_crops(frames, persons, max_batch_size, [e for _, e in first_pass])
+        return list(zip(persons, ppes))
 
-        for person_id, person in enumerate(persons):
-            detected_ppes = {}  # tipo_epi -> Detection
+    def _detect_batch_dual(
+        self,
+        frames: List[np.ndarray],
+        max_batch_size: Optional[int] = None,
+        persons: Optional[List[Optional[DetectionBatch]]] = None,
+    ) -> List[Tuple[DetectionBatch, DetectionBatch]]:
+        """
+        Dois modelos no mesmo escalonador: primeiro o de pessoas, em lote, só nos
+        frames sem pessoas conhecidas; depois o de EPIs, nos recortes de todos os
+        frames em lote. As chamadas são sequenciais nesta thread, então os dois
+        modelos nunca disputam os núcleos da CPU.
+        """
+        batch_size = max_batch_size or self.max_batch_size
+        persons = list(persons) if persons is not None else [None] * len(frames)
+        pending = [i for i, p in enumerate(persons) if p is None]
 
-            for ppe in ppes:
-                # Calcular overlap
-                x1_p, y1_p, x2_p, y2_p = person.bbox
-                x1_e, y1_e, x2_e, y2_e = ppe.bbox
+        for start in range(0, len(pending), batch_size):
+            indices = pending[start:start + batch_size]
+            images, transforms = self.person_preprocess.batch([frames[i] for i in indices])
+            results = self.person_backend.predict(images, self.conf_threshold, self.person_imgsz)
+            for i, r, transform in zip(indices, results, transforms):
+                persons[i] = self._parse_persons(r, transform)
 
-                overlap_x = max(0, min(x2_p, x2_e) - max(x1_p, x1_e))
-                overlap_y = max(0, min(y2_p, y2_e) - max(y1_p, y1_e))
-                overlap_area = overlap_x * overlap_y
-                ppe_area = (x2_e - x1_e) * (y2_e - y1_e)
+        ppes = self._detect_ppes_in_crops(frames, persons, max_batch_size)
+        return list(zip(persons, ppes))
 
-                overlap_ratio = overlap_area / ppe_area if ppe_area > 0 else 0
+    def _detect_ppes_in_crops(
+        self,
+        frames: List[np.ndarray],
+        persons: List[DetectionBatch],
+        max_batch_size: Optional[int] = None,
+        base_ppes: Optional[List[DetectionBatch]] = None,
+    ) -> List[DetectionBatch]:
+        """
+        EPIs nos recortes das pessoas (cabeça e mãos incluídas pela margem) em
+        resolução original, com os recortes de todos os frames numa mesma chamada
+        do modelo. base_ppes (EPIs já detectados por frame) entram na junção.
+        """
+        crops = []
+        owners = []  # (índice do frame, x0, y0) de cada recorte
+        for i, (frame, frame_persons) in enumerate(zip(frames, persons)):
+            for x0, y0, x1, y1 in self._crop_regions(frame_persons, frame.shape).tolist():
+                crops.append(frame[y0:y1, x0:x1])
+                owners.append((i, x0, y0))
+
+        crop_ppes = [[] if base_ppes is None else [base_ppes[i]] for i in range(len(frames))]
+        batch_size = max_batch_size or self.max_batch_size
+        for start in range(0, len(crops), batch_size):
+            results = self.backend.predict(crops[start:start + batch_size], self.conf_threshold, self.crop_imgsz)
+            for (i, x0, y0), r in zip(owners[start:start + batch_size], results):
+                _, ppes = self._parse_result(r)
+                if len(self._ppe_model_person_ids):
+                    # Modo dual: pessoas do modelo de EPIs são ignoradas
+                    ppes = ppes[~np.isin(ppes.class_ids, self._ppe_model_person_ids)]
+                crop_ppes[i].append(ppes.shifted(x0, y0))
+
+        outputs = []
+        for extra in crop_ppes:
+            # Recortes sobrepostos (e a primeira passada): duplicatas removidas por NMS
+            merged = DetectionBatch.concat(extra, self.class_names)
+            keep = np.sort(nms(merged.xyxy, merged.confidences, self.nms_iou, merged.class_ids))
+            outputs.append(merged[keep])
+        return outputs
+
+    def _detect_tiled(self, frame: np.ndarray) -> Tuple[DetectionBatch, DetectionBatch]:
+        """
+        Inferência fatiada: tiles sobrepostos em resolução original mais o frame
+        inteiro reduzido (pessoas grandes que não cabem num tile), todos numa
+        chamada do modelo; caixas cortadas nas bordas são juntadas por NMS.
+        """
+        regions = tile_grid(frame.shape, self.tile_size, self.tile_overlap)
+        images = [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in regions.tolist()]
+        overview, transform = self._overview_preprocess(frame)
+        images.append(overview)
+
+        results = self.backend.predict(images, self.conf_threshold, self.tile_size)
+
+        parts = []
+        for (x0, y0, _, _), r in zip(regions.tolist(), results):
+            persons, ppes = self._parse_result(r)
+            parts += [persons.shifted(x0, y0), ppes.shifted(x0, y0)]
+        parts += list(self._parse_result(results[-1], transform))
+
+        # Pedaços do mesmo objeto (tiles vizinhos, frame inteiro) viram uma caixa só
+        merged = DetectionBatch.concat(parts, self.class_names)
+        keep, boxes = nms_merge(merged.xyxy, merged.confidences, self.tile_nms_ios, merged.class_ids)
+        merged = DetectionBatch.from_arrays(
+            boxes, merged.class_ids[keep], merged.confidences[keep], self.class_names
+        )
+        return merged.split(np.isin(merged.class_ids, self.person_class_ids))
+
+    def _crop_regions(self, persons: DetectionBatch, frame_shape) -> np.ndarray:
+        """Caixas das pessoas expandidas pela margem e limitadas ao frame (P, 4)."""
+        h, w = frame_shape[:2]
+        boxes = persons.xyxy.astype(np.float64)
+        margin = np.stack([boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]], axis=1) * self.crop_margin
+        regions = np.concatenate([boxes[:, :2] - margin, boxes[:, 2:] + margin], axis=1)
+        regions = np.clip(regions, 0, [w, h, w, h]).astype(np.int64)
+        valid = (regions[:, 2] > regions[:, 0]) & (regions[:, 3] > regions[:, 1])
+        return regions[valid]
+
+    def _parse_result(
+        self, r: RawDetections, transform: Optional[LetterboxTransform] = None
+    ) -> Tuple[DetectionBatch, DetectionBatch]:
+        """
+        Converter saída do backend em lotes (persons, ppes).
 
-                # Calcular distância entre centroids
-                dx = person.centroid[0] - ppe.centroid[0]
-                dy = person.centroid[1] - ppe.centroid[1]
-                centroid_dist = (dx**2 + dy**2) ** 0.5
+        Com transform, as caixas voltam da entrada letterbox para o frame
+        original; sem ele, ficam nas coordenadas da imagem passada ao modelo.
+        """
+        if len(r) == 0:
+            empty = DetectionBatch.empty(self.class_names)
+            return empty, empty
+
+        # Arrays inteiros, sem um objeto por caixa
+        batch = DetectionBatch.from_arrays(
+            r.xyxy if transform is None else transform.to_frame(r.xyxy),
+            r.class_ids,
+            r.confidences,
+            self.class_names,
+        )
+        return batch.split(np.isin(batch.class_ids, self.person_class_ids))
+
+    def _parse_persons(self, r: RawDetections, transform: LetterboxTransform) -> DetectionBatch:
+        """Saída do modelo de pessoas (modo dual) -> pessoas com os IDs do detector."""
+        keep = np.isin(r.class_ids, self._person_model_ids)
+        return DetectionBatch.from_arrays(
+            transform.to_frame(r.xyxy[keep]),
+            r.class_ids[keep] + self._person_id_offset,
+            r.confidences[keep],
+            self.class_names,
+        )
 
-                # Associar se overlap > threshold ou centroid < threshold
-                if overlap_ratio > overlap_threshold or centroid_dist < centroid_threshold:
-                    # Normalizar nome do EPI
-                    ppe_type = self.normalize_ppe_name(ppe.class_name)
-                    
-                    # Guardar apenas EPI de maior confiança por tipo
-                    if ppe_type not in detected_ppes or ppe.confidence > detected_ppes[ppe_type].confidence:
-                        detected_ppes[ppe_type] = ppe
+    def associate_ppes_to_persons(
+        self,
+        persons: DetectionBatch,
+        ppes: DetectionBatch,
+        overlap_threshold: float = 0.08,
+        centroid_threshold: int = 150,
+    ) -> List[PersonEPIStatus]:
+        """
+        Associar EPIs às pessoas baseado em overlap e distância de centroid.
+        As matrizes pessoa × EPI são calculadas de uma vez (utils.association)
+        direto dos arrays do lote; listas de Detection também são aceitas.
+        """
+        persons = DetectionBatch.from_detections(persons, self.class_names)
+        ppes = DetectionBatch.from_detections(ppes, self.class_names)
+        if not len(persons):
+            return []
+
+        mask = association_mask(
+            persons.xyxy.astype(np.float64),
+            ppes.xyxy.astype(np.float64),
+            overlap_threshold=overlap_threshold,
+            centroid_threshold=centroid_threshold,
+            person_centroids=persons.centroids.astype(np.float64),
+            ppe_centroids=ppes.centroids.astype(np.float64),
+        )
+        best = best_ppe_per_type(mask, self.ppe_types_of(ppes), ppes.confidences)
 
+        statuses = []
+        for person_id, ppe_indices in enumerate(best):
+            person = persons[person_id]
             status = PersonEPIStatus(
                 person_id=person_id,
                 person_detection=person,
-                detected_ppes=detected_ppes,
+                # tipo_epi -> detecção (apenas o EPI de maior confiança por tipo)
+                detected_ppes={ppe_type: ppes[idx] for ppe_type, idx in ppe_indices.items()},
                 missing_ppes=[],
                 confidence_score=person.confidence,
             )
-
             statuses.append(status)
 
         return statuses
 
+    def _ppe_type_of(self, class_name: str) -> str:
+        return self.normalize_ppe_name(class_name)
+
+    def ppe_types_of(self, ppes: DetectionBatch) -> np.ndarray:
+        """Tipo de EPI de cada detecção via tabela por class_id (sem laço por caixa)."""
+        known = ppes.class_ids < len(self._ppe_type_table)
+        if known.all():
+            return self._ppe_type_table[ppes.class_ids]
+        return np.array([self._ppe_type_of(ppes.class_name_of(int(c))) for c in ppes.class_ids], dtype=object)
+
+    def _build_ppe_type_table(self) -> np.ndarray:
+        """Tabela class_id -> tipo de EPI, calculada uma vez por modelo."""
+        size = max(self.class_names, default=-1) + 1
+        return np.array(
+            [self._ppe_type_of(self.class_names.get(cid, str(cid))) for cid in range(size)],
+            dtype=object,
+        )
+
     def get_model_info(self) -> Dict:
         """Retornar informações sobre o modelo"""
         return {
@@ -223,4 +473,12 @@ class EPIDetector:
             "classes": list(self.class_names.values()),
             "num_classes": len(self.class_names),
             "conf_threshold": self.conf_threshold,
+            "max_batch_size": self.max_batch_size,
+            "imgsz": self.imgsz,
+            "backend": self.backend.name,
+            "mode": self.mode,
+            "person_model": self.person_model_path,
+            "person_imgsz": self.person_imgsz if self.person_backend is not None else None,
+            "tile_size": self.tile_size,
+            "tile_overlap": self.tile_overlap,
         }
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Troca do modelo de detecção sem parar o vídeo.
+
+Uma thread de fundo observa o arquivo de pesos (ou recebe um pedido
+explícito: tecla, SIGHUP), carrega e aquece o modelo novo e faz uma checagem
+de sanidade. O loop principal chama poll() entre frames e, se houver modelo
+pronto, a troca é só uma atribuição. O modelo anterior fica guardado por
+alguns frames: se o novo falhar na inferência, volta o anterior; passado o
+período de carência, o anterior é liberado.
+"""
+import gc
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, Set
+
+import numpy as np
+
+from utils.model_manager import evict_detector
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadedModel:
+    """Modelo carregado e pronto para uso (detector e, opcionalmente, pool de workers)."""
+    path: str
+    detector: object
+    pool: object = None
+    mtime: Optional[float] = None
+
+    def release(self):
+        """Liberar o modelo (encerra o pool e tira o detector do cache do processo)."""
+        if self.pool is not None:
+            self.pool.close()
+        if self.detector is not None:
+            evict_detector(self.detector)
+        self.detector = self.pool = None
+
+
+def ppe_classes(detector) -> Set[str]:
+    """Tipos de EPI que o modelo detecta (classes fora de pessoa, com aliases normalizados)."""
+    normalize = getattr(detector, "normalize_ppe_name", None)
+    person_ids = set(detector.person_class_ids)
+    return {
+        (normalize(name) if normalize else name).lower()
+        for cid, name in detector.class_names.items()
+        if cid not in person_ids
+    }
+
+
+def sanity_check(detector, current=None, frame_shape=(480, 640, 3)):
+    """
+    Checagem do modelo novo antes de entrar em produção.
+
+    A cobertura de classes é comparada com o modelo em uso (não com uma regra
+    fixa): um modelo só de EPIs retreinado substitui outro só de EPIs, mas não
+    pode perder a classe de pessoa nem EPIs que o atual detecta.
+
+    Args:
+        detector: Modelo novo (já aquecido)
+        current: Modelo em uso (None = sem comparação de classes)
+        frame_shape: Shape do frame de teste
+
+    Raises:
+        ValueError: modelo com menos classes que o atual ou com saída inválida
+    """
+    if current is not None:
+        if current.person_class_ids and not detector.person_class_ids:
+            raise ValueError("modelo novo sem classe 'person' (o atual tem)")
+        missing = ppe_classes(current) - ppe_classes(detector)
+        if missing:
+            raise ValueError(f"modelo novo não detecta EPIs do atual: {sorted(missing)}")
+    frame = np.random.default_rng(1).integers(0, 255, frame_shape, dtype=np.uint8)
+    h, w = frame_shape[:2]
+    for batch in detector.detect_frame(frame):
+        if len(batch) and (
+            (batch.xyxy < 0).any() or (batch.xyxy[:, [0, 2]] > w).any() or (batch.xyxy[:, [1, 3]] > h).any()
+            or not np.isfinite(batch.confidences).all()
+        ):
+            raise ValueError("caixas fora do frame ou confiança inválida")
+
+
+def file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class ModelHotSwapper:
+    """Carrega modelos novos em segundo plano e troca entre frames, com rollback."""
+
+    def __init__(
+        self,
+        current: LoadedModel,
+        load_model: Callable[[str], LoadedModel],
+        watch: bool = True,
+        poll_interval: float = 2.0,
+        grace_frames: int = 50,
+    ):
+        """
+        Args:
+            current: Modelo em uso
+            load_model: Função path -> LoadedModel (carrega, aquece e checa; levanta
+                exceção se o modelo não serve)
+            watch: Observar mudanças no arquivo de pesos do modelo em uso
+            poll_interval: Segundos entre verificações do arquivo
+            grace_frames: Inferências bem-sucedidas até liberar o modelo anterior
+        """
+        self.current = current
+        self.load_model = load_model
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self.grace_frames = grace_frames
+
+        self.swaps = 0
+        self.rejected = 0  # Falharam no carregamento/checagem
+        self.rollbacks = 0  # Falharam já em uso
+
+        if self.current.mtime is None:
+            self.current.mtime = file_mtime(current.path)
+        self._previous: Optional[LoadedModel] = None
+        self._frames_since_swap = 0
+        self._ready: Optional[LoadedModel] = None
+        self._requested: Optional[str] = None
+        self._rejected_mtime: Optional[float] = None  # Arquivo que já falhou (não tentar de novo)
+        self._loaded_mtime: Optional[float] = None  # Último arquivo carregado em segundo plano
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Gatilhos ---
+    def request_swap(self, path: Optional[str] = None):
+        """Pedir recarga (padrão: o mesmo arquivo do modelo atual). Seguro em signal handler."""
+        self._requested = path or self.current.path
+        self._wakeup.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-hot-swap", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Troca de modelo a quente ativa ({self.current.path}"
+            f"{', observando arquivo' if self.watch else ''})"
+        )
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self._release_previous()
+        with self._lock:
+            ready, self._ready = self._ready, None
+        if ready is not None:
+            ready.release()  # Carregado mas nunca usado
+
+    def _run(self):
+        last_seen = self.current.mtime
+        while not self._stop.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+
+            path, self._requested = self._requested, None
+            if path is None and self.watch:
+                mtime = file_mtime(self.current.path)
+                # Mudou e ficou igual por um ciclo (arquivo terminou de ser copiado)
+                changed = mtime is not None and mtime not in (
+                    self.current.mtime, self._rejected_mtime, self._loaded_mtime
+                )
+                if changed and mtime == last_seen:
+                    path = self.current.path
+                last_seen = mtime
+            if path is not None:
+                self._load(path)
+
+    def _load(self, path: str):
+        mtime = self._loaded_mtime = file_mtime(path)
+        logger.info(f"Carregando modelo novo em segundo plano: {path}")
+        try:
+            loaded = self.load_model(path)
+        except Exception as e:
+            self._rejected_mtime = mtime
+            self.rejected += 1
+            logger.error(f"Modelo novo rejeitado ({e}); mantendo o atual")
+            return
+        loaded.mtime = mtime
+        with self._lock:
+            stale, self._ready = self._ready, loaded
+        if stale is not None:
+            stale.release()
+
+    # --- Chamado pelo loop de vídeo, entre frames ---
+    def poll(self) -> bool:
+        """Trocar para o modelo pronto, se houver. True se o modelo em uso mudou."""
+        if self._ready is None:
+            return False
+        with self._lock:
+            ready, self._ready = self._ready, None
+        self._release_previous()
+        self._previous, self.current = self.current, ready
+        self._frames_since_swap = 0
+        self.swaps += 1
+        logger.info(f"Modelo trocado: {ready.path} (anterior mantido por {self.grace_frames} inferências)")
+        return True
+
+    def frame_ok(self):
+        """Inferência bem-sucedida com o modelo atual."""
+        if self._previous is None:
+            return
+        self._frames_since_swap += 1
+        if self._frames_since_swap >= self.grace_frames:
+            self._release_previous()
+
+    def rollback(self) -> bool:
+        """
+        Modelo atual falhou na inferência: voltar ao anterior, se ainda guardado.
+
+        Returns:
+            True se voltou (o chamador deve usar self.current); False se não há anterior
+        """
+        if self._previous is None:
+            return False
+        failed, self.current, self._previous = self.current, self._previous, None
+        self._rejected_mtime = failed.mtime
+        self.rollbacks += 1
+        logger.error(f"Modelo novo falhou em produção; voltando para o anterior ({self.current.path})")
+        threading.Thread(target=failed.release, daemon=True).start()
+        return True
+
+    def _release_previous(self):
+        previous, self._previous = self._previous, None
+        if previous is not None:
+            # Fora do loop de vídeo: encerrar workers pode levar alguns segundos
+            def release():
+                previous.release()
+                gc.collect()
+                logger.info(f"Modelo anterior liberado ({previous.path})")
+            threading.Thread(target=release, name="model-release", daemon=True).start()
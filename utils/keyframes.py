@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Agendamento de keyframes: o detector roda a cada N frames e, entre eles,
+as caixas de pessoas (e dos EPIs associados a elas) são propagadas pelo
+modelo de velocidade constante do PersonTracker.
+
+N se adapta ao movimento da cena (pessoas rápidas -> detecções mais
+frequentes) e uma detecção é antecipada quando o rastreador perde
+confiança (muitas tracks/detecções sem par no último keyframe).
+"""
+import logging
+from typing import Tuple
+
+import numpy as np
+
+from utils.association import centroid_distance_matrix
+from utils.detections import DetectionBatch
+from utils.tracker import PersonTracker
+
+logger = logging.getLogger(__name__)
+
+
+def lookup(keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Posição de cada key em values (-1 se ausente), sem laço Python."""
+    result = np.full(len(keys), -1, dtype=np.int64)
+    if len(values) == 0 or len(keys) == 0:
+        return result
+    order = np.argsort(values, kind="stable")
+    pos = np.clip(np.searchsorted(values, keys, sorter=order), 0, len(values) - 1)
+    found = values[order[pos]] == keys
+    result[found] = order[pos[found]]
+    return result
+
+
+class KeyframeScheduler:
+    """Decide quando rodar o detector e gera as detecções dos frames intermediários."""
+
+    def __init__(
+        self,
+        tracker: PersonTracker,
+        interval: int = 3,
+        min_interval: int = 1,
+        max_interval: int = 8,
+        max_drift: float = 0.05,
+        min_match_ratio: float = 0.6,
+        association_distance: float = 150,
+    ):
+        """
+        Inicializar agendador.
+
+        Args:
+            tracker: Rastreador da câmera (atualizado nos keyframes)
+            interval: N inicial (detectar a cada N frames)
+            min_interval, max_interval: Limites do N adaptativo
+            max_drift: Deslocamento tolerado entre keyframes, em fração da
+                altura da pessoa (N = max_drift / deslocamento por frame)
+            min_match_ratio: Abaixo disso o próximo frame é keyframe
+            association_distance: Distância máxima (px) EPI↔pessoa para o EPI
+                acompanhar a pessoa
+        """
+        self.tracker = tracker
+        self.interval = interval
+        self.base_interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_drift = max_drift
+        self.min_match_ratio = min_match_ratio
+        self.association_distance = association_distance
+
+        self.frames_since_keyframe = 0
+        self.keyframes = 0
+        self.propagated_frames = 0
+        self._force = True  # Primeiro frame sempre é keyframe
+
+        # Estado do último keyframe
+        self._class_names = {}
+        self._track_ids = np.zeros(0, dtype=np.int64)
+        self._person_class_ids = np.zeros(0, dtype=np.int32)
+        self._person_confidences = np.zeros(0, dtype=np.float32)
+        self._ppes = None
+        self._ppe_owner = np.zeros(0, dtype=np.int64)  # track id dono de cada EPI (-1 = nenhum)
+        self._owner_boxes = np.zeros((0, 4), dtype=np.float64)  # Caixa do dono no keyframe
+
+    def needs_detection(self) -> bool:
+        """True se o próximo frame deve passar pelo detector."""
+        return self._force or self.frames_since_keyframe + 1 >= self.interval
+
+    def on_detections(self, persons: DetectionBatch, ppes: DetectionBatch) -> np.ndarray:
+        """
+        Registrar um keyframe: atualiza o rastreador e o N adaptativo.
+
+        Returns:
+            IDs de track das pessoas (na ordem de `persons`)
+        """
+        track_ids = self.tracker.update(persons)
+        self.keyframes += 1
+        self.frames_since_keyframe = 0
+        self._force = self.tracker.match_ratio < self.min_match_ratio
+        self._adapt_interval()
+
+        self._class_names = persons.class_names
+        self._track_ids = track_ids
+        self._person_class_ids = persons.class_ids
+        self._person_confidences = persons.confidences
+
+        # Cada EPI acompanha a pessoa mais próxima (se estiver perto o bastante)
+        self._ppes = ppes
+        self._ppe_owner = np.full(len(ppes), -1, dtype=np.int64)
+        self._owner_boxes = np.zeros((len(ppes), 4), dtype=np.float64)
+        if len(persons) and len(ppes):
+            dist = centroid_distance_matrix(
+                persons.centroids.astype(np.float64), ppes.centroids.astype(np.float64)
+            )
+            nearest = np.argmin(dist, axis=0)
+            close = dist[nearest, np.arange(len(ppes))] < self.association_distance
+            self._ppe_owner[close] = track_ids[nearest[close]]
+            self._owner_boxes[close] = persons.xyxy[nearest[close]]
+        return track_ids
+
+    def propagate(self) -> Tuple[DetectionBatch, DetectionBatch, np.ndarray]:
+        """
+        Gerar (persons, ppes, track_ids) de um frame sem inferência.
+        Pessoas vêm da previsão do rastreador; EPIs são deslocados junto com
+        a pessoa dona (EPIs sem dono ficam parados).
+        """
+        track_ids, boxes = self.tracker.propagate()
+        self.frames_since_keyframe += 1
+        self.propagated_frames += 1
+
+        # Classe e confiança de cada pessoa vêm do keyframe
+        rows = lookup(track_ids, self._track_ids)
+        persons = DetectionBatch.from_arrays(
+            boxes,
+            self._person_class_ids[rows],
+            self._person_confidences[rows],
+            self._class_names,
+        )
+
+        ppes = self._ppes if self._ppes is not None else DetectionBatch.empty(self._class_names)
+        if len(ppes):
+            # Deslocamento do centro do dono desde o keyframe (0 se sem dono ou dono perdido)
+            owner_rows = lookup(self._ppe_owner, track_ids)
+            has_owner = owner_rows >= 0
+            now = boxes[owner_rows[has_owner]]
+            then = self._owner_boxes[has_owner]
+            shift = np.zeros((len(ppes), 2), dtype=np.float64)
+            shift[has_owner, 0] = (now[:, 0] + now[:, 2] - then[:, 0] - then[:, 2]) / 2
+            shift[has_owner, 1] = (now[:, 1] + now[:, 3] - then[:, 1] - then[:, 3]) / 2
+            ppes = DetectionBatch.from_arrays(
+                ppes.xyxy + np.concatenate([shift, shift], axis=1),
+                ppes.class_ids,
+                ppes.confidences,
+                ppes.class_names,
+            )
+        return persons, ppes, track_ids
+
+    def _adapt_interval(self):
+        """N menor com pessoas rápidas, maior com a cena parada."""
+        active = self.tracker.active & (self.tracker.hits > 1)
+        if not active.any():
+            self.interval = self.base_interval
+            return
+
+        boxes = self.tracker.boxes[active]
+        velocity = self.tracker.velocity[active]
+        heights = np.maximum(boxes[:, 3] - boxes[:, 1], 1.0)
+        speed = np.hypot((velocity[:, 0] + velocity[:, 2]) / 2, (velocity[:, 1] + velocity[:, 3]) / 2)
+        motion = float(np.max(speed / heights))  # Fração da altura por frame
+
+        if motion <= 0:
+            interval = self.max_interval
+        else:
+            interval = int(self.max_drift / motion)
+        self.interval = int(np.clip(interval, self.min_interval, self.max_interval))
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Carregamento do modelo em um só lugar.
+
+- Resolve os pesos uma vez (candidatos locais, modelo INT8 opcional)
+- Carrega o EPIDetector e reaproveita a instância no mesmo processo
+- Faz o warm-up com frames sintéticos antes da primeira câmera, para que os
+  primeiros predict não paguem a inicialização preguiçosa do runtime
+- Registra o tempo de cada fase da partida (import, load, fuse, warm-up)
+
+Com workers em "fork", o detector carregado aqui é herdado pelos processos
+filhos (pesos compartilhados copy-on-write, ver utils.workers).
+"""
+import importlib
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import (
+    CONF_THRESHOLD,
+    INFERENCE_BACKEND,
+    MODEL_WARMUP_ITERATIONS,
+    MODEL_WARMUP_SHAPE,
+    QUANTIZED_MODEL_PATH,
+    USE_INT8_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+# (caminho, is_custom) em ordem de preferência
+MODEL_CANDIDATES: List[Tuple[str, bool]] = [
+    ("models/epi_custom_best.pt", True),   # Modelo customizado
+    ("best.pt", False),                     # Modelo local
+    ("yolov8n.pt", False),                  # Modelo padrão COCO
+]
+# Ferramentas com o detector legado (utils.detector), que precisa da classe "person"
+COCO_MODEL_CANDIDATES: List[Tuple[str, bool]] = [
+    ("yolov8n.pt", False),
+    ("best.pt", False),
+]
+DEFAULT_MODEL = ("yolov8n.pt", False)  # Download automático pelo Ultralytics
+
+# Módulo importado na fase "import" de cada backend
+_RUNTIME_MODULES = {"pytorch": "ultralytics", "onnxruntime": "onnxruntime", "openvino": "openvino"}
+
+_resolved: Optional[Tuple[str, bool]] = None
+_detectors: Dict[tuple, object] = {}  # Detectores carregados neste processo
+
+
+def find_model(candidates: List[Tuple[str, bool]] = None) -> Tuple[str, bool]:
+    """
+    Procurar modelo local (resolvido uma vez por processo).
+
+    Args:
+        candidates: Lista própria de (caminho, is_custom) (padrão: MODEL_CANDIDATES,
+            com o modelo INT8 opcional na frente); não entra no cache do processo
+
+    Returns:
+        (model_path, is_custom)
+    """
+    global _resolved
+    if candidates is None and _resolved is not None:
+        return _resolved
+
+    result = None
+    if USE_INT8_MODEL and candidates is None:
+        if INFERENCE_BACKEND != "onnxruntime":
+            logger.warning("USE_INT8_MODEL ignorado: requer INFERENCE_BACKEND = 'onnxruntime'")
+        elif Path(QUANTIZED_MODEL_PATH).exists():
+            logger.info(f"Modelo INT8 encontrado: {QUANTIZED_MODEL_PATH}")
+            result = (QUANTIZED_MODEL_PATH, True)
+        else:
+            logger.warning(f"Modelo INT8 não encontrado ({QUANTIZED_MODEL_PATH}); rode scripts/quantize_int8.py")
+
+    if result is None:
+        for candidate, is_custom in candidates or MODEL_CANDIDATES:
+            if Path(candidate).exists():
+                logger.info(f"Modelo encontrado: {candidate}")
+                result = (str(candidate), is_custom)
+                break
+
+    if result is None:
+        logger.warning("Nenhum modelo local encontrado. Tentando download automático...")
+        result = DEFAULT_MODEL
+
+    if candidates is None:
+        _resolved = result
+    return result
+
+
+class StartupReport:
+    """Tempo de cada fase da partida do modelo."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}  # fase -> segundos
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t0
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def summary(self) -> str:
+        parts = " | ".join(f"{name}: {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        return f"{parts} | total: {self.total:.2f} s"
+
+
+def warmup(detector, iterations: int = 2, frame_shape=(480, 640, 3)):
+    """Rodar o detector em frames sintéticos (inicializa runtime, kernels e buffers)."""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, frame_shape, dtype=np.uint8)
+    for _ in range(iterations):
+        detector.detect_frame(frame)
+
+
+class ModelManager:
+    """Resolve, carrega, aquece e compartilha o EPIDetector."""
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        conf_threshold: float = CONF_THRESHOLD,
+        is_custom: Optional[bool] = None,
+        detector_options: Optional[Dict] = None,
+        warmup_iterations: int = MODEL_WARMUP_ITERATIONS,
+        warmup_shape: Tuple[int, int, int] = MODEL_WARMUP_SHAPE,
+        detector_cls=None,
+    ):
+        """
+        Args:
+            model_path: Pesos (padrão: find_model())
+            conf_threshold: Confiança mínima
+            is_custom: Se modelo é customizado (padrão: o de find_model())
+            detector_options: Parâmetros extras do EPIDetector (imgsz, backend, mode...)
+            warmup_iterations: Inferências de aquecimento (0 = sem warm-up)
+            warmup_shape: Shape dos frames de aquecimento (resolução das câmeras)
+            detector_cls: Outra classe de detector (ex: utils.detector.EPIDetector),
+                construída com (model_path, conf_threshold, **detector_options)
+        """
+        if model_path is None:
+            model_path, found_custom = find_model()
+            is_custom = found_custom if is_custom is None else is_custom
+        self.model_path = model_path
+        self.conf_threshold = conf_threshold
+        self.is_custom = bool(is_custom)
+        self.detector_options = dict(detector_options or {})
+        self.warmup_iterations = warmup_iterations
+        self.warmup_shape = tuple(warmup_shape)
+        self.detector_cls = detector_cls
+        self.report = StartupReport()
+
+    @property
+    def key(self) -> tuple:
+        options = tuple(sorted(self.detector_options.items()))
+        return (self.detector_cls, self.model_path, self.conf_threshold, self.is_custom, options)
+
+    def load(self, reuse: bool = True):
+        """
+        Carregar o detector (ou reaproveitar o já carregado neste processo).
+
+        Args:
+            reuse: False força carregar de novo (ex: pesos trocados no disco); o
+                novo não entra no cache (quem carregou decide quando liberar)
+        """
+        detector = _detectors.get(self.key) if reuse else None
+        if detector is not None:
+            return detector
+
+        backend = self.detector_options.get("backend", "pytorch")
+        with self.report.phase("import"):
+            importlib.import_module(_RUNTIME_MODULES.get(backend, "ultralytics"))
+            from utils.detector_epi import EPIDetector
+
+        with self.report.phase("load"):
+            if self.detector_cls is None:
+                detector = EPIDetector(
+                    self.model_path, self.conf_threshold, is_custom=self.is_custom, **self.detector_options
+                )
+            else:
+                detector = self.detector_cls(self.model_path, self.conf_threshold, **self.detector_options)
+
+        with self.report.phase("fuse"):
+            detector.backend.fuse()
+            if getattr(detector, "person_backend", None) is not None:
+                detector.person_backend.fuse()  # Modo dual
+
+        if self.warmup_iterations > 0:
+            with self.report.phase("warmup"):
+                warmup(detector, self.warmup_iterations, self.warmup_shape)
+
+        if reuse:
+            _detectors[self.key] = detector
+        logger.info(f"Modelo pronto ({self.model_path}, {backend}): {self.report.summary()}")
+        return detector
+
+
+def evict_detector(detector):
+    """Tirar um detector do cache do processo (ex: modelo trocado), para que possa ser coletado."""
+    for key, cached in list(_detectors.items()):
+        if cached is detector:
+            del _detectors[key]
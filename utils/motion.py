@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Gate de movimento: decide se um frame precisa passar pelo detector.
+
+Compara o frame (reduzido e em tons de cinza) com um fundo de média móvel
+(cv2.accumulateWeighted). Enquanto a fração de pixels alterados fica abaixo
+do limiar da câmera, a inferência é pulada e o último resultado reaproveitado;
+um refresh é forçado a cada max_interval segundos.
+"""
+import logging
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Detecção de movimento barata por diferença com o fundo."""
+
+    def __init__(
+        self,
+        threshold: float = 0.005,
+        pixel_delta: int = 25,
+        width: int = 160,
+        learning_rate: float = 0.05,
+        max_interval: float = 10.0,
+    ):
+        """
+        Inicializar gate.
+
+        Args:
+            threshold: Fração de pixels alterados (0-1) que conta como movimento
+            pixel_delta: Diferença de cinza (0-255) para um pixel contar como alterado
+            width: Largura do frame reduzido usado na comparação
+            learning_rate: Peso do frame novo na média do fundo
+            max_interval: Segundos máximos sem liberar inferência
+        """
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.learning_rate = learning_rate
+        self.max_interval = max_interval
+
+        self.motion_ratio = 0.0  # Fração de pixels alterados no último frame
+        self.skipped = 0  # Frames sem inferência (contados por quem reaproveita o resultado)
+        self.last_refresh = None
+
+        # Buffers reaproveitados entre frames
+        self._small = None
+        self._gray = None
+        self._background = None
+        self._background_u8 = None
+        self._diff = None
+
+    def _preprocess(self, frame: np.ndarray) -> np.ndarray:
+        """Reduzir, converter para cinza e suavizar (ruído do sensor)."""
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, round(h * self.width / w)))
+        if self._small is None or self._small.shape[:2] != (size[1], size[0]) or self._small.ndim != frame.ndim:
+            self._small = np.empty((size[1], size[0]) + frame.shape[2:], dtype=frame.dtype)
+            self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._background = None
+
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if self._small.ndim == 3:
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            self._gray[:] = self._small
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+        return self._gray
+
+    def update(self, frame: np.ndarray, now: float = None) -> bool:
+        """
+        Processar um frame.
+
+        Args:
+            frame: Frame BGR (ou cinza) em tamanho original
+            now: Timestamp do frame (padrão: time.time())
+
+        Returns:
+            True se o frame deve passar pelo detector
+        """
+        now = time.time() if now is None else now
+        gray = self._preprocess(frame)
+
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            self._background_u8 = gray.copy()
+            self._diff = np.empty_like(gray)
+            self.last_refresh = now
+            return True
+
+        cv2.convertScaleAbs(self._background, dst=self._background_u8)
+        cv2.absdiff(gray, self._background_u8, dst=self._diff)
+        changed = np.count_nonzero(self._diff > self.pixel_delta)
+        self.motion_ratio = changed / self._diff.size
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        if self.motion_ratio >= self.threshold or now - self.last_refresh >= self.max_interval:
+            self.last_refresh = now
+            return True
+        return False
+
+    def reset(self):
+        """Descartar o fundo (ex: câmera reposicionada)."""
+        self._background = None
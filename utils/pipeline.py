@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Estado por câmera do pipeline de monitoramento.
+Cada câmera tem sua captura, seu rastreador e seus contadores; detector,
+validador e logger de auditoria são compartilhados entre todas.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+from utils.capture import FrameGrabber
+from utils.keyframes import KeyframeScheduler
+from utils.motion import MotionGate
+from utils.roi import RegionOfInterest
+from utils.tracker import PersonTracker
+from utils.zones import SectorZones
+
+
+@dataclass
+class CameraContext:
+    """Estado de uma câmera dentro do sistema de monitoramento."""
+    camera_id: str
+    source: Union[int, str]
+    grabber: Optional[FrameGrabber] = None
+    tracker: Optional[PersonTracker] = None  # IDs de pessoa estáveis entre frames
+    keyframes: Optional[KeyframeScheduler] = None  # Detectar a cada N frames
+    person_keyframes: Optional[KeyframeScheduler] = None  # Modo dual: modelo de pessoas a cada N frames
+    motion_gate: Optional[MotionGate] = None  # Pular inferência com a cena parada
+    roi: Optional[RegionOfInterest] = None  # Área de trabalho (inferência só nela)
+    zones: Optional[SectorZones] = None  # Zonas -> setores (EPIs obrigatórios por pessoa)
+    last_detections: Optional[Tuple] = None  # (persons, ppes, track_ids) do último frame
+    frame_count: int = 0  # Frames processados pela inferência
+    dropped_frames: int = 0  # Frames descartados pela captura
+    last_latency_ms: float = 0.0  # Latência vidro-a-alerta do último frame
+
+    @property
+    def window_name(self) -> str:
+        return f"EPI Detector - {self.camera_id}"
+
+    def inference_frame(self, frame):
+        """Parte do frame enviada ao detector (recorte da ROI, se houver)."""
+        return self.roi.crop(frame) if self.roi is not None else frame
+
+    def to_inference_coords(self, batch):
+        """Levar detecções do frame inteiro para coordenadas da inferência (None passa direto)."""
+        if batch is None or self.roi is None:
+            return batch
+        x0, y0 = self.roi.offset
+        return batch.shifted(-x0, -y0)
+
+    def restore_detections(self, persons, ppes):
+        """Levar o resultado do detector para coordenadas do frame inteiro."""
+        if self.roi is None:
+            return persons, ppes
+        return self.roi.restore(persons), self.roi.restore(ppes)
+
+    def open(self, frame_event=None) -> bool:
+        """
+        Criar e iniciar a captura desta câmera.
+
+        Args:
+            frame_event: threading.Event sinalizado a cada frame novo (compartilhado entre câmeras)
+        """
+        self.grabber = FrameGrabber(self.source, frame_event=frame_event)
+        return self.grabber.start()
+
+    def close(self):
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Requisitos de EPI compilados em bits.
+
+Cada EPI obrigatório vira um bit; o conjunto de EPIs de uma pessoa vira uma
+máscara inteira e a validação é uma comparação de máscaras. O casamento de
+nomes (igualdade ou prefixo, ex: "glove" ↔ "gloves") é feito uma vez por nome
+ou, com compile_classes, uma vez por classe do modelo, e as contagens de EPIs
+faltando vêm de uma tabela de popcount indexada pela máscara.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Nomes que nunca são EPI
+IGNORED_NAMES = ("person",)
+
+
+def names_match(detected: str, required: str) -> bool:
+    """Match exato ou por prefixo (evita falsos positivos como "ves" em "vest")."""
+    return detected == required or (
+        len(detected) > len(required) and detected.startswith(required)
+    ) or (
+        len(required) > len(detected) and required.startswith(detected)
+    )
+
+
+class PPERules:
+    """Lista de EPIs obrigatórios compilada em máscaras de bits."""
+
+    MAX_REQUIRED = 16  # Tabelas por máscara têm 2^N entradas
+
+    def __init__(self, required_epis: Sequence[str]):
+        """
+        Args:
+            required_epis: EPIs obrigatórios (minúsculos); o i-ésimo é o bit i
+        """
+        if len(required_epis) > self.MAX_REQUIRED:
+            raise ValueError(
+                f"No máximo {self.MAX_REQUIRED} EPIs obrigatórios por lista (recebido {len(required_epis)}); "
+                "ajuste DEFAULT_REQUIRED_PPE / REQUIRED_PPE_BY_SECTOR em config/settings.py"
+            )
+        self.required = list(required_epis)
+        self.full_mask = (1 << len(self.required)) - 1
+        masks = np.arange(1 << len(self.required), dtype=np.int64)
+        self.popcount = np.zeros(len(masks), dtype=np.int64)
+        for bit in range(len(self.required)):
+            self.popcount += (masks >> bit) & 1
+        self.class_bits: Optional[np.ndarray] = None  # class_id -> bit (compile_classes)
+        self._name_bits: Dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        """Número de máscaras possíveis (tamanho das tabelas por máscara)."""
+        return self.full_mask + 1
+
+    def bit_of(self, name: str) -> int:
+        """Bit do EPI obrigatório que o nome detectado satisfaz (0 se nenhum)."""
+        bit = self._name_bits.get(name)
+        if bit is None:
+            lower = name.lower()
+            bit = 0
+            if lower not in IGNORED_NAMES:
+                for i, required in enumerate(self.required):
+                    if names_match(lower, required):
+                        bit = 1 << i
+                        break
+            self._name_bits[name] = bit
+        return bit
+
+    def mask_of(self, names: Iterable[str]) -> int:
+        """Máscara dos EPIs obrigatórios presentes entre os nomes detectados."""
+        mask = 0
+        for name in names:
+            mask |= self.bit_of(name)
+        return mask
+
+    def names_of(self, mask: int) -> List[str]:
+        """EPIs obrigatórios de uma máscara, na ordem dos requisitos."""
+        return [ppe for i, ppe in enumerate(self.required) if mask >> i & 1]
+
+    def compile_classes(
+        self, class_names: Dict[int, str], normalize: Optional[Callable[[str], str]] = None
+    ) -> np.ndarray:
+        """
+        Tabela class_id -> bit para as classes de um modelo.
+
+        Args:
+            class_names: Classes do modelo (id -> nome)
+            normalize: Nome da classe -> tipo de EPI (ex: aliases do detector)
+        """
+        size = max(class_names, default=-1) + 1
+        self.class_bits = np.zeros(size, dtype=np.int64)
+        for cid, name in class_names.items():
+            self.class_bits[cid] = self.bit_of(normalize(name) if normalize else name)
+        return self.class_bits
+
+    def person_masks(self, detected: Sequence[Dict]) -> np.ndarray:
+        """
+        Máscara de cada pessoa a partir dos EPIs detectados (tipo -> detecção).
+        Com compile_classes, os bits vêm da tabela por class_id num único
+        bitwise_or; senão, do nome de cada EPI.
+        """
+        if self.class_bits is not None:
+            owners = [i for i, ppes in enumerate(detected) for _ in ppes]
+            class_ids = np.array(
+                [getattr(d, "class_id", -1) for ppes in detected for d in ppes.values()], dtype=np.int64
+            )
+            if ((class_ids >= 0) & (class_ids < len(self.class_bits))).all():
+                return self.masks_from_classes(np.array(owners, dtype=np.int64), class_ids, len(detected))
+        return np.array([self.mask_of(ppes) for ppes in detected], dtype=np.int64)
+
+    def masks_from_classes(self, owners: np.ndarray, class_ids: np.ndarray, num_persons: int) -> np.ndarray:
+        """
+        Máscara de cada pessoa a partir dos EPIs associados (requer compile_classes).
+
+        Args:
+            owners: Índice da pessoa dona de cada EPI
+            class_ids: Classe de cada EPI
+            num_persons: Número de pessoas do frame
+        """
+        masks = np.zeros(num_persons, dtype=np.int64)
+        np.bitwise_or.at(masks, owners, self.class_bits[class_ids])
+        return masks
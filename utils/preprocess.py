@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Pré-processamento do frame para o modelo numa única redimensionada.
+
+O frame da câmera vai direto para o tamanho de entrada (imgsz) com
+letterbox, escrito em buffers pré-alocados e reaproveitados entre frames.
+Como a imagem já chega no tamanho final, o letterbox do Ultralytics não
+redimensiona de novo. As caixas voltam ao frame original com a transformação
+inversa exata (escala por eixo e padding).
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+PAD_VALUE = 114  # Mesmo cinza do letterbox do Ultralytics
+MAX_BUFFERS = 32  # Buffers guardados por preprocessador (os mais antigos saem primeiro)
+
+
+@dataclass
+class LetterboxTransform:
+    """Geometria do letterbox de um frame (para mapear caixas de volta)."""
+    frame_width: int
+    frame_height: int
+    resized_width: int
+    resized_height: int
+    pad_x: int
+    pad_y: int
+
+    @property
+    def scale(self) -> Tuple[float, float]:
+        """Escala efetiva (x, y) — difere de imgsz/lado só pelo arredondamento."""
+        return self.resized_width / self.frame_width, self.resized_height / self.frame_height
+
+    def to_frame(self, xyxy: np.ndarray) -> np.ndarray:
+        """Converter caixas (N,4) da entrada do modelo para pixels do frame original."""
+        sx, sy = self.scale
+        boxes = (np.asarray(xyxy, dtype=np.float64) - [self.pad_x, self.pad_y, self.pad_x, self.pad_y]) / [sx, sy, sx, sy]
+        limits = [self.frame_width, self.frame_height, self.frame_width, self.frame_height]
+        return np.clip(boxes, 0, limits)
+
+
+class LetterboxPreprocessor:
+    """Frame -> entrada do modelo (imgsz) com um único resize em buffer reaproveitado."""
+
+    def __init__(self, imgsz: int = 320, stride: int = 32, auto: bool = True):
+        """
+        Args:
+            imgsz: Lado maior da entrada do modelo (múltiplo de stride)
+            stride: Múltiplo exigido pelo modelo nas dimensões da entrada
+            auto: True = padding mínimo até o múltiplo de stride (retangular);
+                False = entrada quadrada imgsz x imgsz
+        """
+        if imgsz % stride:
+            raise ValueError(f"imgsz ({imgsz}) precisa ser múltiplo de {stride}")
+        self.imgsz = imgsz
+        self.stride = stride
+        self.auto = auto
+        # (slot, shape da entrada do modelo) -> [buffer, última transformação escrita nele].
+        # A chave não depende do shape do frame: recortes de tamanhos variados
+        # (two_stage/dual) reaproveitam o mesmo buffer quadrado com auto=False
+        self._buffers: Dict[Tuple[int, Tuple[int, ...]], list] = {}
+
+    def layout(self, frame_shape) -> Tuple[Tuple[int, ...], LetterboxTransform]:
+        """Shape da entrada do modelo e transformação para um frame deste shape."""
+        h, w = frame_shape[:2]
+        scale = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+        if self.auto:
+            out_w = math.ceil(new_w / self.stride) * self.stride
+            out_h = math.ceil(new_h / self.stride) * self.stride
+        else:
+            out_w = out_h = self.imgsz
+        transform = LetterboxTransform(w, h, new_w, new_h, (out_w - new_w) // 2, (out_h - new_h) // 2)
+        return (out_h, out_w) + tuple(frame_shape[2:]), transform
+
+    def __call__(self, frame: np.ndarray, slot: int = 0) -> Tuple[np.ndarray, LetterboxTransform]:
+        """
+        Redimensionar o frame direto para a entrada do modelo.
+
+        Args:
+            frame: Frame BGR original (pode ser view, ex: recorte da ROI)
+            slot: Posição no lote (cada posição tem seu buffer)
+
+        Returns:
+            (imagem de entrada — reescrita na próxima chamada do mesmo slot, transformação)
+        """
+        shape, t = self.layout(frame.shape)
+        key = (slot, shape)
+        cached = self._buffers.get(key)
+        if cached is None or cached[0].dtype != frame.dtype:
+            if len(self._buffers) >= MAX_BUFFERS:
+                del self._buffers[next(iter(self._buffers))]
+            # Borda escrita só quando a geometria muda (câmera fixa: uma única vez)
+            self._buffers[key] = cached = [np.full(shape, PAD_VALUE, dtype=frame.dtype), t]
+        elif cached[1] != t:
+            cached[0].fill(PAD_VALUE)
+            cached[1] = t
+        buffer = cached[0]
+
+        inner = buffer[t.pad_y:t.pad_y + t.resized_height, t.pad_x:t.pad_x + t.resized_width]
+        if inner.shape == frame.shape:
+            inner[...] = frame
+        else:
+            cv2.resize(frame, (t.resized_width, t.resized_height), dst=inner, interpolation=cv2.INTER_LINEAR)
+        return buffer, t
+
+    def batch(self, frames: List[np.ndarray]) -> Tuple[List[np.ndarray], List[LetterboxTransform]]:
+        """Pré-processar um lote (um slot por posição)."""
+        images, transforms = [], []
+        for slot, frame in enumerate(frames):
+            image, transform = self(frame, slot)
+            images.append(image)
+            transforms.append(transform)
+        return images, transforms
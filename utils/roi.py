@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Região de interesse (ROI) poligonal por câmera.
+
+O detector recebe só o retângulo que envolve o polígono (um recorte sem
+cópia do frame). As caixas voltam para coordenadas do frame inteiro e
+detecções com centroid fora do polígono são descartadas. Retângulo e
+máscara são calculados uma única vez, na criação da ROI.
+"""
+import logging
+from typing import Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from utils.detections import DetectionBatch
+
+logger = logging.getLogger(__name__)
+
+
+class RegionOfInterest:
+    """Polígono de trabalho de uma câmera (coordenadas em pixels do frame)."""
+
+    def __init__(self, polygon: Sequence[Tuple[int, int]]):
+        """
+        Args:
+            polygon: Vértices [(x, y), ...] em pixels do frame original
+        """
+        self.polygon = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+        if len(self.polygon) < 3:
+            raise ValueError("ROI precisa de pelo menos 3 vértices")
+
+        x, y, w, h = cv2.boundingRect(self.polygon)
+        self.x0, self.y0 = max(0, x), max(0, y)
+        self.x1, self.y1 = x + w, y + h
+
+        # Máscara no sistema de coordenadas do recorte
+        self.mask = np.zeros((self.y1 - self.y0, self.x1 - self.x0), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [self.polygon - [self.x0, self.y0]], 255)
+
+    @property
+    def offset(self) -> Tuple[int, int]:
+        return self.x0, self.y0
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """Recorte do retângulo da ROI (view, sem cópia)."""
+        return frame[self.y0:self.y1, self.x0:self.x1]
+
+    def restore(self, batch: DetectionBatch) -> DetectionBatch:
+        """Levar caixas do recorte para o frame inteiro e descartar as fora do polígono."""
+        if not len(batch):
+            return batch
+        h, w = self.mask.shape
+        cx = np.clip(batch.centroids[:, 0], 0, w - 1)
+        cy = np.clip(batch.centroids[:, 1], 0, h - 1)
+        inside = self.mask[cy, cx] > 0
+        return batch[inside].shifted(self.x0, self.y0)
+
+    def draw(self, image: np.ndarray, color=(255, 255, 0)):
+        """Desenhar o contorno da ROI."""
+        cv2.polylines(image, [self.polygon], True, color, 1)
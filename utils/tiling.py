@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Grade de tiles sobrepostos para inferência fatiada em frames grandes.
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def tile_starts(length: int, tile: int, stride: int) -> np.ndarray:
+    """Inícios dos tiles num eixo; o último tile termina exatamente na borda."""
+    if length <= tile:
+        return np.zeros(1, dtype=np.int64)
+    starts = np.arange(0, length - tile + 1, stride, dtype=np.int64)
+    if starts[-1] != length - tile:
+        starts = np.append(starts, length - tile)
+    return starts
+
+
+def tile_grid(frame_shape: Tuple[int, ...], tile_size: int = 640, overlap: float = 0.2) -> np.ndarray:
+    """
+    Regiões (T, 4) x0, y0, x1, y1 que cobrem o frame com tiles de tile_size
+    pixels e a sobreposição pedida entre vizinhos.
+    """
+    h, w = frame_shape[:2]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    xs = tile_starts(w, tile_size, stride)
+    ys = tile_starts(h, tile_size, stride)
+    x0, y0 = np.meshgrid(xs, ys)
+    x0, y0 = x0.ravel(), y0.ravel()
+    return np.stack([x0, y0, np.minimum(x0 + tile_size, w), np.minimum(y0 + tile_size, h)], axis=1)
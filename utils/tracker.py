@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Rastreador de pessoas (IoU + movimento) com IDs persistentes.
+
+Cada câmera tem seu próprio PersonTracker. As tracks ficam em arrays
+(caixa, velocidade, frames sem detecção), a previsão usa velocidade
+constante e a associação detecção↔track é uma atribuição linear sobre a
+matriz de custo 1 - IoU, calculada de uma vez com NumPy.
+"""
+import logging
+from typing import Tuple
+
+import numpy as np
+
+from utils.association import iou_matrix
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy é opcional: cai para a atribuição gulosa
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+# Custo usado para pares fora do limiar (nunca escolhidos)
+_INVALID_COST = 1e6
+
+
+def greedy_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Atribuição gulosa: pares de menor custo primeiro, cada linha/coluna uma vez."""
+    rows, cols = [], []
+    used_rows, used_cols = set(), set()
+    for flat in np.argsort(cost, axis=None, kind="stable"):
+        r, c = divmod(int(flat), cost.shape[1])
+        if r in used_rows or c in used_cols:
+            continue
+        rows.append(r)
+        cols.append(c)
+        used_rows.add(r)
+        used_cols.add(c)
+        if len(rows) == min(cost.shape):
+            break
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+
+def linear_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Atribuição de custo mínimo (Hungarian via scipy, ou gulosa sem scipy)."""
+    if cost.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(cost)
+        return rows.astype(np.int64), cols.astype(np.int64)
+    return greedy_assignment(cost)
+
+
+class PersonTracker:
+    """Rastreia pessoas entre frames de uma câmera e atribui IDs estáveis."""
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_age: int = 30,
+        velocity_smoothing: float = 0.5,
+    ):
+        """
+        Inicializar rastreador.
+
+        Args:
+            iou_threshold: IoU mínimo entre caixa prevista e detecção
+            max_age: Frames sem detecção até a track ser removida
+            velocity_smoothing: Peso da velocidade nova na média móvel (0-1)
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.velocity_smoothing = velocity_smoothing
+
+        self.track_ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4), dtype=np.float64)  # Última caixa observada
+        self.velocity = np.zeros((0, 4), dtype=np.float64)  # Pixels por frame
+        self.misses = np.zeros(0, dtype=np.int64)  # Frames seguidos sem detecção
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.active = np.zeros(0, dtype=bool)  # Vista no último update()
+        self.match_ratio = 1.0  # Fração de tracks ativas/detecções casadas no último update()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    def predicted_boxes(self, steps: int = 1) -> np.ndarray:
+        """Caixas previstas (velocidade constante) daqui a `steps` frames."""
+        return self.boxes + self.velocity * (self.misses + steps)[:, None]
+
+    def update(self, persons) -> np.ndarray:
+        """
+        Associar as pessoas detectadas no frame às tracks.
+
+        Args:
+            persons: DetectionBatch (ou array (N, 4) xyxy) das pessoas do frame
+
+        Returns:
+            Array (N,) com o ID de track de cada pessoa, na ordem das detecções
+        """
+        detections = np.asarray(getattr(persons, "xyxy", persons), dtype=np.float64).reshape(-1, 4)
+        ids = np.full(len(detections), -1, dtype=np.int64)
+        matched = np.zeros(len(self), dtype=bool)
+
+        if len(self) and len(detections):
+            iou = iou_matrix(self.predicted_boxes(), detections)
+            cost = np.where(iou >= self.iou_threshold, 1.0 - iou, _INVALID_COST)
+            rows, cols = linear_assignment(cost)
+            valid = cost[rows, cols] < _INVALID_COST
+            rows, cols = rows[valid], cols[valid]
+
+            # Velocidade média desde a última observação, suavizada
+            elapsed = (self.misses[rows] + 1)[:, None]
+            observed = (detections[cols] - self.boxes[rows]) / elapsed
+            # Primeira reobservação: ainda não há velocidade para suavizar
+            a = np.where(self.hits[rows] == 1, 1.0, self.velocity_smoothing)[:, None]
+            self.velocity[rows] = a * observed + (1 - a) * self.velocity[rows]
+            self.boxes[rows] = detections[cols]
+            self.hits[rows] += 1
+            matched[rows] = True
+            ids[cols] = self.track_ids[rows]
+
+        # Só tracks vistas no update anterior (ou reencontradas agora) contam: as
+        # inativas à espera de expirar não derrubam a razão numa cena vazia
+        num_tracks = int((self.active | matched).sum())
+        if num_tracks + len(detections):
+            self.match_ratio = 2 * int(matched.sum()) / (num_tracks + len(detections))
+        else:
+            self.match_ratio = 1.0
+
+        # Tracks sem detecção envelhecem; as velhas demais morrem
+        self.misses = np.where(matched, 0, self.misses + 1)
+        self.active = matched
+        self._drop_expired()
+
+        # Detecções sem track viram tracks novas
+        unmatched = np.flatnonzero(ids < 0)
+        if len(unmatched):
+            new_ids = np.arange(self._next_id, self._next_id + len(unmatched), dtype=np.int64)
+            self._next_id += len(unmatched)
+            ids[unmatched] = new_ids
+            self.track_ids = np.concatenate([self.track_ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, detections[unmatched]])
+            self.velocity = np.concatenate([self.velocity, np.zeros((len(unmatched), 4))])
+            self.misses = np.concatenate([self.misses, np.zeros(len(unmatched), dtype=np.int64)])
+            self.hits = np.concatenate([self.hits, np.ones(len(unmatched), dtype=np.int64)])
+            self.active = np.concatenate([self.active, np.ones(len(unmatched), dtype=bool)])
+
+        return ids
+
+    def propagate(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Avançar um frame sem detecção (frames entre keyframes).
+
+        Returns:
+            (track_ids, caixas previstas) das tracks vistas no último update()
+        """
+        self.misses += 1
+        self._drop_expired()
+        return self.track_ids[self.active], self.predicted_boxes(steps=0)[self.active]
+
+    def _drop_expired(self):
+        alive = self.misses <= self.max_age
+        if not alive.all():
+            self._keep(alive)
+
+    def _keep(self, mask: np.ndarray):
+        self.track_ids = self.track_ids[mask]
+        self.boxes = self.boxes[mask]
+        self.velocity = self.velocity[mask]
+        self.misses = self.misses[mask]
+        self.hits = self.hits[mask]
+        self.active = self.active[mask]
+
+    def reset(self):
+        """Descartar todas as tracks (ex: troca de cena ou de câmera)."""
+        self._keep(np.zeros(len(self), dtype=bool))
@@ -1,12 +1,16 @@
 """
 Validação de EPIs e geração de alertas.
 """
-from typing import List, Dict
+from typing import List, Dict, Sequence
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
 import logging
 
+import numpy as np
+
+from utils.ppe_rules import PPERules
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,11 +34,45 @@ class EPIValidator:
 
     def __init__(self, required_epis: List[str]):
         self.required_epis = [ppe.lower() for ppe in required_epis]
+        self.rules = PPERules(self.required_epis)
+
+        # Resultado de cada máscara possível (2^N), calculado uma vez
+        self._results = [self._build_result(mask) for mask in range(self.rules.size)]
+        self._severity_table = np.array([r["severity"] for r in self._results], dtype=object)
+
+    def compile_classes(self, class_names: Dict[int, str], normalize=None):
+        """Compilar as classes do modelo em bits (refazer quando o modelo mudar)."""
+        self.rules.compile_classes(class_names, normalize)
+
+    def _build_result(self, mask: int) -> Dict[str, any]:
+        missing = self.rules.names_of(self.rules.full_mask & ~mask)
+        
+        # Calcular severidade
+        missing_percent = len(missing) / len(self.required_epis) if self.required_epis else 0
+        if not missing:
+            severity = "info"  # OK
+        elif missing_percent < 0.5:
+            severity = "warning"  # Falta alguns
+        else:
+            severity = "critical"  # Falta a maioria
+
+        return {
+            "missing": missing,
+            "present": self.rules.names_of(mask),
+            "complete": len(missing) == 0,
+            "severity": severity,
+            "missing_percent": missing_percent,
+        }
+
+    def result_for(self, mask: int) -> Dict[str, any]:
+        """Resultado pré-calculado de uma máscara (compartilhado: não modificar)."""
+        return self._results[mask]
 
     def validate_person(self, detected_ppes: Dict[str, any]) -> Dict[str, any]:
         """
         Validar EPIs de uma pessoa.
         Retorna dict com: missing, present, complete (bool), severity
+        (resultado pré-calculado por máscara, compartilhado: não modificar)
         """
         # Se não há requisitos, tudo é OK
         if not self.required_epis:
@@ -45,45 +83,27 @@ class EPIValidator:
                 "severity": "info",
                 "missing_percent": 0.0,
             }
-        
-        detected_types = set()
-        
-        # Mapear classes detectadas para tipos de EPI esperados
-        for detected_class in detected_ppes.keys():
-            # Ignorar "person" - não é um EPI
-            if detected_class.lower() == "person":
-                continue
-            
-            detected_lower = detected_class.lower()
-            for required in self.required_epis:
-                # Verificar match EXATO ou como substring do início (evita falsos positivos)
-                # Ex: "glove" == "gloves" -> True (substring exata)
-                #     "ves" in "vest" -> False (evitar)
-                if detected_lower == required or (
-                    len(detected_lower) > len(required) and detected_lower.startswith(required)
-                ) or (
-                    len(required) > len(detected_lower) and required.startswith(detected_lower)
-                ):
-                    detected_types.add(required)
-                    break
-
-        missing = [ppe for ppe in self.required_epis if ppe not in detected_types]
-        
-        # Calcular severidade
-        missing_percent = len(missing) / len(self.required_epis) if self.required_epis else 0
-        if not missing:
-            severity = "info"  # OK
-        elif missing_percent < 0.5:
-            severity = "warning"  # Falta alguns
-        else:
-            severity = "critical"  # Falta a maioria
 
+        # Match EXATO ou por prefixo ("glove" == "gloves"), compilado por nome; "person" ignorado
+        return self._results[self.rules.mask_of(detected_ppes)]
+
+    def frame_masks(self, person_statuses: Sequence) -> np.ndarray:
+        """Máscara de EPIs presentes de cada pessoa (PersonEPIStatus) de um frame."""
+        return self.rules.person_masks([s.detected_ppes for s in person_statuses])
+
+    def validate_frame(self, masks: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Validar todas as pessoas de um frame de uma vez (máscaras de EPIs presentes,
+        ex: rules.mask_of por pessoa ou rules.masks_from_classes).
+        Retorna dict de arrays: missing_mask, missing_count, complete, severity
+        """
+        masks = np.asarray(masks, dtype=np.int64)
+        missing_mask = self.rules.full_mask & ~masks
         return {
-            "missing": missing,
-            "present": list(detected_types),
-            "complete": len(missing) == 0,
-            "severity": severity,
-            "missing_percent": missing_percent,
+            "missing_mask": missing_mask,
+            "missing_count": self.rules.popcount[missing_mask],
+            "complete": missing_mask == 0,
+            "severity": self._severity_table[masks],
         }
 
     def create_alert(
@@ -7,12 +7,16 @@ Laranja: Alguns EPIs faltando
 Vermelho: Maioria dos EPIs faltando
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
 import logging
 
+import numpy as np
+
+from utils.ppe_rules import PPERules
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,39 +54,25 @@ class EPIValidator:
             required_epis: Lista de EPIs obrigatórios (ex: ["helmet", "goggles"])
         """
         self.required_epis = [ppe.lower() for ppe in required_epis]
+        self.rules = PPERules(self.required_epis)
+
+        # Resultado de cada máscara possível (2^N), calculado uma vez
+        self._results = [self._build_result(mask) for mask in range(self.rules.size)]
+        self._severity_table = np.array([r["severity"] for r in self._results], dtype=object)
+        self._missing_percent_table = np.array([r["missing_percent"] for r in self._results], dtype=np.float64)
         logger.info(f"Validador inicializado. EPIs obrigatórios: {self.required_epis}")
 
-    def validate_person(self, detected_ppes: Dict[str, Any]) -> Dict[str, Any]:
+    def compile_classes(self, class_names: Dict[int, str], normalize=None):
         """
-        Validar EPIs de uma pessoa.
-        
-        Args:
-            detected_ppes: Dict com EPIs detectados (chave: "helmet", "goggles", etc)
-        
-        Returns:
-            Dict com: missing, present, complete (bool), severity, color, message
+        Compilar as classes do modelo em bits (ex: compile_classes(detector.class_names,
+        detector.normalize_ppe_name)); refazer quando o modelo mudar.
         """
-        detected_types = set()
-        
-        # Mapear classes detectadas para tipos de EPI esperados
-        for detected_class in detected_ppes.keys():
-            detected_lower = detected_class.lower()
-            
-            # Verificar match com requisitos
-            for required in self.required_epis:
-                if detected_lower == required or (
-                    len(detected_lower) > len(required) and 
-                    detected_lower.startswith(required)
-                ) or (
-                    len(required) > len(detected_lower) and 
-                    required.startswith(detected_lower)
-                ):
-                    detected_types.add(required)
-                    break
-
-        # EPIs faltando
-        missing = [ppe for ppe in self.required_epis if ppe not in detected_types]
-        
+        self.rules.compile_classes(class_names, normalize)
+
+    def _build_result(self, mask: int) -> Dict[str, Any]:
+        """Resultado da validação para uma máscara de EPIs presentes."""
+        missing = self.rules.names_of(self.rules.full_mask & ~mask)
+
         # Calcular severidade
         if not self.required_epis:
             # Sem requisitos definidos, apenas detectar pessoas
@@ -97,7 +87,7 @@ class EPIValidator:
             color = self.COLORS["ok"]
             message = f"✓ OK - Todos os {len(self.required_epis)} EPIs"
         else:
-            missing_percent = len(missing) / len(self.required_epis) if self.required_epis else 0
+            missing_percent = len(missing) / len(self.required_epis)
             
             if missing_percent < 0.5:
                 # Menos de 50% faltando
@@ -112,7 +102,7 @@ class EPIValidator:
 
         return {
             "missing": missing,
-            "present": list(detected_types),
+            "present": self.rules.names_of(mask),
             "complete": len(missing) == 0,
             "severity": severity,
             "missing_percent": missing_percent,
@@ -120,6 +110,50 @@ class EPIValidator:
             "message": message,
         }
 
+    def result_for(self, mask: int) -> Dict[str, Any]:
+        """Resultado pré-calculado de uma máscara (compartilhado: não modificar)."""
+        return self._results[mask]
+
+    def validate_person(self, detected_ppes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validar EPIs de uma pessoa.
+        
+        Args:
+            detected_ppes: Dict com EPIs detectados (chave: "helmet", "goggles", etc)
+        
+        Returns:
+            Dict com: missing, present, complete (bool), severity, color, message
+        """
+        return self._results[self.rules.mask_of(detected_ppes)]
+
+    def frame_masks(self, person_statuses: Sequence) -> np.ndarray:
+        """
+        Máscara de EPIs presentes de cada pessoa (PersonEPIStatus) de um frame.
+        Com compile_classes, vem da tabela class_id -> bit num único bitwise_or.
+        """
+        return self.rules.person_masks([s.detected_ppes for s in person_statuses])
+
+    def validate_frame(self, masks: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Validar todas as pessoas de um frame de uma vez.
+
+        Args:
+            masks: Máscara de EPIs presentes por pessoa (frame_masks)
+
+        Returns:
+            Dict de arrays (uma posição por pessoa): missing_mask, missing_count,
+            missing_percent, complete, severity
+        """
+        masks = np.asarray(masks, dtype=np.int64)
+        missing_mask = self.rules.full_mask & ~masks
+        return {
+            "missing_mask": missing_mask,
+            "missing_count": self.rules.popcount[missing_mask],
+            "missing_percent": self._missing_percent_table[masks],
+            "complete": missing_mask == 0,
+            "severity": self._severity_table[masks],
+        }
+
     def create_alert(
         self,
         frame_number: int,
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Inferência em vários processos (contorna o GIL em máquinas com muitos núcleos).
+
+Cada processo worker carrega seu EPIDetector (com "fork", herda o do processo
+principal, pesos compartilhados copy-on-write). Os frames chegam por um anel
+de slots em multiprocessing.shared_memory (sem pickle de arrays numpy) e os
+resultados voltam como registros compactos (array estruturado numpy).
+"""
+import gc
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.detections import DetectionBatch
+
+logger = logging.getLogger(__name__)
+
+# Registro compacto de uma detecção (24 bytes)
+DETECTION_DTYPE = np.dtype([
+    ("x1", np.int32),
+    ("y1", np.int32),
+    ("x2", np.int32),
+    ("y2", np.int32),
+    ("class_id", np.int16),
+    ("is_person", np.uint8),
+    ("_pad", np.uint8),
+    ("confidence", np.float32),
+])
+
+
+def detections_to_records(persons, ppes) -> np.ndarray:
+    """Empacotar (persons, ppes) em um array estruturado DETECTION_DTYPE."""
+    persons = DetectionBatch.from_detections(persons)
+    ppes = DetectionBatch.from_detections(ppes)
+    records = np.zeros(len(persons) + len(ppes), dtype=DETECTION_DTYPE)
+    for name, column in zip(("x1", "y1", "x2", "y2"), np.concatenate([persons.xyxy, ppes.xyxy]).T):
+        records[name] = column
+    records["class_id"] = np.concatenate([persons.class_ids, ppes.class_ids])
+    records["is_person"][:len(persons)] = 1
+    records["confidence"] = np.concatenate([persons.confidences, ppes.confidences])
+    return records
+
+
+def records_to_detections(records: np.ndarray, class_names: Dict[int, str]):
+    """Reconstruir (persons, ppes) como DetectionBatch a partir dos registros compactos."""
+    batch = DetectionBatch.from_arrays(
+        np.stack([records["x1"], records["y1"], records["x2"], records["y2"]], axis=1),
+        records["class_id"],
+        records["confidence"],
+        class_names,
+    )
+    return batch.split(records["is_person"].astype(bool))
+
+
+class SharedFrameRing:
+    """Anel de slots de frames em memória compartilhada."""
+
+    def __init__(self, num_slots: int, max_frame_shape: Tuple[int, int, int], name: str = None):
+        self.num_slots = num_slots
+        self.max_frame_shape = tuple(max_frame_shape)
+        self.slot_bytes = int(np.prod(self.max_frame_shape))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * num_slots)
+            self._owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def view(self, slot: int, shape: Tuple[int, ...]) -> np.ndarray:
+        """Array numpy apontando para o slot (sem cópia)."""
+        nbytes = int(np.prod(shape))
+        offset = slot * self.slot_bytes
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf[offset:offset + nbytes])
+
+    def write(self, slot: int, frame: np.ndarray) -> Tuple[int, ...]:
+        """Copiar um frame para o slot. Retorna o shape gravado."""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(
+                f"Frame {frame.shape} maior que o slot {self.max_frame_shape}"
+            )
+        self.view(slot, frame.shape)[...] = frame
+        return frame.shape
+
+    def close(self):
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker_main(worker_idx, model_path, conf_threshold, is_custom, detector_options, ring_name,
+                 ring_slots, max_frame_shape, task_queue, result_queue, free_slots, shared_detector=None):
+    """Loop de um processo worker: lê frames do anel e devolve registros."""
+    ring = SharedFrameRing(ring_slots, max_frame_shape, name=ring_name)
+    if shared_detector is not None:
+        detector = shared_detector  # Herdado no fork: mesmas páginas de pesos do processo principal
+    else:
+        from utils.model_manager import ModelManager
+
+        detector = ModelManager(
+            model_path, conf_threshold, is_custom=is_custom, detector_options=detector_options
+        ).load()
+    result_queue.put(("ready", worker_idx, detector.class_names))
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            task_id, slot, shape = task
+
+            t0 = time.perf_counter()
+            try:
+                persons, ppes = detector.detect_frame(ring.view(slot, shape))
+                records = detections_to_records(persons, ppes).tobytes()
+                error = None
+            except Exception as e:
+                records, error = b"", str(e)
+            finally:
+                free_slots.put(slot)
+
+            result_queue.put(("result", task_id, records, time.perf_counter() - t0, error))
+    finally:
+        ring.close()
+
+
+class InferenceWorkerPool:
+    """Pool de processos de inferência, cada um com um EPIDetector."""
+
+    def __init__(
+        self,
+        model_path: str,
+        num_workers: int = 2,
+        conf_threshold: float = 0.3,
+        is_custom: bool = False,
+        max_frame_shape: Tuple[int, int, int] = (1080, 1920, 3),
+        num_slots: Optional[int] = None,
+        start_method: str = "spawn",
+        detector_options: Optional[Dict] = None,
+        shared_detector=None,
+    ):
+        """
+        Inicializar pool.
+
+        Args:
+            model_path: Caminho do modelo (carregado em cada worker)
+            num_workers: Número de processos
+            conf_threshold: Confiança mínima
+            is_custom: Se modelo é customizado
+            max_frame_shape: Maior frame aceito (define o tamanho de cada slot)
+            num_slots: Slots do anel (padrão: 2 por worker)
+            start_method: "spawn" (seguro com threads de captura) ou "fork"
+            detector_options: Parâmetros extras do EPIDetector (ex: mode)
+            shared_detector: Detector já carregado neste processo; com "fork" e
+                backend pytorch os workers o herdam em vez de carregar outro
+                (sessões onnxruntime/openvino não sobrevivem ao fork)
+        """
+        if start_method == "fork" and threading.current_thread() is not threading.main_thread():
+            # Ex: pool novo criado pela thread de troca de modelo, com captura e escrita rodando
+            logger.warning("Pool criado fora da thread principal: usando 'spawn' em vez de 'fork'")
+            start_method = "spawn"
+        self.model_path = model_path
+        self.num_workers = num_workers
+        self.conf_threshold = conf_threshold
+        self.is_custom = is_custom
+        self.detector_options = detector_options or {}
+        self.start_method = start_method
+        backend = self.detector_options.get("backend", "pytorch")
+        self.shared_detector = shared_detector if start_method == "fork" and backend == "pytorch" else None
+        self.num_slots = num_slots or 2 * num_workers
+        self.ring = SharedFrameRing(self.num_slots, max_frame_shape)
+        self.class_names: Dict[int, str] = {}
+
+        self._ctx = mp.get_context(start_method)
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._free_slots = self._ctx.Queue()
+        for slot in range(self.num_slots):
+            self._free_slots.put(slot)
+
+        self._processes = []
+        self._next_task_id = 0
+        self._pending: Dict[int, tuple] = {}  # Resultados que chegaram fora de ordem
+
+    def start(self, timeout: float = 120.0):
+        """Iniciar os workers e esperar todos carregarem o modelo."""
+        if self.shared_detector is not None:
+            # Objetos atuais fora do GC: a coleta nos filhos não reescreve as páginas herdadas
+            gc.freeze()
+        for idx in range(self.num_workers):
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(
+                    idx, self.model_path, self.conf_threshold, self.is_custom,
+                    self.detector_options, self.ring.name, self.num_slots, self.ring.max_frame_shape,
+                    self._task_queue, self._result_queue, self._free_slots, self.shared_detector,
+                ),
+                name=f"epi-worker-{idx}",
+                daemon=True,
+            )
+            p.start()
+            self._processes.append(p)
+
+        ready = 0
+        while ready < self.num_workers:
+            kind, _, class_names = self._result_queue.get(timeout=timeout)
+            if kind == "ready":
+                self.class_names = class_names
+                ready += 1
+        if self.shared_detector is not None:
+            gc.unfreeze()
+        shared = " | modelo compartilhado (fork)" if self.shared_detector is not None else ""
+        logger.info(f"{self.num_workers} workers de inferência prontos ({self.num_slots} slots){shared}")
+
+    def submit(self, frame: np.ndarray, timeout: float = None) -> int:
+        """Copiar o frame para um slot livre e enfileirar. Retorna o task_id."""
+        if frame.nbytes > self.ring.slot_bytes:
+            # Antes de ocupar um slot: um frame recusado não pode prender o anel
+            raise ValueError(f"Frame {frame.shape} maior que o slot {self.ring.max_frame_shape}")
+        slot = self._free_slots.get(timeout=timeout)  # Backpressure: espera slot livre
+        try:
+            shape = self.ring.write(slot, frame)
+        except Exception:
+            self._free_slots.put(slot)
+            raise
+        task_id = self._next_task_id
+        self._next_task_id += 1
+        self._task_queue.put((task_id, slot, shape))
+        return task_id
+
+    def get_result(self, task_id: int, timeout: float = None):
+        """Esperar o resultado de uma tarefa. Retorna (persons, ppes)."""
+        deadline = None if timeout is None else time.time() + timeout
+        while task_id not in self._pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                message = self._result_queue.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError(f"Timeout aguardando tarefa {task_id}")
+            if message[0] == "result":
+                _, tid, records, _, error = message
+                self._pending[tid] = (records, error)
+
+        records, error = self._pending.pop(task_id)
+        if error:
+            raise RuntimeError(f"Erro no worker: {error}")
+        return records_to_detections(
+            np.frombuffer(records, dtype=DETECTION_DTYPE), self.class_names
+        )
+
+    def detect_many(self, frames: List[np.ndarray]) -> List[Tuple[list, list]]:
+        """Distribuir frames entre os workers e devolver (persons, ppes) na mesma ordem."""
+        # submit() bloqueia enquanto o anel estiver cheio; os workers liberam
+        # o slot assim que terminam a inferência
+        task_ids = [self.submit(frame) for frame in frames]
+        return [self.get_result(tid) for tid in task_ids]
+
+    def close(self):
+        """Encerrar workers e liberar a memória compartilhada."""
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for p in self._processes:
+            p.join(timeout=5.0)
+            if p.is_alive():
+                p.terminate()
+        self._processes = []
+        self.ring.close()
+        logger.info("Workers de inferência encerrados")
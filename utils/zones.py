@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Zonas poligonais por câmera mapeadas para setores (REQUIRED_PPE_BY_SECTOR).
+
+Os polígonos são rasterizados uma vez num mapa de rótulos do tamanho do
+frame (0 = fora de zona, i + 1 = i-ésimo setor); o setor de uma pessoa é o
+rótulo no ponto do pé (centro da base da caixa), uma leitura de array para
+todas as pessoas do frame. Zonas sobrepostas: vale a última da lista.
+"""
+import logging
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def display_name(text: str) -> str:
+    """Texto em ASCII para cv2.putText (sem acentos: "química" -> "quimica")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return ascii_text.encode("ascii", "replace").decode("ascii")
+
+
+class SectorZones:
+    """Zonas de uma câmera (polígonos em pixels do frame) e seus setores."""
+
+    def __init__(self, zones: Sequence[Tuple[str, Sequence[Tuple[int, int]]]]):
+        """
+        Args:
+            zones: [(setor, [(x, y), ...]), ...]; um setor pode ter várias zonas
+        """
+        self.zones = []
+        self.sectors: List[str] = []
+        for sector, polygon in zones:
+            polygon = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+            if len(polygon) < 3:
+                raise ValueError(f"Zona do setor '{sector}' precisa de pelo menos 3 vértices")
+            if sector not in self.sectors:
+                self.sectors.append(sector)
+            self.zones.append((sector, polygon))
+        if len(self.sectors) > 254:
+            raise ValueError("No máximo 254 setores por câmera")
+        self._labels: Optional[np.ndarray] = None  # Mapa de rótulos (uint8), por resolução do frame
+
+    @classmethod
+    def from_config(cls, zones: Dict[str, Sequence]) -> "SectorZones":
+        """
+        Criar de {setor: polígono} ou {setor: [polígono, ...]} (CAMERA_ZONES).
+        """
+        items = []
+        for sector, value in zones.items():
+            polygons = [value] if np.ndim(value[0]) == 1 else value  # Um polígono ou uma lista deles
+            items.extend((sector, polygon) for polygon in polygons)
+        return cls(items)
+
+    def labels(self, frame_shape) -> np.ndarray:
+        """Mapa de rótulos do frame (rasterizado na primeira chamada e se a resolução mudar)."""
+        h, w = frame_shape[:2]
+        if self._labels is None or self._labels.shape != (h, w):
+            self._labels = np.zeros((h, w), dtype=np.uint8)
+            for sector, polygon in self.zones:
+                cv2.fillPoly(self._labels, [polygon], self.sectors.index(sector) + 1)
+            logger.info(f"Zonas rasterizadas em {w}x{h}: {self.sectors}")
+        return self._labels
+
+    def lookup(self, xyxy: np.ndarray, frame_shape) -> np.ndarray:
+        """
+        Índice do setor (em self.sectors) de cada caixa pelo ponto do pé; -1 fora de zona.
+
+        Args:
+            xyxy: Caixas das pessoas (N, 4) em pixels do frame
+            frame_shape: Shape do frame (altura, largura, ...)
+        """
+        labels = self.labels(frame_shape)
+        xyxy = np.asarray(xyxy).reshape(-1, 4)
+        h, w = labels.shape
+        fx = np.clip((xyxy[:, 0] + xyxy[:, 2]) // 2, 0, w - 1).astype(np.intp)
+        fy = np.clip(xyxy[:, 3], 0, h - 1).astype(np.intp)
+        return labels[fy, fx].astype(np.int64) - 1
+
+    def draw(self, image: np.ndarray, color=(255, 0, 255)):
+        """Desenhar o contorno e o setor de cada zona."""
+        for sector, polygon in self.zones:
+            cv2.polylines(image, [polygon], True, color, 1)
+            x, y = polygon.min(axis=0)
+            cv2.putText(image, display_name(sector), (int(x) + 4, int(y) + 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)